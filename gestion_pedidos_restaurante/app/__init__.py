@@ -1 +1,69 @@
-# Archivo vacío para hacer que la carpeta app sea un paquete de Python
\ No newline at end of file
+from flask import Flask
+
+from app.config import Config, opciones_motor
+from app.extensions import db, login_manager
+
+
+def create_app(config=None):
+    """Crear la aplicación con la configuración por defecto más `config`
+    
+    `config` puede ser una clase/objeto de configuración o un diccionario.
+    """
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    if isinstance(config, dict):
+        app.config.update(config)
+    elif config is not None:
+        app.config.from_object(config)
+    
+    # Pool según la base de datos final; SQLALCHEMY_ENGINE_OPTIONS explícitas prevalecen
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**opciones_motor(app.config),
+                                               **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+    
+    # Extensiones
+    db.init_app(app)
+    login_manager.init_app(app)
+    login_manager.login_view = 'auth.login'
+    login_manager.login_message = 'Por favor inicia sesión para acceder a esta página.'
+    
+    # Motor aparte para reportes y exportaciones (réplica o SQLite en mode=ro)
+    from app import solo_lectura
+    solo_lectura.init_app(app)
+    
+    # Pragmas de SQLite en cada conexión y mantenimiento periódico
+    from app import perfil_sqlite
+    perfil_sqlite.init_app(app)
+    
+    # Contadores de las tarjetas de resumen
+    from app import estadisticas
+    estadisticas.init_app(app)
+    
+    # Servicios de reportes (cache, gráficos y trabajos en segundo plano)
+    from app.reportes import servicios
+    servicios.init_app(app)
+    
+    # Servicios de pedidos (mapa de precios cacheado)
+    from app.pedidos import servicios as servicios_pedidos
+    servicios_pedidos.init_app(app)
+    
+    # Blueprints
+    from app.api.routes import api_bp
+    from app.auth.routes import auth_bp
+    from app.empleados.routes import empleados_bp
+    from app.main.routes import main_bp
+    from app.mesas.routes import mesas_bp
+    from app.pedidos.routes import pedidos_bp
+    from app.productos.routes import productos_bp
+    from app.reportes.routes import reportes_bp
+    for blueprint in (api_bp, auth_bp, empleados_bp, main_bp, mesas_bp, pedidos_bp, productos_bp, reportes_bp):
+        app.register_blueprint(blueprint)
+    
+    # Comandos de mantenimiento (flask --app wsgi <comando> o python app.py <comando>)
+    from app.datos_iniciales import init_db_command
+    from app.migraciones import migrar_command
+    from app.rollup import reconstruir_rollup_command
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(migrar_command)
+    app.cli.add_command(reconstruir_rollup_command)
+    
+    return app
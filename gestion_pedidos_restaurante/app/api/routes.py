@@ -0,0 +1,225 @@
+from flask import Blueprint, request, jsonify, current_app, url_for, get_template_attribute
+from flask_login import current_user
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta, timezone
+import json
+
+from app.estadisticas import estadisticas_mesas, resumen_general
+from app.extensions import db
+from app.mesas.servicios import anotar_pedidos_actuales, consulta_mesas_cambiadas, version_mesas
+from app.models import Mesa, Pedido, ClaveIdempotencia
+from app.paginacion import paginar_por_fecha, total_aproximado
+from app.pedidos.servicios import (cache_precios, clave_total_pedidos, construir_detalles, guardar_pedido,
+                                   pedidos_visibles)
+from app.solo_lectura import solo_lectura
+
+api_bp = Blueprint('api', __name__)
+
+@api_bp.before_request
+def requiere_sesion():
+    """Las rutas de la API responden 401 en JSON en lugar de redirigir al login"""
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Autenticación requerida'}), 401
+
+@api_bp.route('/api/v1/pedidos', methods=['GET'])
+def listar_pedidos():
+    """Pedidos visibles para el usuario, paginados por cursor
+
+    Parámetros: estado, despues/antes (cursores devueltos en la respuesta),
+    limite (máximo 100) y total=1 para incluir el total aproximado.
+    """
+    estado = request.args.get('estado', 'todos')
+    limite = max(1, min(request.args.get('limite', 20, type=int), 100))
+    query = pedidos_visibles(current_user, estado)
+    pagina = paginar_por_fecha(query, Pedido, despues=request.args.get('despues'),
+                               antes=request.args.get('antes'), por_pagina=limite)
+
+    cuerpo = {
+        'pedidos': [{
+            'id': pedido.id,
+            'cliente_nombre': pedido.cliente_nombre,
+            'mesa_id': pedido.mesa_id,
+            'mesa': pedido.mesa_numero,
+            'estado': pedido.estado,
+            'total': pedido.total,
+            'fecha': pedido.fecha.isoformat()
+        } for pedido in pagina.items],
+        'siguiente': pagina.siguiente,
+        'anterior': pagina.anterior
+    }
+    if request.args.get('total') == '1':
+        cuerpo['total_aproximado'] = total_aproximado(query, clave_total_pedidos(current_user, estado))
+    return jsonify(cuerpo)
+
+@api_bp.route('/api/v1/pedidos', methods=['POST'])
+def crear_pedido():
+    """Crear un pedido desde JSON; los reintentos con la misma Idempotency-Key no lo duplican
+
+    Cuerpo: {"cliente_nombre", "cliente_telefono", "mesa", "observaciones",
+    "detalles": [{"producto_id", "cantidad", "observaciones"}]}
+    """
+    clave = request.headers.get('Idempotency-Key', '').strip()
+    if not clave or len(clave) > 100:
+        return jsonify({'error': 'Se requiere la cabecera Idempotency-Key (máximo 100 caracteres)'}), 400
+
+    # Un reintento cuesta una sola búsqueda por clave primaria
+    ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+    guardada = db.session.get(ClaveIdempotencia, clave)
+    if guardada is not None and guardada.expira > ahora:
+        return _repetir_respuesta(guardada)
+
+    datos = request.get_json(silent=True)
+    if not isinstance(datos, dict):
+        return jsonify({'error': 'El cuerpo debe ser un objeto JSON'}), 400
+
+    lineas, errores = _validar_lineas(datos.get('detalles'))
+    cliente_nombre = str(datos.get('cliente_nombre') or '').strip()
+    if not cliente_nombre:
+        errores.append('cliente_nombre es obligatorio')
+    if errores:
+        return jsonify({'errores': errores}), 422
+
+    mesa_numero = str(datos['mesa']) if datos.get('mesa') is not None else None
+    mesa_obj = None
+    if mesa_numero:
+        mesa_obj = Mesa.query.filter_by(numero=mesa_numero, activa=True).first()
+        if mesa_obj is None:
+            return jsonify({'errores': [f'La mesa {mesa_numero} no existe']}), 422
+        if mesa_obj.estado == 'ocupada':
+            return jsonify({'error': f'La mesa {mesa_numero} ya está ocupada'}), 409
+
+    precios = {id: precio for id, (precio, _) in cache_precios.obtener().items()}
+    detalles, total = construir_detalles(lineas, precios)
+    pedido = Pedido(
+        cliente_nombre=cliente_nombre,
+        cliente_telefono=datos.get('cliente_telefono'),
+        mesa_id=mesa_obj.id if mesa_obj else None,
+        mesa_numero=mesa_numero,
+        observaciones=datos.get('observaciones'),
+        estado='pendiente',
+        usuario_id=current_user.id,
+        total=total
+    )
+    if mesa_obj:
+        mesa_obj.estado = 'ocupada'
+
+    try:
+        guardar_pedido(pedido, detalles)
+        cuerpo = {
+            'id': pedido.id,
+            'estado': pedido.estado,
+            'total': pedido.total,
+            'mesa': mesa_numero,
+            'lineas': len(detalles),
+            'fecha': pedido.fecha.isoformat()
+        }
+
+        # Las claves vencidas (incluida esta, si lo estaba) se borran con el índice de expira
+        if guardada is not None:
+            db.session.expunge(guardada)
+        ClaveIdempotencia.query.filter(ClaveIdempotencia.expira <= ahora).delete(synchronize_session=False)
+        db.session.add(ClaveIdempotencia(
+            clave=clave,
+            usuario_id=current_user.id,
+            pedido_id=pedido.id,
+            respuesta=json.dumps(cuerpo),
+            expira=ahora + timedelta(seconds=current_app.config['IDEMPOTENCIA_TTL'])
+        ))
+        db.session.commit()
+    except IntegrityError:
+        # Otra petición con la misma clave se confirmó antes: se descarta
+        # este pedido y se devuelve el suyo
+        db.session.rollback()
+        guardada = db.session.get(ClaveIdempotencia, clave)
+        if guardada is None:
+            raise
+        return _repetir_respuesta(guardada)
+
+    respuesta = jsonify(cuerpo)
+    respuesta.status_code = 201
+    respuesta.headers['Location'] = url_for('pedidos.ver_pedido', id=cuerpo['id'])
+    return respuesta
+
+@api_bp.route('/api/estados')
+@solo_lectura
+def api_estados():
+    """Cantidad de pedidos por estado"""
+    return jsonify(resumen_general()['pedidos_por_estado'])
+
+@api_bp.route('/api/mesas/cambios')
+def cambios_mesas():
+    """Mesas cuyo estado o pedido actual cambió después de la marca `since`
+    
+    Sin cambios solo se lee la marca (y en PostgreSQL, el índice de version). Con `vista=grid|tabla`
+    cada mesa incluye el HTML de su tarjeta o fila para sustituirla en la
+    página. `ids` (mesas activas) permite quitar las eliminadas.
+    """
+    if current_user.rol == 'cocinero':
+        return jsonify({'error': 'No tienes permisos para ver las mesas'}), 403
+    
+    version = version_mesas()
+    query = consulta_mesas_cambiadas(request.args.get('since', 0, type=int), version)
+    mesas = query.order_by(Mesa.numero).all() if query is not None else []
+    if not mesas:
+        return jsonify({'version': version, 'mesas': []})
+    anotar_pedidos_actuales(mesas)
+    
+    vista = request.args.get('vista')
+    plantilla = {'grid': 'tarjeta_mesa', 'tabla': 'fila_mesa'}.get(vista)
+    macro = get_template_attribute('mesas/_mesa.html', plantilla) if plantilla else None
+    
+    cambios = []
+    for mesa in mesas:
+        pedido = mesa.pedido_actual
+        cambio = {
+            'id': mesa.id,
+            'numero': mesa.numero,
+            'capacidad': mesa.capacidad,
+            'ubicacion': mesa.ubicacion,
+            'estado': mesa.estado,
+            'activa': mesa.activa,
+            'pedido_actual': {
+                'id': pedido.id,
+                'cliente_nombre': pedido.cliente_nombre,
+                'estado': pedido.estado,
+                'total': pedido.total
+            } if pedido else None,
+            'segundos_ocupada': mesa.segundos_ocupada
+        }
+        if macro:
+            cambio['html'] = str(macro(mesa))
+        cambios.append(cambio)
+    
+    activas = [id for id, in db.session.query(Mesa.id).filter_by(activa=True)]
+    return jsonify({'version': version, 'mesas': cambios, 'ids': activas, 'stats': estadisticas_mesas(version)})
+
+def _validar_lineas(detalles):
+    """[(producto_id, cantidad, observaciones)] y errores contra el mapa de precios cacheado"""
+    if not isinstance(detalles, list) or not detalles:
+        return [], ['detalles debe ser una lista con al menos un producto']
+
+    disponibles = cache_precios.obtener()
+    lineas, errores = [], []
+    for i, detalle in enumerate(detalles):
+        if not isinstance(detalle, dict):
+            errores.append(f'detalles[{i}] debe ser un objeto')
+            continue
+        producto_id, cantidad = detalle.get('producto_id'), detalle.get('cantidad', 1)
+        # type() y no isinstance(): true/false de JSON son bool, subclase de int
+        if type(producto_id) is not int or type(cantidad) is not int or cantidad <= 0:
+            errores.append(f'detalles[{i}]: producto_id y cantidad deben ser enteros positivos')
+        elif not disponibles.get(producto_id, (None, False))[1]:
+            errores.append(f'detalles[{i}]: el producto {producto_id} no existe o no está disponible')
+        else:
+            lineas.append((producto_id, cantidad, detalle.get('observaciones')))
+    return lineas, errores
+
+def _repetir_respuesta(guardada):
+    """Respuesta original de una clave ya usada (409 si pertenece a otro usuario)"""
+    if guardada.usuario_id != current_user.id:
+        return jsonify({'error': 'La Idempotency-Key ya fue usada por otro usuario'}), 409
+    respuesta = current_app.response_class(guardada.respuesta, status=201, mimetype='application/json')
+    respuesta.headers['Idempotent-Replayed'] = 'true'
+    if guardada.pedido_id:
+        respuesta.headers['Location'] = url_for('pedidos.ver_pedido', id=guardada.pedido_id)
+    return respuesta
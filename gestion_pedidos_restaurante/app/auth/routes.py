@@ -0,0 +1,77 @@
+from flask import Blueprint, render_template, redirect, url_for, request, flash
+from flask_login import login_user, login_required, logout_user
+from datetime import datetime, timezone
+
+from app.extensions import db
+from app.models import Usuario
+from app.permisos import requiere_permiso
+
+auth_bp = Blueprint('auth', __name__)
+
+@auth_bp.route('/login', methods=['GET', 'POST'])
+def login():
+    """Página de login"""
+    if request.method == 'POST':
+        username = request.form.get('username')
+        password = request.form.get('password')
+        
+        usuario = Usuario.query.filter_by(username=username).first()
+        
+        if usuario and usuario.check_password(password) and usuario.activo:
+            login_user(usuario)
+            usuario.ultimo_acceso = datetime.now(timezone.utc)
+            db.session.commit()
+            
+            next_page = request.args.get('next')
+            flash(f'¡Bienvenido {usuario.nombre_completo}!', 'success')
+            return redirect(next_page) if next_page else redirect(url_for('main.index'))
+        else:
+            flash('Usuario o contraseña incorrectos', 'error')
+    
+    return render_template('auth/login.html')
+
+@auth_bp.route('/logout')
+@login_required
+def logout():
+    """Cerrar sesión"""
+    logout_user()
+    flash('Has cerrado sesión exitosamente', 'info')
+    return redirect(url_for('auth.login'))
+
+@auth_bp.route('/register', methods=['GET', 'POST'])
+@login_required
+@requiere_permiso('admin')
+def register():
+    """Registro de nuevos usuarios (solo admin)"""
+    if request.method == 'POST':
+        username = request.form.get('username')
+        email = request.form.get('email')
+        password = request.form.get('password')
+        nombre_completo = request.form.get('nombre_completo')
+        rol = request.form.get('rol')
+        
+        # Verificar si el usuario ya existe
+        if Usuario.query.filter_by(username=username).first():
+            flash('El nombre de usuario ya existe', 'error')
+            return render_template('auth/register.html')
+        
+        if Usuario.query.filter_by(email=email).first():
+            flash('El email ya está registrado', 'error')
+            return render_template('auth/register.html')
+        
+        # Crear nuevo usuario
+        usuario = Usuario(
+            username=username,
+            email=email,
+            nombre_completo=nombre_completo,
+            rol=rol
+        )
+        usuario.set_password(password)
+        
+        db.session.add(usuario)
+        db.session.commit()
+        
+        flash(f'Usuario {username} creado exitosamente', 'success')
+        return redirect(url_for('empleados.empleados'))
+    
+    return render_template('auth/register.html')
@@ -0,0 +1,182 @@
+from flask.cli import with_appcontext
+import click
+
+from app.extensions import db
+from app.models import Usuario, Mesa, Producto, Pedido, DetallePedido, VentaRollup
+from app.migraciones import aplicar_migraciones
+from app.rollup import reconstruir_rollup
+
+def crear_datos_iniciales():
+    """Crear datos iniciales para el restaurante"""
+    
+    # Crear usuario administrador por defecto
+    if Usuario.query.count() == 0:
+        admin = Usuario(
+            username='admin',
+            email='admin@restaurante.com',
+            nombre_completo='Administrador del Sistema',
+            rol='admin'
+        )
+        admin.set_password('admin123')  # Cambiar en producción
+        db.session.add(admin)
+        
+        # Crear usuarios de ejemplo
+        mesero1 = Usuario(
+            username='mesero1',
+            email='mesero1@restaurante.com',
+            nombre_completo='Juan Pérez',
+            rol='mesero'
+        )
+        mesero1.set_password('mesero123')
+        db.session.add(mesero1)
+        
+        cocinero1 = Usuario(
+            username='cocinero1',
+            email='cocinero1@restaurante.com',
+            nombre_completo='María González',
+            rol='cocinero'
+        )
+        cocinero1.set_password('cocinero123')
+        db.session.add(cocinero1)
+        
+        print("Usuarios iniciales creados")
+    
+    # Crear mesas por defecto
+    if Mesa.query.count() == 0:
+        mesas_iniciales = [
+            Mesa(numero='1', capacidad=2, ubicacion='interior'),
+            Mesa(numero='2', capacidad=4, ubicacion='interior'),
+            Mesa(numero='3', capacidad=4, ubicacion='interior'),
+            Mesa(numero='4', capacidad=6, ubicacion='interior'),
+            Mesa(numero='5', capacidad=2, ubicacion='terraza'),
+            Mesa(numero='6', capacidad=4, ubicacion='terraza'),
+            Mesa(numero='VIP1', capacidad=8, ubicacion='vip'),
+        ]
+        
+        for mesa in mesas_iniciales:
+            db.session.add(mesa)
+        
+        print("Mesas iniciales creadas")
+    
+    # Crear productos iniciales
+    if Producto.query.count() == 0:
+        productos_iniciales = [
+            Producto(nombre='Hamburguesa Clásica', precio=18.50, categoria='Principal', disponible=True,
+                    descripcion='Hamburguesa de carne con lechuga, tomate, cebolla y papas fritas'),
+            Producto(nombre='Pizza Margherita', precio=25.00, categoria='Principal', disponible=True,
+                    descripcion='Pizza tradicional con tomate, mozzarella y albahaca fresca'),
+            Producto(nombre='Ensalada César', precio=15.00, categoria='Ensalada', disponible=True,
+                    descripcion='Lechuga romana, crutones, queso parmesano y aderezo césar'),
+            Producto(nombre='Papas Fritas', precio=8.00, categoria='Acompañamiento', disponible=True,
+                    descripcion='Papas fritas doradas y crujientes con sal marina'),
+            Producto(nombre='Limonada', precio=6.00, categoria='Bebida', disponible=True,
+                    descripcion='Limonada natural refrescante con hielo y menta'),
+            Producto(nombre='Pollo a la Plancha', precio=22.00, categoria='Principal', disponible=True,
+                    descripcion='Pechuga de pollo a la plancha con verduras y arroz'),
+            Producto(nombre='Ceviche Mixto', precio=28.00, categoria='Marina', disponible=True,
+                    descripcion='Ceviche de pescado y mariscos con camote y choclo'),
+            Producto(nombre='Lomo Saltado', precio=26.00, categoria='Principal', disponible=True,
+                    descripcion='Lomo de res saltado con cebolla, tomate y papas fritas'),
+        ]
+        
+        for producto in productos_iniciales:
+            db.session.add(producto)
+        
+        print("Productos iniciales creados")
+    
+    # Crear pedidos de ejemplo
+    if Pedido.query.count() == 0:
+        # Obtener usuarios y mesa para el ejemplo
+        admin = Usuario.query.filter_by(username='admin').first()
+        mesero = Usuario.query.filter_by(rol='mesero').first()
+        mesa1 = Mesa.query.filter_by(numero='1').first()
+        mesa2 = Mesa.query.filter_by(numero='2').first()
+        
+        if admin and mesa1:
+            # Pedido ejemplo 1
+            pedido1 = Pedido(
+                cliente_nombre='Carlos Mendoza',
+                cliente_telefono='987654321',
+                mesa_id=mesa1.id,
+                mesa_numero=mesa1.numero,
+                estado='entregado',
+                usuario_id=mesero.id if mesero else admin.id,
+                observaciones='Sin cebolla'
+            )
+            
+            # Pedido ejemplo 2
+            pedido2 = Pedido(
+                cliente_nombre='Ana Torres',
+                cliente_telefono='123456789',
+                mesa_id=mesa2.id if mesa2 else mesa1.id,
+                mesa_numero=mesa2.numero if mesa2 else mesa1.numero,
+                estado='preparando',
+                usuario_id=admin.id,
+                observaciones='Extra salsa'
+            )
+            
+            db.session.add(pedido1)
+            db.session.add(pedido2)
+            
+            # Commit para obtener IDs
+            db.session.commit()
+            
+            # Productos para los detalles
+            hamburguesa = Producto.query.filter_by(nombre='Hamburguesa Clásica').first()
+            papas = Producto.query.filter_by(nombre='Papas Fritas').first()
+            limonada = Producto.query.filter_by(nombre='Limonada').first()
+            
+            if hamburguesa and papas and limonada:
+                # Detalles pedido 1
+                detalle1 = DetallePedido(
+                    pedido_id=pedido1.id,
+                    producto_id=hamburguesa.id,
+                    cantidad=1,
+                    precio_unitario=hamburguesa.precio
+                )
+                detalle1.calcular_subtotal()
+                
+                detalle2 = DetallePedido(
+                    pedido_id=pedido1.id,
+                    producto_id=papas.id,
+                    cantidad=1,
+                    precio_unitario=papas.precio
+                )
+                detalle2.calcular_subtotal()
+                
+                # Detalles pedido 2
+                detalle3 = DetallePedido(
+                    pedido_id=pedido2.id,
+                    producto_id=limonada.id,
+                    cantidad=2,
+                    precio_unitario=limonada.precio
+                )
+                detalle3.calcular_subtotal()
+                
+                db.session.add_all([detalle1, detalle2, detalle3])
+                
+                # Calcular totales
+                pedido1.calcular_total()
+                pedido2.calcular_total()
+        
+        print("Pedidos de ejemplo creados")
+    
+    db.session.commit()
+    print("Datos iniciales creados correctamente")
+
+def preparar_base_de_datos():
+    """Crear tablas que falten, migrar el esquema, datos iniciales y, si hace falta, el rollup"""
+    db.create_all()
+    aplicar_migraciones()
+    crear_datos_iniciales()
+    
+    # Poblar el rollup en bases de datos creadas antes de que existiera
+    if VentaRollup.query.first() is None and Pedido.query.first() is not None:
+        reconstruir_rollup()
+        db.session.commit()
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Preparar la base de datos (idempotente)"""
+    preparar_base_de_datos()
@@ -0,0 +1,121 @@
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
+from flask_login import login_required, current_user
+
+from app.estadisticas import estadisticas_empleados
+from app.extensions import db
+from app.models import Usuario
+from app.permisos import requiere_permiso
+
+empleados_bp = Blueprint('empleados', __name__)
+
+@empleados_bp.route('/empleados')
+@login_required
+@requiere_permiso('admin')
+def empleados():
+    """Gestión de empleados"""
+    # Filtros
+    rol_filtro = request.args.get('rol')
+    buscar = request.args.get('buscar')
+    
+    # Query base
+    query = Usuario.query
+    
+    # Aplicar filtros
+    if rol_filtro:
+        query = query.filter_by(rol=rol_filtro)
+    if buscar:
+        query = query.filter(
+            (Usuario.nombre_completo.contains(buscar)) | 
+            (Usuario.email.contains(buscar)) | 
+            (Usuario.username.contains(buscar))
+        )
+    
+    usuarios = query.order_by(Usuario.fecha_creacion.desc()).all()
+    
+    # Estadísticas
+    stats = estadisticas_empleados()
+    
+    return render_template('empleados/index.html', usuarios=usuarios, stats=stats)
+
+@empleados_bp.route('/empleados/<int:id>/detalle')
+@login_required
+@requiere_permiso('admin')
+def detalle_empleado(id):
+    """Obtener detalles de empleado para modal"""
+    try:
+        empleado = Usuario.query.get_or_404(id)
+        return jsonify({
+            'username': empleado.username,
+            'email': empleado.email,
+            'nombre_completo': empleado.nombre_completo,
+            'rol': empleado.rol,
+            'activo': empleado.activo,
+            'ultimo_acceso': empleado.ultimo_acceso.strftime('%d/%m/%Y %H:%M') if empleado.ultimo_acceso else 'Nunca'
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@empleados_bp.route('/empleados/<int:id>/toggle-estado', methods=['POST'])
+@login_required
+@requiere_permiso('admin')
+def toggle_estado_empleado(id):
+    """Cambiar estado activo/inactivo del empleado"""
+    try:
+        empleado = Usuario.query.get_or_404(id)
+        data = request.get_json()
+        empleado.activo = data['activo']
+        db.session.commit()
+        
+        estado = 'activado' if empleado.activo else 'desactivado'
+        return jsonify({'success': True, 'message': f'Empleado {empleado.username} {estado}'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@empleados_bp.route('/empleados/<int:id>/eliminar', methods=['DELETE'])
+@login_required
+@requiere_permiso('admin')
+def eliminar_empleado(id):
+    """Eliminar empleado"""
+    try:
+        empleado = Usuario.query.get_or_404(id)
+        
+        # No permitir eliminar al usuario actual
+        if empleado.id == current_user.id:
+            return jsonify({'success': False, 'message': 'No puedes eliminar tu propia cuenta'})
+        
+        # Verificar si tiene pedidos asociados
+        if empleado.pedidos_tomados or empleado.pedidos_preparados:
+            return jsonify({'success': False, 'message': 'No se puede eliminar un empleado con pedidos asociados'})
+        
+        db.session.delete(empleado)
+        db.session.commit()
+        
+        return jsonify({'success': True, 'message': 'Empleado eliminado exitosamente'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@empleados_bp.route('/empleados/<int:id>/editar', methods=['GET', 'POST'])
+@login_required
+@requiere_permiso('admin')
+def editar_empleado(id):
+    """Editar empleado"""
+    empleado = Usuario.query.get_or_404(id)
+    
+    if request.method == 'POST':
+        try:
+            empleado.nombre_completo = request.form.get('nombre_completo')
+            empleado.email = request.form.get('email')
+            empleado.rol = request.form.get('rol')
+            
+            # Cambiar contraseña si se proporciona
+            new_password = request.form.get('password')
+            if new_password:
+                empleado.set_password(new_password)
+            
+            db.session.commit()
+            flash(f'Empleado {empleado.username} actualizado exitosamente', 'success')
+            return redirect(url_for('empleados.empleados'))
+        except Exception as e:
+            flash(f'Error al actualizar empleado: {str(e)}', 'error')
+    
+    return render_template('empleados/editar.html', empleado=empleado)
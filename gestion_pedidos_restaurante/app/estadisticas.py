@@ -0,0 +1,169 @@
+from sqlalchemy import event, func, literal, select, true
+from datetime import date, datetime, timedelta
+import threading
+import time
+
+from app.extensions import db
+from app.models import Usuario, Mesa, Producto, Pedido
+
+# ===== CACHE =====
+
+class CacheEstadisticas:
+    """Contadores de las tarjetas de resumen, compartidos entre peticiones
+
+    Cada entrada recuerda las tablas de las que depende y se descarta al
+    confirmarse una escritura en cualquiera de ellas. El cache es local al
+    proceso: con varios workers, los demás ven el cambio cuando vence el TTL.
+    """
+
+    def __init__(self, ttl=10):
+        self.ttl = ttl
+        self.generacion = 0  # Aumenta con cada invalidación
+        self._entradas = {}  # clave -> (expira, tablas, version, valor)
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, tablas, calcular, version=None):
+        """Valor cacheado de `clave` o, si no hay, el resultado de `calcular()`
+
+        `version` se guarda con el valor y tiene que coincidir para usarlo: un
+        día o una versión de las mesas nuevos reemplazan la entrada anterior
+        en lugar de sumar otra.
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] > time.monotonic() and entrada[2] == version:
+                return entrada[3]
+            generacion = self.generacion
+
+        valor = calcular()
+
+        with self._lock:
+            # Si hubo una escritura mientras se consultaba, no se guarda
+            if generacion == self.generacion:
+                ahora = time.monotonic()
+                for vencida in [c for c, (expira, *_) in self._entradas.items() if expira <= ahora]:
+                    del self._entradas[vencida]
+                self._entradas[clave] = (ahora + self.ttl, frozenset(tablas), version, valor)
+        return valor
+
+    def invalidar(self, tablas):
+        """Descartar las entradas que dependen de alguna de las tablas"""
+        if not tablas:
+            return
+        with self._lock:
+            self.generacion += 1
+            for clave, (_, dependencias, *_) in list(self._entradas.items()):
+                if dependencias & tablas:
+                    del self._entradas[clave]
+
+    def limpiar(self):
+        with self._lock:
+            self.generacion += 1
+            self._entradas.clear()
+
+# Configurado por create_app (ESTADISTICAS_CACHE_TTL)
+cache_estadisticas = CacheEstadisticas()
+
+def init_app(app):
+    """Aplicar la configuración de la aplicación al cache de estadísticas"""
+    cache_estadisticas.ttl = app.config['ESTADISTICAS_CACHE_TTL']
+
+# ===== GRUPOS DE TARJETAS =====
+#
+# Cada función responde un grupo de tarjetas con una sola consulta.
+
+def resumen_general():
+    """Pedidos por estado, pedidos de hoy y totales de productos, usuarios activos y mesas activas
+
+    Lo usan el inicio, el dashboard de cocina y los reportes exportados.
+    """
+    hoy = date.today()
+    return cache_estadisticas.obtener('general', {'pedidos', 'productos', 'usuarios', 'mesas'},
+                                      lambda: _consultar_resumen_general(hoy), version=hoy)
+
+def _consultar_resumen_general(hoy):
+    inicio = datetime.combine(hoy, datetime.min.time())
+    fin = inicio + timedelta(days=1)
+    hoy_total = select(func.count()).select_from(Pedido).where(
+        Pedido.fecha >= inicio, Pedido.fecha < fin).scalar_subquery()
+    productos = select(func.count()).select_from(Producto).scalar_subquery()
+    usuarios = select(func.count()).select_from(Usuario).where(Usuario.activo == True).scalar_subquery()
+    mesas = select(func.count()).select_from(Mesa).where(Mesa.activa == True).scalar_subquery()
+
+    # Una fila por estado con los demás totales repetidos; el LEFT JOIN
+    # desde una fila fija los devuelve aunque no haya pedidos
+    filas = db.session.execute(
+        select(Pedido.estado, func.count(Pedido.id), hoy_total, productos, usuarios, mesas)
+        .select_from(select(literal(1).label('uno')).subquery())
+        .outerjoin(Pedido, true())
+        .group_by(Pedido.estado)
+    ).all()
+
+    por_estado = {estado: total for estado, total, *_ in filas if estado is not None}
+    _, _, pedidos_hoy, total_productos, total_usuarios, total_mesas = filas[0]
+    return {
+        'pedidos_por_estado': por_estado,
+        'total_pedidos': sum(por_estado.values()),
+        'pedidos_hoy': pedidos_hoy,
+        'total_productos': total_productos,
+        'total_usuarios': total_usuarios,
+        'total_mesas': total_mesas
+    }
+
+def estadisticas_mesas(version=None):
+    """Total de mesas activas y cuántas hay en cada estado
+
+    Con `version` (version_mesas()) la entrada solo sirve para esa versión,
+    así que un cambio hecho en otro proceso no deja contadores viejos junto a
+    mesas nuevas en /api/mesas/cambios.
+    """
+    return cache_estadisticas.obtener('mesas', {'mesas'}, _consultar_mesas, version=version)
+
+def _consultar_mesas():
+    por_estado = dict(db.session.query(Mesa.estado, func.count()).filter(
+        Mesa.activa == True).group_by(Mesa.estado).all())
+    return {
+        'total_mesas': sum(por_estado.values()),
+        'disponibles': por_estado.get('disponible', 0),
+        'ocupadas': por_estado.get('ocupada', 0),
+        'reservadas': por_estado.get('reservada', 0)
+    }
+
+def estadisticas_empleados():
+    """Total de usuarios y cuántos hay de cada rol"""
+    return cache_estadisticas.obtener('empleados', {'usuarios'}, _consultar_empleados)
+
+def _consultar_empleados():
+    por_rol = dict(db.session.query(Usuario.rol, func.count()).group_by(Usuario.rol).all())
+    return {
+        'total_usuarios': sum(por_rol.values()),
+        'administradores': por_rol.get('admin', 0),
+        'meseros': por_rol.get('mesero', 0),
+        'cocineros': por_rol.get('cocinero', 0)
+    }
+
+# ===== INVALIDACIÓN POR ESCRITURAS =====
+
+@event.listens_for(db.session, 'after_flush')
+def _registrar_tablas_modificadas(session, flush_context):
+    tablas = session.info.setdefault('tablas_modificadas', set())
+    for objeto in list(session.new) + list(session.dirty) + list(session.deleted):
+        tabla = getattr(objeto, '__tablename__', None)
+        if tabla:
+            tablas.add(tabla)
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _registrar_escrituras_masivas(orm_execute_state):
+    """INSERT/UPDATE/DELETE lanzados con session.execute(), que after_flush no ve"""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        tabla = getattr(orm_execute_state.statement, 'table', None)
+        if tabla is not None:
+            orm_execute_state.session.info.setdefault('tablas_modificadas', set()).add(tabla.name)
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidar_estadisticas(session):
+    cache_estadisticas.invalidar(session.info.pop('tablas_modificadas', set()))
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_tablas_modificadas(session):
+    session.info.pop('tablas_modificadas', None)
@@ -0,0 +1,119 @@
+from collections import deque
+import json
+import queue
+import threading
+import uuid
+
+class Suscripcion:
+    """Cola de eventos pendientes de enviar a un cliente conectado"""
+
+    def __init__(self, max_pendientes):
+        self.cola = queue.Queue(max_pendientes)
+        self.perdida = False  # se descartaron eventos: el cliente debe recibir el estado completo
+
+class HubEventos:
+    """Difusión en proceso de eventos a los clientes conectados por Server-Sent Events
+
+    Cada evento publicado se copia en la cola de cada suscripción, así que
+    el coste de un cambio no depende de cuántas pantallas haya abiertas.
+    Los identificadores son "<época>-<n>": la época cambia en cada proceso,
+    y con los últimos `historial` eventos se reponen los perdidos durante
+    una reconexión breve al mismo proceso. Un cliente que viene de otro
+    proceso (o de antes de un reinicio) no se puede reponer: quien atiende
+    la conexión le envía primero el estado completo (ver `reponible`).
+    """
+
+    def __init__(self, historial=256, max_pendientes=1000):
+        self.max_pendientes = max_pendientes
+        self._epoca = uuid.uuid4().hex[:8]
+        self._ultimo = 0
+        self._historial = deque(maxlen=historial)
+        self._suscripciones = set()
+        self._lock = threading.Lock()
+
+    @property
+    def ultimo_id(self):
+        return f'{self._epoca}-{self._ultimo}'
+
+    def hay_suscriptores(self):
+        return bool(self._suscripciones)
+
+    @property
+    def suscriptores(self):
+        return len(self._suscripciones)
+
+    def publicar(self, tipo, datos):
+        with self._lock:
+            self._ultimo += 1
+            evento = (self._ultimo, tipo, json.dumps(datos))
+            self._historial.append(evento)
+            for suscripcion in self._suscripciones:
+                self._entregar(suscripcion, evento)
+
+    def reponible(self, desde):
+        """Si los eventos posteriores a `desde` (último id recibido) siguen en el historial"""
+        with self._lock:
+            return self._pendientes(desde) is not None
+
+    def suscribir(self, desde=None):
+        """Nueva suscripción; con `desde` se reponen los eventos posteriores"""
+        suscripcion = Suscripcion(self.max_pendientes)
+        with self._lock:
+            if desde:
+                pendientes = self._pendientes(desde)
+                if pendientes is None:
+                    suscripcion.perdida = True
+                for evento in pendientes or []:
+                    self._entregar(suscripcion, evento)
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    def flujo(self, desde=None, heartbeat=15, inicial=None):
+        """Generador del cuerpo text/event-stream de una conexión
+
+        `inicial` es un (tipo, datos) que se envía antes que los eventos
+        posteriores a `desde`. Cada `heartbeat` segundos sin eventos se
+        envía un comentario, que mantiene abiertos los proxies y detecta los
+        clientes desconectados. Si la suscripción pierde eventos se cierra
+        la conexión: el navegador reconecta y recibe el estado completo.
+        """
+        suscripcion = self.suscribir(desde)
+        try:
+            yield 'retry: 3000\n\n'
+            if inicial is not None:
+                tipo, datos = inicial
+                yield f'id: {desde}\nevent: {tipo}\ndata: {json.dumps(datos)}\n\n'
+            while True:
+                if suscripcion.perdida:
+                    return
+                try:
+                    id, tipo, datos = suscripcion.cola.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': ping\n\n'
+                    continue
+                yield f'id: {self._epoca}-{id}\nevent: {tipo}\ndata: {datos}\n\n'
+        finally:
+            self.cancelar(suscripcion)
+
+    def _pendientes(self, desde):
+        """Eventos posteriores a `desde` (con el lock tomado), o None si no se pueden reponer todos"""
+        epoca, _, numero = (desde or '').partition('-')
+        if epoca != self._epoca or not numero.isdigit() or int(numero) > self._ultimo:
+            return None
+        numero = int(numero)
+        pendientes = [e for e in self._historial if e[0] > numero]
+        return pendientes if len(pendientes) == self._ultimo - numero else None
+
+    def _entregar(self, suscripcion, evento):
+        """Encolar sin bloquear (con el lock tomado); un cliente atascado pierde la suscripción"""
+        try:
+            suscripcion.cola.put_nowait(evento)
+        except queue.Full:
+            suscripcion.perdida = True
+
+# Pedidos nuevos, cambios de estado y contadores para las pantallas de cocina
+hub_cocina = HubEventos()
@@ -0,0 +1,9 @@
+from flask_sqlalchemy import SQLAlchemy
+from flask_login import LoginManager
+
+from app.solo_lectura import SesionEnrutada
+
+# Extensiones sin aplicación asociada; create_app las inicializa. La sesión
+# envía las consultas de las rutas de solo lectura al motor de lectura
+db = SQLAlchemy(session_options={'class_': SesionEnrutada})
+login_manager = LoginManager()
@@ -0,0 +1,101 @@
+from flask import Blueprint, Response, render_template, redirect, url_for, flash, request, current_app
+from flask_login import login_required, current_user
+
+from app.estadisticas import resumen_general
+from app.eventos import hub_cocina
+from app.models import Producto, Pedido
+from app.models.cargas import carga_lista_pedidos, carga_tickets_cocina
+from app.pedidos.servicios import MAX_LISTOS_COCINA, MAX_PENDIENTES_COCINA, vigilante_cocina
+
+main_bp = Blueprint('main', __name__)
+
+@main_bp.route('/')
+@login_required
+def index():
+    """Página principal del restaurante - adaptada según rol"""
+    if current_user.rol == 'cocinero':
+        return redirect(url_for('main.dashboard_cocinero'))
+    
+    # Totales y pedidos del día actual (una consulta, cacheada)
+    resumen = resumen_general()
+    
+    # Pedidos recientes según el rol
+    if current_user.rol == 'mesero':
+        pedidos_recientes = Pedido.query.options(*carga_lista_pedidos()).filter_by(usuario_id=current_user.id).order_by(Pedido.fecha.desc()).limit(5).all()
+    else:
+        pedidos_recientes = Pedido.query.options(*carga_lista_pedidos()).order_by(Pedido.fecha.desc()).limit(5).all()
+    
+    return render_template('index.html', 
+                         total_pedidos=resumen['total_pedidos'],
+                         total_productos=resumen['total_productos'],
+                         total_usuarios=resumen['total_usuarios'],
+                         total_mesas=resumen['total_mesas'],
+                         pedidos_hoy=resumen['pedidos_hoy'],
+                         pedidos_recientes=pedidos_recientes)
+
+@main_bp.route('/dashboard/cocinero')
+@login_required
+def dashboard_cocinero():
+    """Dashboard específico para cocineros"""
+    if current_user.rol != 'cocinero':
+        flash('Acceso denegado', 'error')
+        return redirect(url_for('main.index'))
+    
+    # Estadísticas para cocineros
+    por_estado = resumen_general()['pedidos_por_estado']
+    pendientes = por_estado.get('pendiente', 0)
+    preparando = por_estado.get('preparando', 0)
+    listos = por_estado.get('listo', 0)
+    
+    # Pedidos pendientes más antiguos (prioritarios)
+    pedidos_pendientes = Pedido.query.options(*carga_tickets_cocina()).filter_by(estado='pendiente').order_by(Pedido.fecha.asc()).limit(MAX_PENDIENTES_COCINA).all()
+    
+    # Pedidos en preparación asignados al cocinero actual
+    mis_preparando = Pedido.query.options(*carga_tickets_cocina()).filter_by(estado='preparando', cocinero_id=current_user.id).order_by(Pedido.fecha.asc()).all()
+    
+    # Pedidos listos para servir
+    pedidos_listos = Pedido.query.options(*carga_lista_pedidos()).filter_by(estado='listo').order_by(Pedido.fecha.desc()).limit(MAX_LISTOS_COCINA).all()
+    
+    return render_template('dashboard_cocinero.html',
+                         pendientes=pendientes,
+                         preparando=preparando,
+                         listos=listos,
+                         pedidos_pendientes=pedidos_pendientes,
+                         mis_preparando=mis_preparando,
+                         pedidos_listos=pedidos_listos)
+
+@main_bp.route('/dashboard/cocinero/eventos')
+@login_required
+def eventos_cocina():
+    """Flujo Server-Sent Events de pedidos nuevos, cambios de estado y contadores
+    
+    Una conexión nueva, o que viene de otro worker, recibe primero el estado
+    completo de la cocina (evento `sincronizar`); una reconexión al mismo
+    worker recibe solo los eventos que perdió. Los eventos los publica el
+    vigilante de cocina del proceso, que ve los cambios de todos los
+    workers; la conexión no consulta la base de datos mientras está abierta.
+    """
+    if current_user.rol != 'cocinero':
+        return 'Acceso denegado', 403
+    if hub_cocina.suscriptores >= current_app.config['COCINA_MAX_FLUJOS']:
+        # Sin hilos libres para otro flujo: la página recarga periódicamente
+        return 'Demasiadas pantallas conectadas a este proceso', 503
+    
+    vigilante_cocina.iniciar(current_app._get_current_object())
+    desde = request.headers.get('Last-Event-ID') or request.args.get('desde')
+    inicial = None
+    if not hub_cocina.reponible(desde):
+        desde, estado = vigilante_cocina.estado_completo(current_user.id)
+        inicial = ('sincronizar', estado)
+    
+    respuesta = Response(hub_cocina.flujo(desde, current_app.config['COCINA_HEARTBEAT'], inicial),
+                         mimetype='text/event-stream')
+    respuesta.headers['Cache-Control'] = 'no-cache'
+    respuesta.headers['X-Accel-Buffering'] = 'no'  # nginx no debe acumular el flujo
+    return respuesta
+
+@main_bp.route('/menu')
+def menu():
+    """Mostrar el menú completo (público)"""
+    productos = Producto.query.filter_by(disponible=True).all()
+    return render_template('menu.html', productos=productos)
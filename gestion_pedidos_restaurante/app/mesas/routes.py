@@ -0,0 +1,151 @@
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
+from flask_login import login_required, current_user
+
+from app.estadisticas import estadisticas_mesas
+from app.extensions import db
+from app.mesas.servicios import anotar_pedidos_actuales, version_mesas
+from app.models import Mesa, Pedido
+from app.permisos import requiere_permiso
+
+mesas_bp = Blueprint('mesas', __name__)
+
+@mesas_bp.route('/mesas')
+@login_required
+def mesas():
+    """Gestión de mesas (no disponible para cocineros)"""
+    # Los cocineros no tienen acceso a gestión de mesas
+    if current_user.rol == 'cocinero':
+        flash('No tienes permisos para acceder a la gestión de mesas', 'error')
+        return redirect(url_for('main.index'))
+        
+    # Filtros
+    estado_filtro = request.args.get('estado')
+    capacidad_filtro = request.args.get('capacidad')
+    
+    # Query base
+    query = Mesa.query.filter_by(activa=True)
+    
+    # Aplicar filtros
+    if estado_filtro:
+        query = query.filter_by(estado=estado_filtro)
+    if capacidad_filtro:
+        query = query.filter_by(capacidad=int(capacidad_filtro))
+    
+    # Versión desde la que la página pide cambios; se toma antes de leer las mesas
+    version = version_mesas()
+    mesas = query.order_by(Mesa.numero).all()
+    
+    # Estadísticas y pedido actual de las mesas ocupadas
+    stats = estadisticas_mesas(version)
+    anotar_pedidos_actuales(mesas)
+    
+    return render_template('mesas/index.html', mesas=mesas, stats=stats, version=version)
+
+@mesas_bp.route('/mesas/crear', methods=['POST'])
+@login_required
+@requiere_permiso('admin')
+def crear_mesa():
+    """Crear nueva mesa"""
+    try:
+        data = request.get_json()
+        
+        # Verificar que el número no exista
+        if Mesa.query.filter_by(numero=data['numero']).first():
+            return jsonify({'success': False, 'message': 'Ya existe una mesa con ese número'})
+        
+        mesa = Mesa(
+            numero=data['numero'],
+            capacidad=int(data['capacidad']),
+            ubicacion=data['ubicacion'],
+            descripcion=data.get('descripcion', ''),
+            estado='disponible'
+        )
+        
+        db.session.add(mesa)
+        db.session.commit()
+        
+        return jsonify({'success': True, 'message': 'Mesa creada exitosamente'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@mesas_bp.route('/mesas/<int:id>/estado', methods=['POST'])
+@login_required
+def cambiar_estado_mesa(id):
+    """Cambiar estado de mesa"""
+    try:
+        data = request.get_json()
+        mesa = Mesa.query.get_or_404(id)
+        
+        nuevo_estado = data['estado']
+        if nuevo_estado not in ['disponible', 'ocupada', 'reservada']:
+            return jsonify({'success': False, 'message': 'Estado inválido'})
+        
+        mesa.estado = nuevo_estado
+        db.session.commit()
+        
+        return jsonify({'success': True, 'message': f'Mesa {mesa.numero} marcada como {nuevo_estado}'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@mesas_bp.route('/mesas/<int:id>/eliminar', methods=['DELETE'])
+@login_required
+@requiere_permiso('admin')
+def eliminar_mesa(id):
+    """Eliminar mesa"""
+    try:
+        mesa = Mesa.query.get_or_404(id)
+        
+        # Verificar que no tenga pedidos asociados (sin cargar el historial)
+        if db.session.query(Pedido.query.filter_by(mesa_id=mesa.id).exists()).scalar():
+            return jsonify({'success': False, 'message': 'No se puede eliminar una mesa con pedidos asociados'})
+        
+        db.session.delete(mesa)
+        db.session.commit()
+        
+        return jsonify({'success': True, 'message': 'Mesa eliminada exitosamente'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@mesas_bp.route('/mesas/<int:id>/editar', methods=['GET', 'POST'])
+@login_required
+@requiere_permiso('admin')
+def editar_mesa(id):
+    """Editar información de una mesa"""
+    mesa = Mesa.query.get_or_404(id)
+    
+    if request.method == 'POST':
+        try:
+            # Obtener datos del formulario
+            nuevo_numero = request.form.get('numero')
+            nueva_capacidad = int(request.form.get('capacidad'))
+            nueva_ubicacion = request.form.get('ubicacion')
+            
+            # Validar que el número no esté en uso por otra mesa
+            if nuevo_numero != mesa.numero:
+                mesa_existente = Mesa.query.filter_by(numero=nuevo_numero, activa=True).first()
+                if mesa_existente:
+                    return jsonify({'success': False, 'message': f'Ya existe una mesa con el número {nuevo_numero}'})
+            
+            # Actualizar datos
+            mesa.numero = nuevo_numero
+            mesa.capacidad = nueva_capacidad
+            mesa.ubicacion = nueva_ubicacion
+            
+            db.session.commit()
+            
+            return jsonify({'success': True, 'message': f'Mesa {mesa.numero} actualizada correctamente'})
+            
+        except ValueError:
+            return jsonify({'success': False, 'message': 'La capacidad debe ser un número válido'})
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'success': False, 'message': f'Error al actualizar mesa: {str(e)}'})
+    
+    # GET: devolver datos de la mesa para el modal
+    return jsonify({
+        'id': mesa.id,
+        'numero': mesa.numero,
+        'capacidad': mesa.capacidad,
+        'ubicacion': mesa.ubicacion or '',
+        'estado': mesa.estado
+    })
@@ -0,0 +1,128 @@
+from sqlalchemy import event, func, inspect, literal_column, select, text, update
+from datetime import datetime, timezone
+
+from app.extensions import db
+from app.models import Mesa, Pedido, Contador
+from app.models.models import PEDIDO_ACTIVO
+
+# ===== PEDIDO ACTUAL DE CADA MESA =====
+
+def pedidos_actuales(mesa_ids):
+    """{mesa_id: pedido activo más reciente} en una consulta
+    
+    La ventana recorre solo el índice parcial de pedidos abiertos, así que
+    el coste depende de las mesas en uso y no del historial de pedidos.
+    """
+    if not mesa_ids:
+        return {}
+    recientes = select(
+        Pedido.id,
+        func.row_number().over(partition_by=Pedido.mesa_id,
+                               order_by=(Pedido.fecha.desc(), Pedido.id.desc())).label('orden')
+    ).where(Pedido.mesa_id.in_(mesa_ids), PEDIDO_ACTIVO).subquery()
+    pedidos = Pedido.query.join(recientes, Pedido.id == recientes.c.id).filter(recientes.c.orden == 1)
+    return {pedido.mesa_id: pedido for pedido in pedidos}
+
+def anotar_pedidos_actuales(mesas):
+    """Asignar a cada mesa `pedido_actual` (activo más reciente), `segundos_ocupada` y `tiempo_ocupada`"""
+    ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+    actuales = pedidos_actuales([mesa.id for mesa in mesas if mesa.estado == 'ocupada'])
+    for mesa in mesas:
+        mesa.pedido_actual = actuales.get(mesa.id) if mesa.estado == 'ocupada' else None
+        mesa.segundos_ocupada = None
+        mesa.tiempo_ocupada = "-"
+        if mesa.pedido_actual and mesa.pedido_actual.fecha:
+            segundos = max(0, int((ahora - mesa.pedido_actual.fecha.replace(tzinfo=None)).total_seconds()))
+            mesa.segundos_ocupada = segundos
+            mesa.tiempo_ocupada = f"{segundos // 3600}h {segundos % 3600 // 60}m"
+
+# ===== VERSIÓN DE LAS MESAS =====
+#
+# Cada transacción que cambia una mesa o el pedido actual de una mesa guarda
+# en Mesa.version un número creciente, y version_mesas() devuelve una marca
+# de agua: las mesas que cambien después de leerla tendrán version >= marca,
+# así que /api/mesas/cambios?since=N solo lee esas.
+#
+# En PostgreSQL el número es el id de la propia transacción
+# (pg_current_xact_id) y la marca, el xmin de la instantánea: toda
+# transacción con id menor ya terminó. No hay una fila compartida que
+# serialice las escrituras, y a diferencia de una secuencia, una transacción
+# que confirma tarde con un número bajo sigue quedando por encima de la marca.
+# En SQLite las escrituras ya se serializan con el bloqueo del archivo y
+# basta con el contador 'mesas'.
+
+VERSION_POSTGRESQL = 'pg_current_xact_id()::text::bigint'
+MARCA_POSTGRESQL = 'SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint'
+
+def _es_postgresql():
+    return db.engine.dialect.name == 'postgresql'
+
+def version_mesas():
+    """Marca de agua de las mesas: las que cambien después tendrán version >= marca"""
+    if _es_postgresql():
+        return db.session.execute(text(MARCA_POSTGRESQL)).scalar()
+    return (db.session.query(Contador.valor).filter_by(nombre='mesas').scalar() or 0) + 1
+
+def consulta_mesas_cambiadas(desde, version):
+    """Consulta de las mesas con cambios posteriores a la marca `desde`, o None si no hay
+
+    `version` es la marca actual. Una marca desconocida (0, o mayor que la
+    actual, p. ej. tras recrear la base de datos) recibe todas las mesas.
+    """
+    if not 0 < desde <= version:
+        return Mesa.query
+    if desde == version and not _es_postgresql():
+        # El contador solo avanza cuando cambia una mesa
+        return None
+    return Mesa.query.filter(Mesa.version >= desde)
+
+def marcar_mesas_modificadas(session, ids):
+    """Registrar mesas escritas con UPDATE masivos, que after_flush no ve"""
+    session.info.setdefault('mesas_modificadas', set()).update(id for id in ids if id)
+
+def _siguiente_version(session):
+    if _es_postgresql():
+        return literal_column(VERSION_POSTGRESQL)
+    valor = session.execute(
+        update(Contador).where(Contador.nombre == 'mesas').values(valor=Contador.valor + 1)
+        .returning(Contador.valor)
+    ).scalar()
+    if valor is None:
+        session.add(Contador(nombre='mesas', valor=1))
+        session.flush()
+        valor = 1
+    return valor
+
+@event.listens_for(db.session, 'after_flush')
+def _registrar_mesas_modificadas(session, flush_context):
+    modificadas = session.info.setdefault('mesas_modificadas', set())
+    for objeto in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(objeto, Mesa):
+            if objeto in session.deleted:
+                # Sin fila que versionar: se versionan todas las que quedan
+                # para que los clientes reciban la lista de mesas activas
+                session.info['mesas_eliminadas'] = True
+            elif objeto in session.new or session.is_modified(objeto, include_collections=False):
+                modificadas.add(objeto.id)
+        elif isinstance(objeto, Pedido):
+            modificadas.add(objeto.mesa_id)
+            modificadas.update(inspect(objeto).attrs.mesa_id.history.deleted)
+    modificadas.discard(None)
+
+@event.listens_for(db.session, 'before_commit')
+def _versionar_mesas(session):
+    session.flush()
+    modificadas = session.info.pop('mesas_modificadas', set())
+    eliminadas = session.info.pop('mesas_eliminadas', False)
+    if not modificadas and not eliminadas:
+        return
+
+    versionar = update(Mesa).values(version=_siguiente_version(session))
+    if not eliminadas:
+        versionar = versionar.where(Mesa.id.in_(modificadas))
+    session.execute(versionar, execution_options={'synchronize_session': False})
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_mesas_modificadas(session):
+    session.info.pop('mesas_modificadas', None)
+    session.info.pop('mesas_eliminadas', None)
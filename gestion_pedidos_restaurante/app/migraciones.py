@@ -0,0 +1,139 @@
+from sqlalchemy import func, inspect, insert, select, text, update
+from sqlalchemy.schema import CreateIndex
+from flask.cli import with_appcontext
+import click
+
+from app.extensions import db
+from app.models import Mesa, Contador, VentaRollup
+from app.models.models import CLAVE_VENTA_ROLLUP
+from app.rollup import reconstruir_rollup
+
+# ===== MIGRACIONES DEL ESQUEMA =====
+#
+# db.create_all() crea las tablas que faltan pero no cambia las existentes.
+# Cada migración lleva una base de datos de la versión anterior a la suya;
+# la versión aplicada se guarda en el contador 'esquema' y cada migración
+# se confirma junto con su número. Los pasos son idempotentes: en una base
+# recién creada por create_all no hacen nada y solo se registra la versión.
+#
+# Una columna o índice nuevo en los modelos necesita su migración al final
+# de la lista; nunca se modifica una migración ya publicada.
+
+MIGRACIONES = []
+
+def migracion(version, descripcion):
+    """Registrar la función como la migración número `version`"""
+    def registrar(funcion):
+        assert version == len(MIGRACIONES) + 1, 'las migraciones se numeran en orden'
+        MIGRACIONES.append((version, descripcion, funcion))
+        return funcion
+    return registrar
+
+def _agregar_columna(conexion, columna):
+    """ALTER TABLE ADD COLUMN si falta; la columna debe admitir nulos o tener server_default"""
+    existentes = {c['name'] for c in inspect(conexion).get_columns(columna.table.name)}
+    if columna.name in existentes:
+        return
+    definicion = f'{columna.name} {columna.type.compile(dialect=conexion.dialect)}'
+    if columna.server_default is not None:
+        definicion += f' DEFAULT {columna.server_default.arg}'
+    conexion.execute(text(f'ALTER TABLE {columna.table.name} ADD COLUMN {definicion}'))
+
+def _crear_indices(conexion, *nombres):
+    """Crear, si faltan, los índices declarados en los modelos con esos nombres
+
+    Los que ya no se declaran los sustituyó una migración posterior y se
+    omiten. IF NOT EXISTS en lugar de checkfirst: la reflexión de SQLite no
+    ve los índices sobre expresiones.
+    """
+    declarados = {indice.name: indice for tabla in db.metadata.sorted_tables for indice in tabla.indexes}
+    for nombre in nombres:
+        if nombre in declarados:
+            conexion.execute(CreateIndex(declarados[nombre], if_not_exists=True))
+
+def _eliminar_indice(conexion, nombre):
+    """Eliminar un índice que ya no se declara en los modelos, si existe"""
+    conexion.execute(text(f'DROP INDEX IF EXISTS {nombre}'))
+
+@migracion(1, 'Índices de agregaciones por hora, ventas_rollup y claves de idempotencia')
+def _indices_iniciales(conexion):
+    _crear_indices(conexion, 'ix_pedidos_fecha_mesa_total', 'ix_ventas_rollup_clave',
+                   'ix_claves_idempotencia_expira')
+
+@migracion(2, 'Versión de las mesas para /api/mesas/cambios')
+def _version_mesas(conexion):
+    _agregar_columna(conexion, Mesa.__table__.c.version)
+    _crear_indices(conexion, 'ix_mesas_version')
+
+@migracion(3, 'Índice parcial de pedidos abiertos por mesa')
+def _pedidos_activos_mesa(conexion):
+    _crear_indices(conexion, 'ix_pedidos_activos_mesa')
+
+@migracion(4, 'Índices de listados de pedidos, contadores, detalles y carta')
+def _indices_listados(conexion):
+    _crear_indices(conexion, 'ix_pedidos_estado_fecha', 'ix_pedidos_usuario_fecha',
+                   'ix_pedidos_cocinero_estado_fecha', 'ix_detalles_pedido_pedido', 'ix_detalles_pedido_producto',
+                   'ix_productos_disponible_categoria', 'ix_productos_categoria_nombre')
+    # Estadísticas para que el planificador elija entre los índices nuevos
+    conexion.execute(text('ANALYZE'))
+
+@migracion(5, 'Clave única de ventas_rollup para sumar con INSERT ... ON CONFLICT')
+def _clave_unica_rollup(conexion):
+    _eliminar_indice(conexion, 'ix_ventas_rollup_clave')
+    # Las escrituras concurrentes pudieron duplicar claves: el rollup se
+    # regenera desde los pedidos antes de crear el índice único
+    duplicadas = conexion.execute(
+        select(func.count()).select_from(VentaRollup).group_by(*CLAVE_VENTA_ROLLUP)
+        .having(func.count() > 1).limit(1)).first()
+    if duplicadas:
+        reconstruir_rollup(conexion)
+    _crear_indices(conexion, 'ux_ventas_rollup_clave')
+
+@migracion(6, 'Versión de las mesas con el id de transacción en PostgreSQL')
+def _version_mesas_transaccion(conexion):
+    # SQLite guarda enteros de 64 bits en cualquier columna INTEGER y sigue
+    # con el contador 'mesas'
+    if conexion.dialect.name == 'postgresql':
+        conexion.execute(text('ALTER TABLE mesas ALTER COLUMN version TYPE BIGINT'))
+        # Los valores del contador no son comparables con los ids de transacción
+        conexion.execute(update(Mesa).values(version=0))
+
+# ===== APLICACIÓN =====
+
+def version_esquema(conexion):
+    """Última migración aplicada (0 en una base de datos que nunca se migró)"""
+    return conexion.execute(select(Contador.valor).where(Contador.nombre == 'esquema')).scalar() or 0
+
+def _registrar_version(conexion, version):
+    actualizadas = conexion.execute(
+        update(Contador).where(Contador.nombre == 'esquema').values(valor=version)).rowcount
+    if not actualizadas:
+        conexion.execute(insert(Contador).values(nombre='esquema', valor=version))
+
+def aplicar_migraciones():
+    """Aplicar en orden las migraciones pendientes; devuelve [(versión, descripción)] aplicadas
+
+    Requiere las tablas ya creadas (db.create_all()).
+    """
+    with db.engine.connect() as conexion:
+        actual = version_esquema(conexion)
+
+    aplicadas = []
+    for version, descripcion, funcion in MIGRACIONES:
+        if version <= actual:
+            continue
+        with db.engine.begin() as conexion:
+            funcion(conexion)
+            _registrar_version(conexion, version)
+        aplicadas.append((version, descripcion))
+    return aplicadas
+
+@click.command('migrar')
+@with_appcontext
+def migrar_command():
+    """Crear las tablas que falten y aplicar las migraciones pendientes del esquema"""
+    db.create_all()
+    for version, descripcion in aplicar_migraciones():
+        print(f"Migración {version} aplicada: {descripcion}")
+    with db.engine.connect() as conexion:
+        print(f"Esquema en la versión {version_esquema(conexion)}")
@@ -1 +1 @@
-# Archivo vacío para hacer que la carpeta models sea un paquete de Python
\ No newline at end of file
+from app.models.models import Usuario, Mesa, Producto, Pedido, DetallePedido, VentaRollup, ClaveIdempotencia, Contador
@@ -0,0 +1,46 @@
+from flask import current_app
+from sqlalchemy.orm import configure_mappers, joinedload, raiseload, selectinload
+
+from app.models.models import Pedido, DetallePedido
+
+# Opciones de carga con nombre para cada vista que recorre pedidos. Cada
+# plantilla solo debe tocar las relaciones que su opción declara: con
+# CARGA_ESTRICTA (activo en desarrollo) el resto lanza un error en lugar
+# de hacer una consulta por fila.
+
+def _opciones(*opciones):
+    if current_app.config['CARGA_ESTRICTA']:
+        opciones += (raiseload('*', sql_only=True),)
+    return opciones
+
+def carga_lista_pedidos():
+    """Listas de pedidos que muestran la mesa (lista, inicio, listos en cocina)"""
+    configure_mappers()  # Pedido.mesa_info es un backref de Mesa
+    return _opciones(joinedload(Pedido.mesa_info))
+
+def carga_tickets_cocina():
+    """Tickets de cocina: mesa y productos de cada línea"""
+    configure_mappers()
+    return _opciones(
+        joinedload(Pedido.mesa_info),
+        selectinload(Pedido.detalles).joinedload(DetallePedido.producto)
+    )
+
+def carga_reporte_pedidos():
+    """Tabla de pedidos de /reportes: mesa, mesero y número de líneas"""
+    configure_mappers()
+    return _opciones(
+        joinedload(Pedido.mesa_info),
+        joinedload(Pedido.usuario),
+        selectinload(Pedido.detalles)
+    )
+
+def carga_detalle_pedido():
+    """Página de un pedido: mesa, mesero, cocinero y líneas con su producto"""
+    configure_mappers()
+    return _opciones(
+        joinedload(Pedido.mesa_info),
+        joinedload(Pedido.usuario),
+        joinedload(Pedido.cocinero),
+        selectinload(Pedido.detalles).joinedload(DetallePedido.producto)
+    )
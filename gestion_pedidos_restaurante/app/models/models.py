@@ -1,12 +1,69 @@
-from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from flask_login import UserMixin
+from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import datetime, timezone
 
-# La instancia de db se importará desde la aplicación principal
-db = SQLAlchemy()
+from app.extensions import db, login_manager
+
+# Pedidos que siguen abiertos en su mesa. Es texto literal para que SQLite
+# pueda usar el índice parcial ix_pedidos_activos_mesa: con parámetros no
+# puede demostrar que la consulta cumple la condición del índice.
+PEDIDO_ACTIVO = db.text("estado NOT IN ('entregado', 'cancelado')")
+
+class Usuario(UserMixin, db.Model):
+    """Modelo para usuarios del sistema con roles"""
+    __tablename__ = 'usuarios'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.String(120), nullable=False)
+    nombre_completo = db.Column(db.String(100), nullable=False)
+    rol = db.Column(db.String(20), nullable=False, default='mesero')  # admin, mesero, cocinero
+    activo = db.Column(db.Boolean, default=True)
+    fecha_creacion = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    ultimo_acceso = db.Column(db.DateTime)
+    
+    def set_password(self, password):
+        self.password_hash = generate_password_hash(password)
+    
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
+    
+    def __repr__(self):
+        return f'<Usuario {self.username}>'
+
+@login_manager.user_loader
+def load_user(user_id):
+    return db.session.get(Usuario, int(user_id))
+
+class Mesa(db.Model):
+    """Modelo para las mesas del restaurante"""
+    __tablename__ = 'mesas'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    numero = db.Column(db.String(10), unique=True, nullable=False)
+    capacidad = db.Column(db.Integer, nullable=False, default=4)
+    estado = db.Column(db.String(20), default='disponible')  # disponible, ocupada, reservada
+    ubicacion = db.Column(db.String(50))  # interior, terraza, vip
+    activa = db.Column(db.Boolean, default=True)
+    # Versión del último cambio de la mesa o de su pedido actual (ver
+    # app/mesas/servicios.py); en PostgreSQL es un id de transacción de 64 bits
+    version = db.Column(db.BigInteger, default=0, server_default='0', index=True)
+    
+    # Relación con pedidos
+    pedidos = db.relationship('Pedido', backref='mesa_info', lazy=True)
+    
+    def __repr__(self):
+        return f'<Mesa {self.numero}>'
 
 class Producto(db.Model):
     """Modelo para los productos/platillos del restaurante"""
     __tablename__ = 'productos'
+    __table_args__ = (
+        # Carta para tomar pedidos y listado filtrado por categoría, ya ordenados
+        db.Index('ix_productos_disponible_categoria', 'disponible', 'categoria', 'nombre'),
+        db.Index('ix_productos_categoria_nombre', 'categoria', 'nombre'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False)
@@ -14,7 +71,7 @@ class Producto(db.Model):
     precio = db.Column(db.Float, nullable=False)
     categoria = db.Column(db.String(50), nullable=False)
     disponible = db.Column(db.Boolean, default=True)
-    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+    fecha_creacion = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     
     # Relación con detalles de pedido
     detalles_pedido = db.relationship('DetallePedido', backref='producto', lazy=True)
@@ -35,18 +92,50 @@ class Producto(db.Model):
 class Pedido(db.Model):
     """Modelo para los pedidos del restaurante"""
     __tablename__ = 'pedidos'
+    __table_args__ = (
+        # Cubre las agregaciones por hora y por mesa sin leer la tabla
+        db.Index('ix_pedidos_fecha_mesa_total', 'fecha', 'mesa_id', 'total'),
+        # Solo los pedidos abiertos: su tamaño depende de las mesas en uso,
+        # no del historial (pedido actual de cada mesa). Es el único índice
+        # que empieza por mesa_id: sin estadísticas de ANALYZE, SQLite
+        # prefiere uno completo sobre mesa_id y recorre todo el historial
+        db.Index('ix_pedidos_activos_mesa', 'mesa_id', 'fecha',
+                 sqlite_where=PEDIDO_ACTIVO, postgresql_where=PEDIDO_ACTIVO),
+        # Listados por estado (cocina, filtros) y contadores por estado
+        db.Index('ix_pedidos_estado_fecha', 'estado', 'fecha'),
+        # Pedidos de cada mesero, en el orden del listado
+        db.Index('ix_pedidos_usuario_fecha', 'usuario_id', 'fecha'),
+        # Pedidos en preparación de cada cocinero
+        db.Index('ix_pedidos_cocinero_estado_fecha', 'cocinero_id', 'estado', 'fecha'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     cliente_nombre = db.Column(db.String(100), nullable=False)
     cliente_telefono = db.Column(db.String(20))
-    mesa = db.Column(db.String(10))
-    estado = db.Column(db.String(20), default='pendiente')  # pendiente, preparando, listo, entregado
+    mesa_id = db.Column(db.Integer, db.ForeignKey('mesas.id'))  # Relación con Mesa
+    mesa_numero = db.Column(db.String(10))  # Mantener compatibilidad
+    estado = db.Column(db.String(20), default='pendiente')
     total = db.Column(db.Float, default=0.0)
-    fecha = db.Column(db.DateTime, default=datetime.utcnow)
+    fecha = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     observaciones = db.Column(db.Text)
     
-    # Relación con detalles del pedido
+    # Referencias de usuario
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'))  # Quien tomó el pedido
+    cocinero_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'))  # Quien lo preparó
+    
+    # Relaciones
     detalles = db.relationship('DetallePedido', backref='pedido', lazy=True, cascade='all, delete-orphan')
+    usuario = db.relationship('Usuario', foreign_keys=[usuario_id], backref='pedidos_tomados')
+    cocinero = db.relationship('Usuario', foreign_keys=[cocinero_id], backref='pedidos_preparados')
+    
+    # Mantener compatibilidad con propiedad mesa
+    @property
+    def mesa(self):
+        return self.mesa_numero or (self.mesa_info.numero if self.mesa_info else None)
+    
+    @mesa.setter
+    def mesa(self, value):
+        self.mesa_numero = value
     
     def __repr__(self):
         return f'<Pedido {self.id} - {self.cliente_nombre}>'
@@ -56,22 +145,14 @@ class Pedido(db.Model):
         total = sum(detalle.subtotal for detalle in self.detalles)
         self.total = total
         return total
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'cliente_nombre': self.cliente_nombre,
-            'cliente_telefono': self.cliente_telefono,
-            'mesa': self.mesa,
-            'estado': self.estado,
-            'total': self.total,
-            'fecha': self.fecha.strftime('%Y-%m-%d %H:%M:%S'),
-            'observaciones': self.observaciones
-        }
 
 class DetallePedido(db.Model):
-    """Modelo para los detalles de cada pedido (productos individuales)"""
+    """Modelo para los detalles de cada pedido"""
     __tablename__ = 'detalles_pedido'
+    __table_args__ = (
+        db.Index('ix_detalles_pedido_pedido', 'pedido_id'),
+        db.Index('ix_detalles_pedido_producto', 'producto_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     pedido_id = db.Column(db.Integer, db.ForeignKey('pedidos.id'), nullable=False)
@@ -88,13 +169,73 @@ class DetallePedido(db.Model):
         """Calcular el subtotal del detalle"""
         self.subtotal = self.cantidad * self.precio_unitario
         return self.subtotal
+
+class ClaveIdempotencia(db.Model):
+    """Respuesta de POST /api/v1/pedidos guardada por su Idempotency-Key
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'producto_nombre': self.producto.nombre,
-            'cantidad': self.cantidad,
-            'precio_unitario': self.precio_unitario,
-            'subtotal': self.subtotal,
-            'observaciones': self.observaciones
-        }
\ No newline at end of file
+    Un reintento con la misma clave devuelve esta respuesta en lugar de
+    crear otro pedido. Las claves vencidas se borran al crear pedidos.
+    """
+    __tablename__ = 'claves_idempotencia'
+    
+    clave = db.Column(db.String(100), primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    pedido_id = db.Column(db.Integer, db.ForeignKey('pedidos.id', ondelete='SET NULL'))
+    respuesta = db.Column(db.Text, nullable=False)  # JSON devuelto al crear el pedido
+    expira = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<ClaveIdempotencia {self.clave} -> {self.pedido_id}>'
+
+class Contador(db.Model):
+    """Contador monotónico compartido por todos los procesos (p. ej. la versión de las mesas)
+    
+    Se incrementa con un UPDATE dentro de la transacción que escribe, así
+    que las versiones se confirman en el mismo orden en que se asignan.
+    """
+    __tablename__ = 'contadores'
+    
+    nombre = db.Column(db.String(50), primary_key=True)
+    valor = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<Contador {self.nombre}={self.valor}>'
+
+class VentaRollup(db.Model):
+    """Agregado de ventas por (día, hora, mesa, mesero, estado, producto)
+    
+    Las filas con producto_id nulo resumen pedidos completos; las demás
+    resumen las líneas de un producto. Se mantiene en la misma transacción
+    que las escrituras de pedidos y se puede reconstruir con
+    `reconstruir-rollup`.
+    """
+    __tablename__ = 'ventas_rollup'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    dia = db.Column(db.Date, nullable=False)
+    hora = db.Column(db.Integer, nullable=False)
+    mesa_id = db.Column(db.Integer, db.ForeignKey('mesas.id'))
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'))  # Mesero que tomó el pedido
+    estado = db.Column(db.String(20))
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'))
+    pedidos = db.Column(db.Integer, nullable=False, default=0)
+    ventas = db.Column(db.Float, nullable=False, default=0.0)
+    lineas = db.Column(db.Integer, nullable=False, default=0)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<VentaRollup {self.dia} {self.hora}h producto={self.producto_id}>'
+
+# Clave única del rollup: una fila por (día, hora, mesa, mesero, estado,
+# producto). Las columnas que admiten nulos entran con COALESCE porque en un
+# índice único SQLite y PostgreSQL consideran distintos dos NULL. Los
+# literales van sin parámetros para que ON CONFLICT reconozca el índice.
+CLAVE_VENTA_ROLLUP = (
+    VentaRollup.dia,
+    VentaRollup.hora,
+    db.func.coalesce(VentaRollup.mesa_id, db.literal_column('0')),
+    db.func.coalesce(VentaRollup.usuario_id, db.literal_column('0')),
+    db.func.coalesce(VentaRollup.estado, db.literal_column("''")),
+    db.func.coalesce(VentaRollup.producto_id, db.literal_column('0')),
+)
+db.Index('ux_ventas_rollup_clave', *CLAVE_VENTA_ROLLUP, unique=True)
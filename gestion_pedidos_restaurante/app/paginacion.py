@@ -0,0 +1,81 @@
+from sqlalchemy import func, tuple_
+from datetime import datetime
+import base64
+
+from app.extensions import db
+from app.reportes.cache import CacheReportes
+
+# Totales aproximados por filtro; sin intervalos, solo vencen por TTL
+cache_totales = CacheReportes(max_entradas=256, ttl=30)
+
+class PaginaKeyset:
+    """Página de resultados ordenados por (fecha, id) descendente, navegable por cursor
+
+    Cada página se obtiene con una consulta `WHERE (fecha, id) < cursor
+    ORDER BY fecha DESC, id DESC LIMIT n`, así que la página N cuesta lo
+    mismo que la primera: no hay COUNT ni OFFSET.
+    """
+
+    def __init__(self, items, siguiente=None, anterior=None, total=None):
+        self.items = items
+        self.siguiente = siguiente  # cursor de la página siguiente (más antigua)
+        self.anterior = anterior  # cursor de la página anterior (más reciente)
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.siguiente is not None
+
+    @property
+    def has_prev(self):
+        return self.anterior is not None
+
+def codificar_cursor(fecha, id):
+    return base64.urlsafe_b64encode(f'{fecha.isoformat()}|{id}'.encode()).decode().rstrip('=')
+
+def decodificar_cursor(cursor):
+    """(fecha, id) de un cursor, o None si no es válido"""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        fecha, id = texto.split('|')
+        return datetime.fromisoformat(fecha), int(id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def paginar_por_fecha(query, modelo, despues=None, antes=None, por_pagina=10):
+    """Página de `query` después (más antigua) o antes (más reciente) de un cursor
+
+    `modelo` debe tener columnas `fecha` e `id`. Sin cursor se devuelve la
+    página más reciente.
+    """
+    clave = tuple_(modelo.fecha, modelo.id)
+    posicion_despues = decodificar_cursor(despues) if despues else None
+    posicion_antes = decodificar_cursor(antes) if antes else None
+
+    if posicion_antes:
+        # Hacia atrás: orden ascendente desde el cursor y se invierte
+        filas = query.filter(clave > tuple_(*posicion_antes)).order_by(
+            modelo.fecha.asc(), modelo.id.asc()).limit(por_pagina + 1).all()
+        hay_mas = len(filas) > por_pagina
+        items = list(reversed(filas[:por_pagina]))
+        hay_anterior, hay_siguiente = hay_mas, True
+    else:
+        if posicion_despues:
+            query = query.filter(clave < tuple_(*posicion_despues))
+        filas = query.order_by(modelo.fecha.desc(), modelo.id.desc()).limit(por_pagina + 1).all()
+        items = filas[:por_pagina]
+        hay_anterior, hay_siguiente = posicion_despues is not None, len(filas) > por_pagina
+
+    return PaginaKeyset(
+        items,
+        siguiente=codificar_cursor(items[-1].fecha, items[-1].id) if items and hay_siguiente else None,
+        anterior=codificar_cursor(items[0].fecha, items[0].id) if items and hay_anterior else None
+    )
+
+def total_aproximado(query, clave):
+    """COUNT de `query` cacheado unos segundos bajo `clave` (puede ir algo atrasado)"""
+    total = cache_totales.obtener(clave)
+    if total is None:
+        total = db.session.query(func.count()).select_from(query.order_by(None).subquery()).scalar()
+        cache_totales.guardar(clave, total, [])
+    return total
@@ -1,41 +1,31 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
-from datetime import datetime
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
+from flask_login import login_required, current_user
 
-# Las importaciones se harán después de que la app esté configurada
-pedidos_bp = Blueprint('pedidos', __name__)
-
-# Variables que serán configuradas por la aplicación principal
-Pedido = None
-DetallePedido = None  
-Producto = None
-db = None
-
-def init_routes(app_db, app_models):
-    """Inicializar las rutas con la instancia de db y modelos de la aplicación"""
-    global db, Pedido, DetallePedido, Producto
-    db = app_db
-    Pedido = app_models['Pedido']
-    DetallePedido = app_models['DetallePedido']
-    Producto = app_models['Producto']
+from app.extensions import db
+from app.models import Mesa, Producto, Pedido
+from app.models.cargas import carga_detalle_pedido, carga_lista_pedidos
+from app.paginacion import paginar_por_fecha, total_aproximado
+from app.pedidos.servicios import (ESTADOS_PEDIDO, cambiar_estados, clave_total_pedidos, construir_detalles,
+                                   guardar_pedido, pedidos_visibles)
+from app.rollup import actualizar_rollup
 
 pedidos_bp = Blueprint('pedidos', __name__)
 
-@pedidos_bp.route('/')
+@pedidos_bp.route('/pedidos/')
+@login_required
 def lista_pedidos():
-    """Mostrar lista de todos los pedidos"""
-    page = request.args.get('page', 1, type=int)
+    """Mostrar lista de pedidos según el rol del usuario, paginada por cursor"""
     estado = request.args.get('estado', 'todos')
+    query = pedidos_visibles(current_user, estado)
     
-    if estado == 'todos':
-        pedidos = Pedido.query.order_by(Pedido.fecha.desc()).paginate(
-            page=page, per_page=10, error_out=False)
-    else:
-        pedidos = Pedido.query.filter_by(estado=estado).order_by(
-            Pedido.fecha.desc()).paginate(page=page, per_page=10, error_out=False)
+    pedidos = paginar_por_fecha(query.options(*carga_lista_pedidos()), Pedido, despues=request.args.get('despues'),
+                                antes=request.args.get('antes'))
+    pedidos.total = total_aproximado(query, clave_total_pedidos(current_user, estado))
     
     return render_template('pedidos/lista.html', pedidos=pedidos, estado_filtro=estado)
 
-@pedidos_bp.route('/nuevo', methods=['GET', 'POST'])
+@pedidos_bp.route('/pedidos/nuevo', methods=['GET', 'POST'])
+@login_required
 def nuevo_pedido():
     """Crear un nuevo pedido"""
     if request.method == 'POST':
@@ -43,49 +33,59 @@ def nuevo_pedido():
             # Obtener datos del formulario
             cliente_nombre = request.form.get('cliente_nombre')
             cliente_telefono = request.form.get('cliente_telefono')
-            mesa = request.form.get('mesa')
+            mesa_numero = request.form.get('mesa')
             observaciones = request.form.get('observaciones')
             
-            # Crear el pedido
-            pedido = Pedido(
-                cliente_nombre=cliente_nombre,
-                cliente_telefono=cliente_telefono,
-                mesa=mesa,
-                observaciones=observaciones,
-                estado='pendiente'
-            )
-            
-            db.session.add(pedido)
-            db.session.flush()  # Para obtener el ID del pedido
+            # Buscar la mesa por número
+            mesa_obj = None
+            if mesa_numero:
+                mesa_obj = Mesa.query.filter_by(numero=mesa_numero, activa=True).first()
+                if mesa_obj and mesa_obj.estado == 'ocupada':
+                    flash(f'La mesa {mesa_numero} ya está ocupada', 'error')
+                    productos = Producto.query.filter_by(disponible=True).order_by(Producto.categoria, Producto.nombre).all()
+                    productos_dict = [producto.to_dict() for producto in productos]
+                    mesas = Mesa.query.filter_by(activa=True).all()
+                    return render_template('pedidos/nuevo.html', productos=productos, productos_json=productos_dict, mesas=mesas)
             
             # Procesar productos seleccionados
             productos_ids = request.form.getlist('producto_id')
             cantidades = request.form.getlist('cantidad')
             observaciones_detalle = request.form.getlist('observaciones_detalle')
             
-            total_pedido = 0
+            lineas = [
+                (int(producto_id), int(cantidades[i]),
+                 observaciones_detalle[i] if i < len(observaciones_detalle) else None)
+                for i, producto_id in enumerate(productos_ids)
+                if producto_id and cantidades[i]
+            ]
+            
+            # Todos los productos del pedido en una sola consulta
+            ids = {producto_id for producto_id, _, _ in lineas}
+            precios = dict(db.session.query(Producto.id, Producto.precio).filter(Producto.id.in_(ids))) if ids else {}
+            
+            # Detalles y total calculados en memoria, sin tocar la sesión
+            detalles, total_pedido = construir_detalles(lineas, precios)
+            
+            # Crear el pedido
+            pedido = Pedido(
+                cliente_nombre=cliente_nombre,
+                cliente_telefono=cliente_telefono,
+                mesa_id=mesa_obj.id if mesa_obj else None,
+                mesa_numero=mesa_numero,  # Mantener compatibilidad
+                observaciones=observaciones,
+                estado='pendiente',
+                usuario_id=current_user.id,
+                total=total_pedido
+            )
             
-            for i, producto_id in enumerate(productos_ids):
-                if producto_id and cantidades[i]:
-                    producto = Producto.query.get(int(producto_id))
-                    cantidad = int(cantidades[i])
-                    
-                    if producto and cantidad > 0:
-                        detalle = DetallePedido(
-                            pedido_id=pedido.id,
-                            producto_id=producto.id,
-                            cantidad=cantidad,
-                            precio_unitario=producto.precio,
-                            observaciones=observaciones_detalle[i] if i < len(observaciones_detalle) else None
-                        )
-                        detalle.calcular_subtotal()
-                        db.session.add(detalle)
-                        total_pedido += detalle.subtotal
+            # Cambiar estado de la mesa a ocupada si existe
+            if mesa_obj:
+                mesa_obj.estado = 'ocupada'
             
-            pedido.total = total_pedido
+            guardar_pedido(pedido, detalles)
             db.session.commit()
             
-            flash(f'Pedido #{pedido.id} creado exitosamente', 'success')
+            flash(f'Pedido #{pedido.id} creado exitosamente. Mesa {mesa_numero} marcada como ocupada.', 'success')
             return redirect(url_for('pedidos.ver_pedido', id=pedido.id))
             
         except Exception as e:
@@ -94,53 +94,106 @@ def nuevo_pedido():
     
     # GET: mostrar formulario
     productos = Producto.query.filter_by(disponible=True).order_by(Producto.categoria, Producto.nombre).all()
-    return render_template('pedidos/nuevo.html', productos=productos)
+    # Convertir productos a diccionarios para JSON
+    productos_dict = [producto.to_dict() for producto in productos]
+    # Obtener mesas disponibles
+    mesas = Mesa.query.filter_by(activa=True).all()
+    return render_template('pedidos/nuevo.html', productos=productos, productos_json=productos_dict, mesas=mesas)
 
-@pedidos_bp.route('/<int:id>')
+@pedidos_bp.route('/pedidos/<int:id>')
 def ver_pedido(id):
     """Ver detalles de un pedido específico"""
-    pedido = Pedido.query.get_or_404(id)
+    pedido = Pedido.query.options(*carga_detalle_pedido()).filter_by(id=id).first_or_404()
     return render_template('pedidos/detalle.html', pedido=pedido)
 
-@pedidos_bp.route('/<int:id>/cambiar_estado', methods=['POST'])
+@pedidos_bp.route('/pedidos/<int:id>/cambiar_estado', methods=['POST'])
 def cambiar_estado(id):
     """Cambiar el estado de un pedido"""
-    pedido = Pedido.query.get_or_404(id)
-    nuevo_estado = request.form.get('estado')
+    try:
+        pedido = Pedido.query.get_or_404(id)
+        nuevo_estado = request.form.get('estado')
+        
+        estados_validos = ['pendiente', 'preparando', 'listo', 'entregado', 'cancelado']
+        
+        if nuevo_estado in estados_validos:
+            # Mismo camino que el cambio por lotes: rollup, cocinero asignado
+            # y mesa liberada solo si esta transacción movió el pedido
+            _, _, mesas_liberadas = cambiar_estados({pedido.id: nuevo_estado}, current_user)
+            
+            if mesas_liberadas:
+                mesa = db.session.get(Mesa, mesas_liberadas[0])
+                flash(f'Estado del pedido #{pedido.id} cambiado a {nuevo_estado}. Mesa {mesa.numero} liberada.', 'success')
+            else:
+                flash(f'Estado del pedido #{pedido.id} cambiado a {nuevo_estado}', 'success')
+                
+            db.session.commit()
+            
+            # Si es una petición AJAX (desde dashboard cocinero), devolver JSON
+            if request.headers.get('Content-Type') == 'application/json' or request.is_json:
+                return jsonify({'success': True, 'message': f'Estado cambiado a {nuevo_estado}'})
+                
+        else:
+            flash('Estado no válido', 'error')
+            if request.headers.get('Content-Type') == 'application/json' or request.is_json:
+                return jsonify({'success': False, 'message': 'Estado no válido'})
+            
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error al cambiar estado: {str(e)}', 'error')
+        if request.headers.get('Content-Type') == 'application/json' or request.is_json:
+            return jsonify({'success': False, 'message': str(e)})
     
-    estados_validos = ['pendiente', 'preparando', 'listo', 'entregado', 'cancelado']
+    return redirect(url_for('pedidos.ver_pedido', id=id))
+
+@pedidos_bp.route('/pedidos/estados', methods=['POST'])
+@login_required
+def cambiar_estados_pedidos():
+    """Cambiar el estado de varios pedidos en una sola transacción (JSON)
+    
+    Cuerpo: {"cambios": [{"id": 12, "estado": "preparando"}, ...]}
+    """
+    datos = request.get_json(silent=True) or {}
+    cambios = {}
+    for cambio in datos.get('cambios') or []:
+        if not isinstance(cambio, dict) or type(cambio.get('id')) is not int \
+                or cambio.get('estado') not in ESTADOS_PEDIDO:
+            return jsonify({'success': False, 'message': f'Cambio no válido: {cambio}'}), 400
+        cambios[cambio['id']] = cambio['estado']
+    if not cambios:
+        return jsonify({'success': False, 'message': 'No se indicaron pedidos'}), 400
     
-    if nuevo_estado in estados_validos:
-        pedido.estado = nuevo_estado
+    try:
+        estados, no_encontrados, mesas_liberadas = cambiar_estados(cambios, current_user)
         db.session.commit()
-        flash(f'Estado del pedido #{pedido.id} cambiado a {nuevo_estado}', 'success')
-    else:
-        flash('Estado no válido', 'error')
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
     
-    return redirect(url_for('pedidos.ver_pedido', id=id))
+    return jsonify({
+        'success': True,
+        'pedidos': [{'id': id, 'estado': estado} for id, estado in estados.items()],
+        'no_encontrados': no_encontrados,
+        'mesas_liberadas': mesas_liberadas
+    })
 
-@pedidos_bp.route('/<int:id>/eliminar', methods=['POST'])
+@pedidos_bp.route('/pedidos/<int:id>/eliminar', methods=['POST'])
 def eliminar_pedido(id):
     """Eliminar un pedido"""
     pedido = Pedido.query.get_or_404(id)
     
     try:
+        # Si el pedido tenía una mesa asignada, liberarla
+        if pedido.mesa_info:
+            pedido.mesa_info.estado = 'disponible'
+            flash(f'Pedido #{id} eliminado correctamente. Mesa {pedido.mesa_info.numero} liberada.', 'success')
+        else:
+            flash(f'Pedido #{id} eliminado correctamente', 'success')
+        
+        actualizar_rollup(pedido, pedido.detalles, signo=-1)
         db.session.delete(pedido)
         db.session.commit()
-        flash(f'Pedido #{id} eliminado correctamente', 'success')
         return redirect(url_for('pedidos.lista_pedidos'))
     except Exception as e:
         db.session.rollback()
         flash(f'Error al eliminar el pedido: {str(e)}', 'error')
         return redirect(url_for('pedidos.ver_pedido', id=id))
-
-@pedidos_bp.route('/api/estados')
-def api_estados():
-    """API para obtener estadísticas de pedidos por estado"""
-    estados = db.session.query(
-        Pedido.estado, 
-        db.func.count(Pedido.id)
-    ).group_by(Pedido.estado).all()
-    
-    resultado = {estado: count for estado, count in estados}
-    return jsonify(resultado)
\ No newline at end of file
@@ -0,0 +1,382 @@
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+import threading
+import time
+
+from app.eventos import hub_cocina
+from app.extensions import db
+from app.mesas.servicios import marcar_mesas_modificadas
+from app.models import Mesa, Producto, Pedido, DetallePedido
+from app.reportes.servicios import marcar_dias_modificados
+from app.rollup import actualizar_rollup, actualizar_rollup_lote
+
+# ===== MAPA DE PRECIOS =====
+
+class CachePrecios:
+    """Mapa id -> (precio, disponible) de los productos, compartido entre peticiones
+
+    Se descarta al confirmar cualquier escritura de productos. El cache es
+    local al proceso: con varios workers, los demás ven el cambio cuando
+    vence el TTL.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self.generacion = 0
+        self._mapa = None
+        self._expira = 0
+        self._lock = threading.Lock()
+
+    def obtener(self):
+        with self._lock:
+            if self._mapa is not None and self._expira > time.monotonic():
+                return self._mapa
+            generacion = self.generacion
+
+        filas = db.session.query(Producto.id, Producto.precio, Producto.disponible).all()
+        mapa = {id: (precio, disponible) for id, precio, disponible in filas}
+
+        with self._lock:
+            # Si hubo una escritura mientras se consultaba, no se guarda
+            if generacion == self.generacion:
+                self._mapa = mapa
+                self._expira = time.monotonic() + self.ttl
+        return mapa
+
+    def invalidar(self):
+        with self._lock:
+            self.generacion += 1
+            self._mapa = None
+
+# Configurado por create_app (PRECIOS_CACHE_TTL)
+cache_precios = CachePrecios()
+
+def init_app(app):
+    """Aplicar la configuración de la aplicación a los servicios de pedidos"""
+    cache_precios.ttl = app.config['PRECIOS_CACHE_TTL']
+    vigilante_cocina.intervalo = app.config['COCINA_INTERVALO']
+
+# ===== CREACIÓN DE PEDIDOS =====
+
+def construir_detalles(lineas, precios):
+    """Detalles (sin añadir a la sesión) y total para [(producto_id, cantidad, observaciones)]
+
+    Se omiten las líneas de productos que no están en `precios` o con
+    cantidad no positiva.
+    """
+    total = 0
+    detalles = []
+    for producto_id, cantidad, observaciones in lineas:
+        if producto_id in precios and cantidad > 0:
+            detalle = DetallePedido(
+                producto_id=producto_id,
+                cantidad=cantidad,
+                precio_unitario=precios[producto_id],
+                observaciones=observaciones
+            )
+            detalle.calcular_subtotal()
+            detalles.append(detalle)
+            total += detalle.subtotal
+    return detalles, total
+
+def guardar_pedido(pedido, detalles):
+    """Insertar el pedido, sus líneas en un solo INSERT y su rollup, sin hacer commit"""
+    db.session.add(pedido)
+    db.session.flush()  # Para obtener el ID del pedido
+
+    if detalles:
+        db.session.execute(insert(DetallePedido), [
+            {'pedido_id': pedido.id, 'producto_id': d.producto_id, 'cantidad': d.cantidad,
+             'precio_unitario': d.precio_unitario, 'subtotal': d.subtotal,
+             'observaciones': d.observaciones}
+            for d in detalles
+        ])
+
+    actualizar_rollup(pedido, detalles)
+
+# ===== CAMBIOS DE ESTADO EN LOTE =====
+
+ESTADOS_PEDIDO = ['pendiente', 'preparando', 'listo', 'entregado', 'cancelado']
+
+def cambiar_estados(cambios, usuario):
+    """Mover varios pedidos de estado en una transacción, sin hacer commit
+
+    `cambios` es {pedido_id: estado_nuevo}. Se lanza un UPDATE por estado
+    de origen y destino y otro para liberar las mesas de los pedidos
+    entregados o cancelados. Devuelve ({pedido_id: estado}, ids no
+    encontrados, ids de mesas liberadas).
+    """
+    estados_leidos, detalles = {}, {}
+    movidos = []
+    pendientes = set(cambios)
+    while pendientes:
+        # En PostgreSQL la lectura ya bloquea los pedidos, en orden de id para
+        # que dos lotes con pedidos en común no se crucen (deadlock); SQLite
+        # no admite FOR UPDATE y depende de la condición de cada UPDATE
+        actuales = dict(db.session.query(Pedido.id, Pedido.estado).filter(Pedido.id.in_(pendientes))
+                        .order_by(Pedido.id).with_for_update(key_share=True))
+        estados_leidos.update(actuales)
+        por_cambio = {}
+        for id, estado in actuales.items():
+            if estado != cambios[id]:
+                por_cambio.setdefault((estado, cambios[id]), []).append(id)
+
+        # Líneas de los pedidos a mover en una consulta, para el rollup; se
+        # leen antes del primer UPDATE para no alargar el bloqueo de escritura
+        sin_leer = [id for ids in por_cambio.values() for id in ids if id not in detalles]
+        for id in sin_leer:
+            detalles[id] = []
+        if sin_leer:
+            for detalle in db.session.query(
+                DetallePedido.pedido_id, DetallePedido.producto_id, DetallePedido.cantidad, DetallePedido.subtotal
+            ).filter(DetallePedido.pedido_id.in_(sin_leer)):
+                detalles[detalle.pedido_id].append(detalle)
+
+        # Cada UPDATE exige además el estado leído: si otra transacción movió
+        # el pedido entretanto (dos cocineros tomando el mismo), la fila no
+        # se actualiza y se vuelve a leer. El rollup solo cuenta las filas que
+        # devuelve RETURNING, es decir, las que esta transacción cambió.
+        pendientes = set()
+        for (anterior, estado), ids in por_cambio.items():
+            valores = {'estado': estado}
+            # Si un cocinero toma pedidos (pasan a preparando), se le asignan
+            if estado == 'preparando' and usuario.rol == 'cocinero':
+                valores['cocinero_id'] = usuario.id
+            cambiados = db.session.execute(
+                update(Pedido).where(Pedido.id.in_(ids), Pedido.estado == anterior).values(**valores)
+                .returning(Pedido.id, Pedido.fecha, Pedido.mesa_id, Pedido.usuario_id, Pedido.total),
+                execution_options={'synchronize_session': False}).all()
+            movidos += [(pedido, anterior, estado) for pedido in cambiados]
+            pendientes |= set(ids) - {pedido.id for pedido in cambiados}
+    no_encontrados = sorted(set(cambios) - set(estados_leidos))
+
+    movimientos = []
+    for pedido, anterior, estado in movidos:
+        movimientos.append((pedido, detalles[pedido.id], -1, anterior))
+        movimientos.append((pedido, detalles[pedido.id], 1, estado))
+    actualizar_rollup_lote(movimientos)
+
+    # Liberar las mesas de los pedidos entregados o cancelados
+    mesas_liberadas = sorted({p.mesa_id for p, _, estado in movidos
+                              if p.mesa_id and estado in ('entregado', 'cancelado')})
+    if mesas_liberadas:
+        # Antes de escribir una, se bloquean en orden de id todas las mesas
+        # que se versionarán al confirmar: otra transacción con mesas en
+        # común espera aquí en lugar de cruzarse (deadlock) en PostgreSQL.
+        # FOR NO KEY UPDATE, el mismo bloqueo que un UPDATE, no choca con el
+        # que toman las claves foráneas del rollup
+        db.session.execute(select(Mesa.id).where(Mesa.id.in_({p.mesa_id for p, _, _ in movidos}))
+                           .order_by(Mesa.id).with_for_update(key_share=True))
+        db.session.execute(update(Mesa).where(Mesa.id.in_(mesas_liberadas)).values(estado='disponible'),
+                           execution_options={'synchronize_session': False})
+
+    # Los UPDATE masivos no pasan por after_flush: se avisa al cache de reportes,
+    # a la vista de mesas y a las pantallas de cocina
+    marcar_dias_modificados(db.session, {p.fecha.date() for p, _, _ in movidos if p.fecha})
+    marcar_mesas_modificadas(db.session, {p.mesa_id for p, _, _ in movidos})
+    if movidos:
+        registrar_pedidos_cambiados(db.session)
+
+    estados = {id: cambios[id] for id in estados_leidos}
+    return estados, no_encontrados, mesas_liberadas
+
+# ===== LISTADO DE PEDIDOS =====
+
+def pedidos_visibles(usuario, estado='todos'):
+    """Consulta de los pedidos que `usuario` puede ver según su rol, con filtro de estado"""
+    query = Pedido.query
+    
+    if usuario.rol == 'mesero':
+        # Los meseros solo ven sus propios pedidos
+        query = query.filter_by(usuario_id=usuario.id)
+    elif usuario.rol == 'cocinero':
+        # Los cocineros ven solo pedidos en estados relevantes para cocina
+        query = query.filter(Pedido.estado.in_(['pendiente', 'preparando', 'listo']))
+    # Los admin ven todos los pedidos (sin filtro adicional)
+    
+    if estado != 'todos':
+        query = query.filter_by(estado=estado)
+    return query
+
+def clave_total_pedidos(usuario, estado):
+    """Clave del total cacheado: los meseros tienen el suyo, los demás roles lo comparten"""
+    return ('pedidos', usuario.rol, usuario.id if usuario.rol == 'mesero' else None, estado)
+
+# ===== INVALIDACIÓN POR ESCRITURAS DE PRODUCTOS =====
+
+@event.listens_for(db.session, 'after_flush')
+def _registrar_productos_modificados(session, flush_context):
+    if any(isinstance(o, Producto) for o in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info['productos_modificados'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidar_cache_precios(session):
+    if session.info.pop('productos_modificados', False):
+        cache_precios.invalidar()
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_productos_modificados(session):
+    session.info.pop('productos_modificados', None)
+
+# ===== AVISOS A LAS PANTALLAS DE COCINA =====
+#
+# Cada proceso sigue los pedidos abiertos con un hilo (VigilanteCocina) que,
+# mientras hay pantallas conectadas, compara su estado y su cocinero con los
+# de la vuelta anterior y publica las diferencias en hub_cocina. Así una
+# pantalla conectada a un worker ve también los pedidos creados o movidos
+# en los demás; las escrituras confirmadas en el propio proceso despiertan
+# al hilo para no esperar al intervalo.
+
+ESTADOS_COCINA = ['pendiente', 'preparando', 'listo']
+MAX_PENDIENTES_COCINA = 10  # pendientes más antiguos en el dashboard
+MAX_LISTOS_COCINA = 5  # listos más recientes en el dashboard
+
+def registrar_pedidos_cambiados(session):
+    """Registrar pedidos escritos con UPDATE masivos, que after_flush no ve"""
+    session.info['pedidos_cambiados'] = True
+
+def tickets_cocina(ids):
+    """Datos que muestra la cocina de cada pedido de `ids`, en tres consultas"""
+    lineas = {}
+    for pedido_id, cantidad, nombre in db.session.query(
+        DetallePedido.pedido_id, DetallePedido.cantidad, Producto.nombre
+    ).join(Producto, DetallePedido.producto_id == Producto.id).filter(
+        DetallePedido.pedido_id.in_(ids)
+    ).order_by(DetallePedido.id):
+        lineas.setdefault(pedido_id, []).append({'cantidad': cantidad, 'producto': nombre})
+
+    filas = db.session.query(
+        Pedido.id, Pedido.estado, Pedido.cliente_nombre, Pedido.mesa_numero, Mesa.numero,
+        Pedido.fecha, Pedido.cocinero_id
+    ).outerjoin(Mesa, Pedido.mesa_id == Mesa.id).filter(Pedido.id.in_(ids)).order_by(Pedido.fecha, Pedido.id)
+    return [{
+        'id': id,
+        'estado': estado,
+        'cliente_nombre': cliente_nombre,
+        'mesa': mesa_numero or numero_mesa,
+        'hora': fecha.strftime('%H:%M') if fecha else '',
+        'cocinero_id': cocinero_id,
+        'detalles': lineas.get(id, [])
+    } for id, estado, cliente_nombre, mesa_numero, numero_mesa, fecha, cocinero_id in filas]
+
+def estados_cocina():
+    """{pedido_id: (estado, cocinero_id)} de los pedidos que sigue la cocina, en una consulta"""
+    return {id: (estado, cocinero_id) for id, estado, cocinero_id in db.session.query(
+        Pedido.id, Pedido.estado, Pedido.cocinero_id).filter(Pedido.estado.in_(ESTADOS_COCINA))}
+
+def contadores_cocina(estados):
+    """{estado: pedidos} de los estados que sigue la cocina, a partir de estados_cocina()"""
+    contadores = dict.fromkeys(ESTADOS_COCINA, 0)
+    for estado, _ in estados.values():
+        contadores[estado] += 1
+    return contadores
+
+def estado_completo_cocina(cocinero_id):
+    """Tickets que muestra el dashboard de `cocinero_id` y contadores, para una pantalla que no se puede reponer
+
+    Son los mismos pedidos que la página: los pendientes más antiguos, los
+    que prepara ese cocinero y los listos más recientes.
+    """
+    estados = estados_cocina()
+    ids = [id for id, in db.session.query(Pedido.id).filter_by(estado='pendiente').order_by(
+        Pedido.fecha.asc()).limit(MAX_PENDIENTES_COCINA)]
+    ids += [id for id, (estado, cocinero) in estados.items() if estado == 'preparando' and cocinero == cocinero_id]
+    ids += [id for id, in db.session.query(Pedido.id).filter_by(estado='listo').order_by(
+        Pedido.fecha.desc()).limit(MAX_LISTOS_COCINA)]
+    return {'pedidos': tickets_cocina(ids) if ids else [], 'contadores': contadores_cocina(estados)}
+
+class VigilanteCocina:
+    """Hilo que publica en `hub` los cambios de los pedidos abiertos hechos en cualquier proceso
+
+    Corre mientras hay pantallas conectadas (y `espera` segundos más). En
+    cada vuelta, cada `intervalo` segundos o al despertarlo, lee
+    estados_cocina() y publica `pedido` por cada pedido nuevo o con otro
+    estado o cocinero, `retirado` por cada uno que dejó la cocina
+    (entregado, cancelado o eliminado) y `contadores`. Un cambio que se
+    deshace entre dos vueltas no se publica.
+    """
+
+    def __init__(self, hub, intervalo=2, espera=30):
+        self.hub = hub
+        self.intervalo = intervalo
+        self.espera = espera
+        self._estados = None  # {pedido_id: (estado, cocinero_id)} de la última vuelta
+        self._hilo = None
+        self._ultimo_uso = 0
+        self._despertar = threading.Event()
+        self._lock = threading.Lock()
+        self._vuelta = threading.Lock()  # una vuelta o una lectura del estado completo a la vez
+
+    def iniciar(self, app):
+        """Lanzar el hilo si no corre; la primera vuelta se hace aquí, sin publicar nada (requiere app_context)"""
+        with self._lock:
+            self._ultimo_uso = time.monotonic()
+            if self._hilo is not None:
+                return
+            self._estados = estados_cocina()
+            self._hilo = threading.Thread(target=self._vigilar, args=(app,), name='vigilante-cocina', daemon=True)
+            self._hilo.start()
+
+    def despertar(self):
+        self._despertar.set()
+
+    def estado_completo(self, cocinero_id):
+        """(último id del hub, estado_completo_cocina()) sin una vuelta a medias entre ambos
+
+        Los eventos posteriores a ese id solo pueden repetir cambios que ya
+        están en el estado completo.
+        """
+        with self._vuelta:
+            return self.hub.ultimo_id, estado_completo_cocina(cocinero_id)
+
+    def _vigilar(self, app):
+        while True:
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+            with self._lock:
+                if self.hub.hay_suscriptores():
+                    self._ultimo_uso = time.monotonic()
+                elif time.monotonic() - self._ultimo_uso > self.espera:
+                    self._hilo = None
+                    self._estados = None
+                    return
+            try:
+                with app.app_context():
+                    self.comparar()
+            except SQLAlchemyError as e:
+                # Se reintenta en la siguiente vuelta, contra el mismo estado anterior
+                app.logger.warning('No se pudieron leer los pedidos de cocina: %s', e)
+            except Exception:
+                # El hilo no debe morir: las pantallas se quedarían sin eventos
+                app.logger.exception('Error en el vigilante de cocina')
+
+    def comparar(self):
+        """Publicar las diferencias con la vuelta anterior (requiere app_context)"""
+        with self._vuelta:
+            actuales = estados_cocina()
+            cambiados = [id for id, valor in actuales.items() if self._estados.get(id) != valor]
+            retirados = [id for id in self._estados if id not in actuales]
+            if cambiados or retirados:
+                for pedido in tickets_cocina(cambiados) if cambiados else []:
+                    self.hub.publicar('pedido', pedido)
+                for id in retirados:
+                    self.hub.publicar('retirado', {'id': id})
+                self.hub.publicar('contadores', contadores_cocina(actuales))
+            self._estados = actuales
+
+# Configurado por create_app (COCINA_INTERVALO)
+vigilante_cocina = VigilanteCocina(hub_cocina)
+
+@event.listens_for(db.session, 'after_flush')
+def _registrar_pedidos_cambiados(session, flush_context):
+    if any(isinstance(o, Pedido) for o in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info['pedidos_cambiados'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def _despertar_vigilante_cocina(session):
+    if session.info.pop('pedidos_cambiados', False):
+        vigilante_cocina.despertar()
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_pedidos_cambiados(session):
+    session.info.pop('pedidos_cambiados', None)
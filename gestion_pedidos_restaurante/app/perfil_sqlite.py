@@ -0,0 +1,141 @@
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+import threading
+import time
+
+from app.extensions import db
+from app.models import Contador
+from app.solo_lectura import motor_lectura
+
+# ===== PRAGMAS POR CONEXIÓN =====
+#
+# SQLite guarda el modo WAL en el archivo, pero el resto de pragmas valen
+# solo para la conexión que los ejecuta: se aplican en cada conexión nueva
+# del pool. Con WAL los lectores no bloquean al escritor ni al revés, y
+# synchronous=NORMAL no hace fsync en cada commit (una caída del sistema
+# puede perder las últimas transacciones, nunca corromper la base).
+
+MODOS_JOURNAL = {'WAL', 'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'OFF'}
+MODOS_SYNCHRONOUS = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+MODOS_TEMP_STORE = {'DEFAULT', 'FILE', 'MEMORY'}
+
+def pragmas_sqlite(config, solo_lectura=False):
+    """Sentencias PRAGMA del perfil configurado, en el orden en que se aplican
+
+    Las conexiones de solo lectura no cambian el journal: el modo WAL ya lo
+    fija en el archivo el motor principal.
+    """
+    journal = config['SQLITE_JOURNAL_MODE'].upper()
+    synchronous = config['SQLITE_SYNCHRONOUS'].upper()
+    temp_store = config['SQLITE_TEMP_STORE'].upper()
+    if journal not in MODOS_JOURNAL or synchronous not in MODOS_SYNCHRONOUS or temp_store not in MODOS_TEMP_STORE:
+        raise ValueError(f'Perfil SQLite no válido: journal_mode={journal}, '
+                         f'synchronous={synchronous}, temp_store={temp_store}')
+    # Primero la espera: cambiar el journal necesita un bloqueo breve
+    pragmas = [f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT'])}"]
+    if not solo_lectura:
+        pragmas += [f'PRAGMA journal_mode = {journal}', f'PRAGMA synchronous = {synchronous}']
+    return pragmas + [
+        f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA cache_size = {int(config['SQLITE_CACHE_SIZE'])}",
+        f'PRAGMA temp_store = {temp_store}',
+    ]
+
+def _configurar_conexion(conexion_dbapi, pragmas):
+    cursor = conexion_dbapi.cursor()
+    try:
+        for pragma in pragmas:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+# ===== MANTENIMIENTO PERIÓDICO =====
+
+class MantenimientoSQLite:
+    """Checkpoint del WAL y ANALYZE cada `intervalo` segundos
+
+    El checkpoint PASSIVE copia a la base las páginas del WAL que ningún
+    lector necesita, sin esperar a nadie, y evita que el WAL crezca cuando
+    siempre hay lecturas abiertas. ANALYZE (muestreado con analysis_limit)
+    mantiene al día las estadísticas con las que el planificador elige
+    índices. Se lanza en un hilo al terminar una petición; entre procesos
+    el turno se reparte con el contador 'mantenimiento_sqlite', así que
+    con varios workers se ejecuta una vez por intervalo y no una por worker.
+    """
+
+    def __init__(self, intervalo=600, limite_analisis=1000):
+        self.intervalo = intervalo
+        self.limite_analisis = limite_analisis
+        self._proximo = 0  # time.monotonic() a partir del cual se vuelve a intentar
+        self._lock = threading.Lock()
+
+    def programar(self, motor, logger):
+        """Lanzar el mantenimiento en segundo plano si en este proceso ya toca"""
+        if self.intervalo <= 0:
+            return
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora < self._proximo:
+                return
+            self._proximo = ahora + self.intervalo
+        threading.Thread(target=self._ejecutar_en_hilo, args=(motor, logger),
+                         name='mantenimiento-sqlite', daemon=True).start()
+
+    def _ejecutar_en_hilo(self, motor, logger):
+        try:
+            self.ejecutar(motor)
+        except SQLAlchemyError as e:
+            # Se reintenta en el siguiente intervalo
+            logger.warning('Mantenimiento de SQLite fallido: %s', e)
+
+    def ejecutar(self, motor, forzar=False):
+        """Checkpoint y ANALYZE si ningún proceso los hizo en el último intervalo; devuelve si se hicieron"""
+        with motor.connect() as conexion:
+            if not forzar and not self._tomar_turno(conexion):
+                return False
+            conexion.exec_driver_sql(f'PRAGMA analysis_limit = {int(self.limite_analisis)}')
+            conexion.exec_driver_sql('ANALYZE')
+            conexion.commit()
+            conexion.exec_driver_sql('PRAGMA wal_checkpoint(PASSIVE)')
+        return True
+
+    def _tomar_turno(self, conexion):
+        ahora = int(time.time())
+        tomado = conexion.execute(
+            update(Contador).where(Contador.nombre == 'mantenimiento_sqlite',
+                                   Contador.valor <= ahora - self.intervalo).values(valor=ahora)).rowcount
+        if not tomado and conexion.execute(
+                select(Contador.valor).where(Contador.nombre == 'mantenimiento_sqlite')).scalar() is None:
+            try:
+                conexion.execute(insert(Contador).values(nombre='mantenimiento_sqlite', valor=ahora))
+                tomado = True
+            except IntegrityError:
+                # Otro proceso lo insertó a la vez: el turno es suyo
+                conexion.rollback()
+                return False
+        conexion.commit()
+        return bool(tomado)
+
+# Configurado por create_app (SQLITE_MANTENIMIENTO_INTERVALO)
+mantenimiento_sqlite = MantenimientoSQLite()
+
+def init_app(app):
+    """Aplicar el perfil SQLite a las conexiones nuevas (también las de lectura) y programar el mantenimiento"""
+    with app.app_context():
+        motor = db.engine
+        lectura = motor_lectura()
+    if motor.dialect.name != 'sqlite' or not app.config['SQLITE_PERFIL']:
+        return
+
+    pragmas = pragmas_sqlite(app.config)
+    event.listen(motor, 'connect', lambda conexion_dbapi, registro: _configurar_conexion(conexion_dbapi, pragmas))
+    if lectura is not None and lectura.dialect.name == 'sqlite':
+        pragmas_lectura = pragmas_sqlite(app.config, solo_lectura=True)
+        event.listen(lectura, 'connect',
+                     lambda conexion_dbapi, registro: _configurar_conexion(conexion_dbapi, pragmas_lectura))
+
+    mantenimiento_sqlite.intervalo = app.config['SQLITE_MANTENIMIENTO_INTERVALO']
+
+    @app.teardown_request
+    def _programar_mantenimiento(error):
+        mantenimiento_sqlite.programar(motor, app.logger)
@@ -0,0 +1,17 @@
+from flask import redirect, url_for, flash
+from flask_login import current_user
+from functools import wraps
+
+def requiere_permiso(rol_requerido):
+    """Decorador para verificar permisos por rol"""
+    def decorador(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not current_user.is_authenticated:
+                return redirect(url_for('auth.login'))
+            if current_user.rol != rol_requerido and current_user.rol != 'admin':
+                flash('No tienes permisos para acceder a esta sección', 'error')
+                return redirect(url_for('main.index'))
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorador
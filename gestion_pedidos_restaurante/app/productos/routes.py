@@ -1,21 +1,11 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, redirect, url_for, request, flash
 
-# Las importaciones se harán después de que la app esté configurada
-productos_bp = Blueprint('productos', __name__)
-
-# Variables que serán configuradas por la aplicación principal
-Producto = None
-db = None
-
-def init_routes(app_db, app_models):
-    """Inicializar las rutas con la instancia de db y modelos de la aplicación"""
-    global db, Producto
-    db = app_db
-    Producto = app_models['Producto']
+from app.extensions import db
+from app.models import Producto, DetallePedido
 
 productos_bp = Blueprint('productos', __name__)
 
-@productos_bp.route('/')
+@productos_bp.route('/productos/')
 def lista_productos():
     """Mostrar lista de todos los productos"""
     categoria = request.args.get('categoria', 'todos')
@@ -39,7 +29,7 @@ def lista_productos():
                          categoria_filtro=categoria,
                          buscar=buscar)
 
-@productos_bp.route('/nuevo', methods=['GET', 'POST'])
+@productos_bp.route('/productos/nuevo', methods=['GET', 'POST'])
 def nuevo_producto():
     """Crear un nuevo producto"""
     if request.method == 'POST':
@@ -81,13 +71,13 @@ def nuevo_producto():
     
     return render_template('productos/nuevo.html', categorias=categorias)
 
-@productos_bp.route('/<int:id>')
+@productos_bp.route('/productos/<int:id>')
 def ver_producto(id):
     """Ver detalles de un producto específico"""
     producto = Producto.query.get_or_404(id)
     return render_template('productos/detalle.html', producto=producto)
 
-@productos_bp.route('/<int:id>/editar', methods=['GET', 'POST'])
+@productos_bp.route('/productos/<int:id>/editar', methods=['GET', 'POST'])
 def editar_producto(id):
     """Editar un producto existente"""
     producto = Producto.query.get_or_404(id)
@@ -126,7 +116,7 @@ def editar_producto(id):
     
     return render_template('productos/editar.html', producto=producto, categorias=categorias)
 
-@productos_bp.route('/<int:id>/toggle_disponibilidad', methods=['POST'])
+@productos_bp.route('/productos/<int:id>/toggle_disponibilidad', methods=['POST'])
 def toggle_disponibilidad(id):
     """Cambiar la disponibilidad de un producto"""
     producto = Producto.query.get_or_404(id)
@@ -142,14 +132,14 @@ def toggle_disponibilidad(id):
     
     return redirect(url_for('productos.ver_producto', id=id))
 
-@productos_bp.route('/<int:id>/eliminar', methods=['POST'])
+@productos_bp.route('/productos/<int:id>/eliminar', methods=['POST'])
 def eliminar_producto(id):
     """Eliminar un producto"""
     producto = Producto.query.get_or_404(id)
     
     try:
-        # Verificar si el producto tiene pedidos asociados
-        if producto.detalles_pedido:
+        # Verificar si el producto tiene pedidos asociados (sin cargar sus líneas)
+        if db.session.query(DetallePedido.query.filter_by(producto_id=producto.id).exists()).scalar():
             flash(f'No se puede eliminar "{producto.nombre}" porque tiene pedidos asociados. '
                   'Puedes marcarlo como no disponible en su lugar.', 'warning')
             return redirect(url_for('productos.ver_producto', id=id))
@@ -165,15 +155,3 @@ def eliminar_producto(id):
         db.session.rollback()
         flash(f'Error al eliminar el producto: {str(e)}', 'error')
         return redirect(url_for('productos.ver_producto', id=id))
-
-@productos_bp.route('/api/categorias')
-def api_categorias():
-    """API para obtener todas las categorías"""
-    categorias = db.session.query(Producto.categoria).distinct().all()
-    return jsonify([cat[0] for cat in categorias])
-
-@productos_bp.route('/api/por_categoria/<categoria>')
-def api_productos_por_categoria(categoria):
-    """API para obtener productos por categoría"""
-    productos = Producto.query.filter_by(categoria=categoria, disponible=True).all()
-    return jsonify([producto.to_dict() for producto in productos])
\ No newline at end of file
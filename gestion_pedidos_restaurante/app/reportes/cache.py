@@ -0,0 +1,75 @@
+from collections import OrderedDict
+import threading
+import time
+
+class CacheReportes:
+    """Cache LRU con expiración para los datos calculados de /reportes
+    
+    Cada entrada recuerda los rangos de días de los que depende, y una
+    escritura de pedidos solo invalida las entradas que cubren sus fechas.
+    El cache es local al proceso: con varios workers, los demás procesos
+    ven los cambios cuando vence el TTL.
+    """
+    
+    def __init__(self, max_entradas=64, ttl=300):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.generacion = 0  # Aumenta con cada invalidación
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+        self._entradas = OrderedDict()  # clave -> (expira, intervalos, valor)
+        self._lock = threading.Lock()
+    
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None or entrada[0] < time.monotonic():
+                self._entradas.pop(clave, None)
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[2]
+    
+    def guardar(self, clave, valor, intervalos, generacion=None):
+        """Guardar un valor salvo que haya habido invalidaciones desde `generacion`"""
+        with self._lock:
+            if generacion is not None and generacion != self.generacion:
+                return
+            self._entradas[clave] = (time.monotonic() + self.ttl, intervalos, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+    
+    def invalidar_dias(self, dias):
+        """Descartar las entradas cuyos intervalos incluyen alguno de los días"""
+        if not dias:
+            return
+        with self._lock:
+            self.generacion += 1
+            for clave, (_, intervalos, _) in list(self._entradas.items()):
+                if any(desde <= dia <= hasta for dia in dias for desde, hasta in intervalos):
+                    del self._entradas[clave]
+                    self.invalidaciones += 1
+    
+    def limpiar(self):
+        with self._lock:
+            self.generacion += 1
+            self._entradas.clear()
+    
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / consultas, 3) if consultas else 0,
+                'invalidaciones': self.invalidaciones,
+                'entradas': len(self._entradas),
+                'max_entradas': self.max_entradas,
+                'ttl': self.ttl
+            }
+
+# Configurado por create_app (REPORTES_CACHE_MAX, REPORTES_CACHE_TTL)
+cache_reportes = CacheReportes()
@@ -0,0 +1,281 @@
+from flask import request
+from sqlalchemy import func, extract, case, and_, cast, Integer
+from datetime import datetime, date, timedelta
+import json
+
+from app.extensions import db
+from app.models import Usuario, Mesa, Producto, Pedido, VentaRollup
+from app.reportes.cache import cache_reportes
+
+def periodo_solicitado():
+    """Leer fecha_inicio/fecha_fin de la petición (por defecto, el mes en curso)"""
+    fecha_inicio = request.values.get('fecha_inicio') or date.today().replace(day=1)
+    fecha_fin = request.values.get('fecha_fin') or date.today()
+    
+    # Convertir strings a fechas si es necesario
+    if isinstance(fecha_inicio, str):
+        fecha_inicio = datetime.strptime(fecha_inicio, '%Y-%m-%d').date()
+    if isinstance(fecha_fin, str):
+        fecha_fin = datetime.strptime(fecha_fin, '%Y-%m-%d').date()
+    return fecha_inicio, fecha_fin
+
+def rango_fechas(fecha_inicio, fecha_fin):
+    """Convertir un rango de fechas inclusivo en límites datetime [inicio, fin)"""
+    inicio = datetime.combine(fecha_inicio, datetime.min.time())
+    fin = datetime.combine(fecha_fin, datetime.min.time()) + timedelta(days=1)
+    return inicio, fin
+
+def resumen_periodo(fecha_inicio, fecha_fin):
+    """Calcular métricas del período desde ventas_rollup (costo proporcional a los días)"""
+    # Una fila por (día, estado) a partir de las filas de pedido completo
+    filas = db.session.query(
+        VentaRollup.dia,
+        VentaRollup.estado,
+        func.sum(VentaRollup.pedidos),
+        func.sum(VentaRollup.ventas),
+        func.sum(VentaRollup.lineas)
+    ).filter(
+        VentaRollup.dia >= fecha_inicio,
+        VentaRollup.dia <= fecha_fin,
+        VentaRollup.producto_id.is_(None)
+    ).group_by(VentaRollup.dia, VentaRollup.estado).all()
+    
+    ventas_por_dia = {}
+    pedidos_por_estado = {}
+    total_pedidos = 0
+    ventas_totales = 0
+    productos_vendidos = 0
+    for dia, estado, cantidad, ventas, lineas in filas:
+        ventas_por_dia[dia] = ventas_por_dia.get(dia, 0) + ventas
+        pedidos_por_estado[estado] = pedidos_por_estado.get(estado, 0) + cantidad
+        total_pedidos += cantidad
+        ventas_totales += ventas
+        productos_vendidos += lineas
+    
+    productos_unicos = db.session.query(
+        func.count(func.distinct(VentaRollup.producto_id))
+    ).filter(
+        VentaRollup.dia >= fecha_inicio,
+        VentaRollup.dia <= fecha_fin,
+        VentaRollup.producto_id.isnot(None)
+    ).scalar()
+    
+    return {
+        'ventas_totales': ventas_totales,
+        'total_pedidos': total_pedidos,
+        'productos_vendidos': productos_vendidos,
+        'productos_unicos': productos_unicos,
+        'ventas_por_dia': sorted(ventas_por_dia.items()),
+        'pedidos_por_estado': pedidos_por_estado
+    }
+
+def _variacion(actual, base):
+    """Variación porcentual de `actual` respecto de `base` (0 si no hay base)"""
+    return round((actual - base) / base * 100, 1) if base else 0
+
+def comparar_periodos(fecha_inicio, fecha_fin, ventas_actuales, pedidos_actuales):
+    """Comparar el período con el anterior de igual duración y con el mismo día de semana del año pasado
+    
+    Ambas ventanas se resuelven en una sola consulta con sumas condicionales
+    sobre ventas_rollup, así activar la comparación no duplica el costo.
+    """
+    dias = (fecha_fin - fecha_inicio).days + 1
+    ventanas = {
+        'anterior': (fecha_inicio - timedelta(days=dias), fecha_inicio - timedelta(days=1)),
+        # 364 días = 52 semanas: se conserva el día de la semana
+        'anio_anterior': (fecha_inicio - timedelta(days=364), fecha_fin - timedelta(days=364))
+    }
+    
+    columnas = []
+    for desde, hasta in ventanas.values():
+        en_ventana = and_(VentaRollup.dia >= desde, VentaRollup.dia <= hasta)
+        columnas.append(func.coalesce(func.sum(case((en_ventana, VentaRollup.ventas), else_=0)), 0))
+        columnas.append(func.coalesce(func.sum(case((en_ventana, VentaRollup.pedidos), else_=0)), 0))
+    
+    fila = db.session.query(*columnas).filter(
+        VentaRollup.dia >= min(desde for desde, _ in ventanas.values()),
+        VentaRollup.dia <= max(hasta for _, hasta in ventanas.values()),
+        VentaRollup.producto_id.is_(None)
+    ).one()
+    
+    ticket_actual = ventas_actuales / pedidos_actuales if pedidos_actuales else 0
+    comparacion = {}
+    for i, (nombre, (desde, hasta)) in enumerate(ventanas.items()):
+        ventas, pedidos = fila[2 * i], fila[2 * i + 1]
+        ticket = ventas / pedidos if pedidos else 0
+        comparacion[nombre] = {
+            'desde': desde,
+            'hasta': hasta,
+            'ventas': ventas,
+            'pedidos': pedidos,
+            'ticket_promedio': ticket,
+            'variacion_ventas': _variacion(ventas_actuales, ventas),
+            'variacion_pedidos': _variacion(pedidos_actuales, pedidos),
+            'variacion_ticket': _variacion(ticket_actual, ticket)
+        }
+    return comparacion
+
+def top_productos_periodo(fecha_inicio, fecha_fin, limite=5):
+    """Productos más vendidos del período según ventas_rollup"""
+    return db.session.query(
+        Producto.nombre,
+        func.sum(VentaRollup.cantidad).label('cantidad_vendida'),
+        func.sum(VentaRollup.ventas).label('ingresos_totales')
+    ).join(VentaRollup, VentaRollup.producto_id == Producto.id).filter(
+        VentaRollup.dia >= fecha_inicio,
+        VentaRollup.dia <= fecha_fin
+    ).group_by(Producto.id, Producto.nombre).order_by(
+        func.sum(VentaRollup.cantidad).desc()
+    ).limit(limite).all()
+
+def rendimiento_meseros_periodo(fecha_inicio, fecha_fin, limite=5):
+    """Ventas y ticket promedio por mesero según ventas_rollup"""
+    return db.session.query(
+        Usuario.nombre_completo.label('nombre'),
+        func.sum(VentaRollup.pedidos).label('total_pedidos'),
+        func.sum(VentaRollup.ventas).label('ventas_totales'),
+        (func.sum(VentaRollup.ventas) / func.sum(VentaRollup.pedidos)).label('ticket_promedio')
+    ).join(VentaRollup, VentaRollup.usuario_id == Usuario.id).filter(
+        VentaRollup.dia >= fecha_inicio,
+        VentaRollup.dia <= fecha_fin,
+        VentaRollup.producto_id.is_(None),
+        Usuario.rol == 'mesero'
+    ).group_by(Usuario.id, Usuario.nombre_completo).order_by(
+        func.sum(VentaRollup.ventas).desc()
+    ).limit(limite).all()
+
+def ventas_por_hora_periodo(fecha_inicio, fecha_fin):
+    """Ventas por hora del día en el período (índice cubriente ix_pedidos_fecha_mesa_total)"""
+    inicio, fin = rango_fechas(fecha_inicio, fecha_fin)
+    # PostgreSQL devuelve EXTRACT como numeric; la hora se usa como entero
+    hora = cast(extract('hour', Pedido.fecha), Integer)
+    return db.session.query(
+        hora,
+        func.sum(Pedido.total)
+    ).filter(
+        Pedido.fecha >= inicio,
+        Pedido.fecha < fin
+    ).group_by(hora).order_by(hora).all()
+
+def uso_mesas_periodo(fecha_inicio, fecha_fin):
+    """Cantidad de pedidos por mesa en el período (índice cubriente ix_pedidos_fecha_mesa_total)"""
+    inicio, fin = rango_fechas(fecha_inicio, fecha_fin)
+    por_mesa = db.session.query(
+        Pedido.mesa_id,
+        func.count(Pedido.id).label('pedidos')
+    ).filter(
+        Pedido.fecha >= inicio,
+        Pedido.fecha < fin,
+        Pedido.mesa_id.isnot(None)
+    ).group_by(Pedido.mesa_id).subquery()
+    
+    return db.session.query(
+        Mesa.numero,
+        por_mesa.c.pedidos
+    ).join(por_mesa, por_mesa.c.mesa_id == Mesa.id).order_by(Mesa.numero).all()
+
+def calcular_reporte(fecha_inicio, fecha_fin):
+    """Calcular los datos agregados del dashboard de reportes para un período"""
+    # Métricas, serie diaria y estados desde el rollup (costo proporcional a los días)
+    resumen = resumen_periodo(fecha_inicio, fecha_fin)
+    
+    # Métricas principales
+    ventas_totales = resumen['ventas_totales']
+    total_pedidos = resumen['total_pedidos']
+    ticket_promedio = ventas_totales / total_pedidos if total_pedidos > 0 else 0
+    productos_vendidos = resumen['productos_vendidos']
+    productos_unicos = resumen['productos_unicos']
+    
+    # Variación frente al período anterior y al mismo período del año pasado
+    comparacion = comparar_periodos(fecha_inicio, fecha_fin, ventas_totales, total_pedidos)
+    variacion_ventas = comparacion['anterior']['variacion_ventas']
+    promedio_diario = total_pedidos / ((fecha_fin - fecha_inicio).days + 1)
+    
+    metricas = {
+        'ventas_totales': ventas_totales,
+        'total_pedidos': total_pedidos,
+        'ticket_promedio': ticket_promedio,
+        'productos_vendidos': productos_vendidos,
+        'productos_unicos': productos_unicos,
+        'variacion_ventas': variacion_ventas,
+        'promedio_diario': round(promedio_diario, 1),
+        'comparacion': comparacion
+    }
+    
+    # Datos para gráficos
+    # Ventas diarias
+    ventas_diarias = {'labels': [], 'data': []}
+    for dia, total in resumen['ventas_por_dia']:
+        ventas_diarias['labels'].append(dia.strftime('%d/%m'))
+        ventas_diarias['data'].append(total)
+    
+    # Estados de pedidos
+    estados = resumen['pedidos_por_estado']
+    
+    estados_pedidos = {
+        'labels': ['Pendiente', 'Preparando', 'Listo', 'Entregado'],
+        'data': [estados.get('pendiente', 0), estados.get('preparando', 0),
+                 estados.get('listo', 0), estados.get('entregado', 0)]
+    }
+    
+    # Ventas por hora del día
+    ventasHorarios = {'labels': [], 'data': []}
+    for hora, ventas in ventas_por_hora_periodo(fecha_inicio, fecha_fin):
+        ventasHorarios['labels'].append(f'{hora:02d}:00')
+        ventasHorarios['data'].append(ventas)
+    
+    # Uso de mesas
+    usoMesas = {'labels': [], 'data': []}
+    for numero, pedidos in uso_mesas_periodo(fecha_inicio, fecha_fin):
+        usoMesas['labels'].append(f'Mesa {numero}')
+        usoMesas['data'].append(pedidos)
+    
+    # Top productos
+    try:
+        top_productos = top_productos_periodo(fecha_inicio, fecha_fin)
+    except Exception:
+        top_productos = []
+    
+    # Rendimiento por mesero
+    try:
+        rendimiento_meseros = rendimiento_meseros_periodo(fecha_inicio, fecha_fin)
+    except Exception:
+        rendimiento_meseros = []
+    
+    return {
+        'metricas': metricas,
+        'ventas_diarias': json.dumps(ventas_diarias),
+        'estados_pedidos': json.dumps(estados_pedidos),
+        'ventas_horarios': json.dumps(ventasHorarios),
+        'uso_mesas': json.dumps(usoMesas),
+        'top_productos': top_productos,
+        'rendimiento_meseros': rendimiento_meseros
+    }
+
+def intervalos_reporte(fecha_inicio, fecha_fin):
+    """Rangos de días cuyos pedidos afectan al reporte (período y ventanas de comparación)"""
+    dias = (fecha_fin - fecha_inicio).days + 1
+    return [
+        (fecha_inicio, fecha_fin),
+        (fecha_inicio - timedelta(days=dias), fecha_inicio - timedelta(days=1)),
+        (fecha_inicio - timedelta(days=364), fecha_fin - timedelta(days=364))
+    ]
+
+def datos_reporte(fecha_inicio, fecha_fin):
+    """Datos agregados del reporte para un período, desde el cache si están vigentes"""
+    clave = (fecha_inicio, fecha_fin)
+    datos = cache_reportes.obtener(clave)
+    if datos is None:
+        generacion = cache_reportes.generacion
+        datos = calcular_reporte(fecha_inicio, fecha_fin)
+        cache_reportes.guardar(clave, datos, intervalos_reporte(fecha_inicio, fecha_fin), generacion)
+    return datos
+
+def datos_grafico(nombre, fecha_inicio, fecha_fin):
+    """Datos simples (listas y números) que necesita graficos.renderizar"""
+    datos = datos_reporte(fecha_inicio, fecha_fin)
+    if nombre == 'ventas_diarias':
+        return json.loads(datos['ventas_diarias'])
+    if nombre == 'estados':
+        return json.loads(datos['estados_pedidos'])
+    return [(fila.nombre, int(fila.cantidad_vendida)) for fila in datos['top_productos']]
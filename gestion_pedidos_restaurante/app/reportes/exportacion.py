@@ -0,0 +1,424 @@
+from flask import request, send_file, current_app, stream_with_context
+from sqlalchemy import func
+from functools import lru_cache
+from datetime import datetime
+import csv
+import importlib.util
+import io
+import json
+import pickle
+import tempfile
+import zlib
+
+from app.estadisticas import resumen_general
+from app.extensions import db
+from app.models import Usuario, Mesa, Producto, Pedido, DetallePedido
+from app.reportes import graficos
+from app.reportes.consultas import rango_fechas
+from app.reportes.servicios import servicio_graficos
+
+# Las librerías de exportación se importan en el primer uso (ver escribir_reporte_*
+# y graficos.py); aquí solo se comprueba que estén instaladas
+EXCEL_AVAILABLE = importlib.util.find_spec('openpyxl') is not None
+PDF_AVAILABLE = importlib.util.find_spec('reportlab') is not None
+MATPLOTLIB_AVAILABLE = importlib.util.find_spec('matplotlib') is not None
+
+COLUMNAS_EXPORTACION = [
+    'pedido_id', 'fecha', 'estado', 'cliente', 'mesa', 'mesero', 'total_pedido',
+    'producto_id', 'producto', 'cantidad', 'precio_unitario', 'subtotal'
+]
+
+def exportar_pedidos_plano(formato, fecha_inicio, fecha_fin):
+    """Respuesta en streaming con una línea por detalle de pedido (CSV o NDJSON)
+    
+    Se comprime con gzip sobre la marcha cuando el cliente lo acepta.
+    """
+    comprimir = 'gzip' in request.headers.get('Accept-Encoding', '')
+    filas = _filas_exportacion_plana(fecha_inicio, fecha_fin)
+    partes = _serializar_csv(filas) if formato == 'csv' else _serializar_ndjson(filas)
+    if comprimir:
+        partes = _comprimir_gzip(partes)
+    
+    extension = 'csv' if formato == 'csv' else 'ndjson'
+    nombre = f'pedidos_{fecha_inicio.strftime("%Y%m%d")}_{fecha_fin.strftime("%Y%m%d")}.{extension}'
+    response = current_app.response_class(
+        stream_with_context(partes),
+        mimetype='text/csv' if formato == 'csv' else 'application/x-ndjson'
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename={nombre}'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if comprimir:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def _filas_exportacion_plana(fecha_inicio, fecha_fin):
+    """Pedidos con sus detalles, producto, mesa y mesero en una sola consulta leída por lotes"""
+    inicio, fin = rango_fechas(fecha_inicio, fecha_fin)
+    return db.session.query(
+        Pedido.id,
+        Pedido.fecha,
+        Pedido.estado,
+        Pedido.cliente_nombre,
+        func.coalesce(Pedido.mesa_numero, Mesa.numero),
+        Usuario.nombre_completo,
+        Pedido.total,
+        DetallePedido.producto_id,
+        Producto.nombre,
+        DetallePedido.cantidad,
+        DetallePedido.precio_unitario,
+        DetallePedido.subtotal
+    ).outerjoin(DetallePedido, DetallePedido.pedido_id == Pedido.id).outerjoin(
+        Producto, DetallePedido.producto_id == Producto.id
+    ).outerjoin(Mesa, Pedido.mesa_id == Mesa.id).outerjoin(
+        Usuario, Pedido.usuario_id == Usuario.id
+    ).filter(
+        Pedido.fecha >= inicio,
+        Pedido.fecha < fin
+    ).order_by(Pedido.fecha, Pedido.id, DetallePedido.id).yield_per(2000)
+
+def _serializar_csv(filas, tamano_bloque=64 * 1024):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNAS_EXPORTACION)
+    for fila in filas:
+        writer.writerow([fila[0], fila[1].strftime('%Y-%m-%d %H:%M:%S'), *fila[2:]])
+        if buffer.tell() >= tamano_bloque:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+def _serializar_ndjson(filas, tamano_bloque=64 * 1024):
+    lineas = []
+    tamano = 0
+    for fila in filas:
+        registro = dict(zip(COLUMNAS_EXPORTACION, fila))
+        registro['fecha'] = registro['fecha'].isoformat()
+        linea = json.dumps(registro, ensure_ascii=False) + '\n'
+        lineas.append(linea)
+        tamano += len(linea)
+        if tamano >= tamano_bloque:
+            yield ''.join(lineas).encode('utf-8')
+            lineas = []
+            tamano = 0
+    yield ''.join(lineas).encode('utf-8')
+
+def _comprimir_gzip(partes):
+    """Comprimir un flujo de bytes en formato gzip sin acumularlo en memoria"""
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for parte in partes:
+        comprimido = compresor.compress(parte)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+def generar_reporte_excel(fecha_inicio=None, fecha_fin=None, completo=False):
+    """Generar reporte en Excel con múltiples hojas
+    
+    Con `completo=True` la hoja de pedidos incluye todos los pedidos del
+    período en lugar de los 100 más recientes.
+    """
+    if not EXCEL_AVAILABLE:
+        raise Exception("Openpyxl no está disponible")
+    
+    # El libro se escribe en un archivo temporal que pasa a disco al crecer
+    output = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    escribir_reporte_excel(output, fecha_inicio, fecha_fin, completo=completo)
+    output.seek(0)
+    
+    return send_file(
+        output,
+        as_attachment=True,
+        download_name=f'reporte_restaurante_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx',
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
+def escribir_reporte_excel(destino, fecha_inicio=None, fecha_fin=None, completo=False, progreso=None):
+    """Escribir el libro Excel en `destino` en modo write-only (memoria constante)
+    
+    `progreso`, si se indica, recibe la fracción completada (0 a 1).
+    """
+    from openpyxl import Workbook
+    
+    wb = Workbook(write_only=True)
+    
+    # Hoja 1: Resumen General (una consulta, compartida con la página de inicio)
+    resumen = resumen_general()
+    estados = resumen['pedidos_por_estado']
+    metricas = [
+        ("Total de Pedidos", resumen['total_pedidos']),
+        ("Total de Productos", resumen['total_productos']),
+        ("Total de Usuarios", resumen['total_usuarios']),
+        ("Total de Mesas", resumen['total_mesas']),
+        ("Pedidos Pendientes", estados.get('pendiente', 0)),
+        ("Pedidos Completados", estados.get('entregado', 0)),
+    ]
+    _escribir_hoja_excel(wb, "Resumen General", ["Métrica", "Valor"], metricas)
+    
+    # Hoja 2: Pedidos Detallados
+    _escribir_hoja_excel(wb, "Pedidos", ["ID", "Cliente", "Mesa", "Estado", "Total", "Fecha", "Usuario"],
+                         _filas_pedidos_reporte(fecha_inicio, fecha_fin, completo), progreso=progreso)
+    
+    # Hoja 3: Productos
+    productos = (
+        (producto.id, producto.nombre, producto.categoria, f"S/ {producto.precio:.2f}",
+         "Disponible" if producto.disponible else "No disponible")
+        for producto in Producto.query.all()
+    )
+    _escribir_hoja_excel(wb, "Productos", ["ID", "Nombre", "Categoría", "Precio", "Estado"], productos)
+    
+    wb.save(destino)
+
+def _filas_pedidos_reporte(fecha_inicio, fecha_fin, completo, limite=100):
+    """Filas de pedidos de los reportes leídas por lotes, con mesa y usuario unidos en la consulta"""
+    consulta = db.session.query(
+        Pedido.id,
+        Pedido.cliente_nombre,
+        func.coalesce(Pedido.mesa_numero, Mesa.numero),
+        Pedido.estado,
+        Pedido.total,
+        Pedido.fecha,
+        Usuario.nombre_completo
+    ).outerjoin(Mesa, Pedido.mesa_id == Mesa.id).outerjoin(Usuario, Pedido.usuario_id == Usuario.id)
+    
+    if completo:
+        inicio, fin = rango_fechas(fecha_inicio, fecha_fin)
+        consulta = consulta.filter(
+            Pedido.fecha >= inicio,
+            Pedido.fecha < fin
+        ).order_by(Pedido.fecha, Pedido.id).yield_per(1000)
+    else:
+        consulta = consulta.order_by(Pedido.fecha.desc()).limit(limite)
+    
+    for id, cliente, mesa, estado, total, fecha, usuario in consulta:
+        yield (id, cliente, mesa or "Sin mesa", estado.title(), f"S/ {total:.2f}",
+               fecha.strftime("%Y-%m-%d %H:%M"), usuario or "N/A")
+
+def _escribir_hoja_excel(wb, titulo, encabezados, filas, progreso=None):
+    """Agregar una hoja write-only con encabezado estilizado y anchos de columna ajustados"""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, PatternFill
+    from openpyxl.utils import get_column_letter
+    
+    ws = wb.create_sheet(titulo)
+    anchos = [len(encabezado) for encabezado in encabezados]
+    total = 0
+    
+    # En modo write-only los anchos deben fijarse antes de la primera fila, así que
+    # las filas se vuelcan a un temporal mientras se miden y luego se copian a la hoja
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as temporal:
+        for fila in filas:
+            for i, valor in enumerate(fila):
+                anchos[i] = max(anchos[i], len(str(valor)))
+            pickle.dump(fila, temporal)
+            total += 1
+        
+        for i, ancho in enumerate(anchos, 1):
+            ws.column_dimensions[get_column_letter(i)].width = min(ancho + 2, 50)
+        
+        # Estilos
+        encabezado = []
+        for valor in encabezados:
+            cell = WriteOnlyCell(ws, value=valor)
+            cell.font = Font(bold=True, color="FFFFFF")
+            cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+            cell.alignment = Alignment(horizontal="center", vertical="center")
+            encabezado.append(cell)
+        ws.append(encabezado)
+        
+        temporal.seek(0)
+        for escritas in range(1, total + 1):
+            ws.append(pickle.load(temporal))
+            if progreso and escritas % 1000 == 0:
+                progreso(escritas / total)
+
+def generar_reporte_pdf(fecha_inicio=None, fecha_fin=None, completo=False):
+    """Generar reporte en PDF con tablas y estadísticas
+    
+    Con `completo=True` se listan todos los pedidos del período en lugar
+    de los 10 más recientes.
+    """
+    if not PDF_AVAILABLE:
+        raise Exception("Reportlab no está disponible")
+    
+    # El documento se construye en un archivo temporal que pasa a disco al crecer
+    output = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    escribir_reporte_pdf(output, fecha_inicio, fecha_fin, completo=completo)
+    output.seek(0)
+    
+    return send_file(
+        output,
+        as_attachment=True,
+        download_name=f'reporte_restaurante_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf',
+        mimetype='application/pdf'
+    )
+
+# Tabla de pedidos del PDF: anchos y altos fijos evitan que reportlab mida cada celda
+COLUMNAS_PEDIDOS_PDF = [35, 95, 45, 60, 55, 80, 81]
+ALTO_FILA_PDF = 14
+ALTO_ENCABEZADO_PDF = 20
+FILAS_POR_TABLA_PDF = 45
+
+@lru_cache(maxsize=None)
+def _estilos_pdf():
+    """Estilos del reporte PDF, creados una sola vez por proceso"""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+    
+    styles = getSampleStyleSheet()
+    titulo = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=1  # Center
+    )
+    tabla_resumen = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    tabla_pedidos = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    return styles, titulo, tabla_resumen, tabla_pedidos
+
+def _tabla_resumen_pdf(datos):
+    """Tabla de resumen con el estilo cacheado
+
+    La tabla se crea en cada llamada: los flowables de ReportLab guardan el
+    canvas mientras se dibujan, y compartir uno entre los trabajos de
+    ColaReportes los haría dibujar en el PDF de otro.
+    """
+    from reportlab.platypus import Table
+    
+    _, _, estilo, _ = _estilos_pdf()
+    tabla = Table([list(fila) for fila in datos])
+    tabla.setStyle(estilo)
+    return tabla
+
+def _tablas_pedidos_pdf(filas):
+    """Dividir las filas en tablas de una página con el encabezado repetido"""
+    from reportlab.platypus import LongTable
+    
+    _, _, _, estilo = _estilos_pdf()
+    encabezado = ['ID', 'Cliente', 'Mesa', 'Estado', 'Total', 'Fecha', 'Usuario']
+    bloque = []
+    
+    def tabla(bloque):
+        t = LongTable([encabezado] + bloque, colWidths=COLUMNAS_PEDIDOS_PDF,
+                      rowHeights=[ALTO_ENCABEZADO_PDF] + [ALTO_FILA_PDF] * len(bloque),
+                      repeatRows=1)
+        t.setStyle(estilo)
+        return t
+    
+    for id, cliente, mesa, estado, total, fecha, usuario in filas:
+        bloque.append([str(id), cliente[:18], str(mesa), estado, total, fecha, usuario[:16]])
+        if len(bloque) == FILAS_POR_TABLA_PDF:
+            yield tabla(bloque)
+            bloque = []
+    if bloque:
+        yield tabla(bloque)
+
+def construir_pdf_incremental(doc, historia, pendientes):
+    """Construir `doc` tomando flowables de `pendientes` a medida que se maquetan
+    
+    `build` consume la lista de la historia por el frente, así que basta con
+    rellenarla tras cada flowable para no tener nunca todo el documento en memoria.
+    """
+    pendientes = iter(pendientes)
+    
+    def rellenar(*args):
+        while len(historia) < 2:
+            siguiente = next(pendientes, None)
+            if siguiente is None:
+                return
+            historia.append(siguiente)
+    
+    doc.afterFlowable = rellenar
+    rellenar()
+    doc.build(historia)
+
+def escribir_reporte_pdf(destino, fecha_inicio=None, fecha_fin=None, completo=False, progreso=None):
+    """Escribir el reporte PDF en `destino` (ruta o archivo)
+    
+    Las tablas de pedidos se generan por lotes durante la maquetación.
+    `progreso`, si se indica, recibe la fracción completada (0 a 1).
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
+    
+    styles, title_style, _, _ = _estilos_pdf()
+    story = []
+    
+    # Título
+    story.append(Paragraph("Reporte de Restaurante", title_style))
+    story.append(Spacer(1, 12))
+    
+    # Fecha
+    story.append(Paragraph(f"Fecha de generación: {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
+    story.append(Spacer(1, 20))
+    
+    # Resumen General (una consulta, compartida con la página de inicio)
+    story.append(Paragraph("Resumen General", styles['Heading2']))
+    resumen = resumen_general()
+    estados = resumen['pedidos_por_estado']
+    resumen_data = (
+        ('Métrica', 'Valor'),
+        ('Total de Pedidos', str(resumen['total_pedidos'])),
+        ('Total de Productos', str(resumen['total_productos'])),
+        ('Total de Usuarios', str(resumen['total_usuarios'])),
+        ('Total de Mesas', str(resumen['total_mesas'])),
+        ('Pedidos Pendientes', str(estados.get('pendiente', 0))),
+        ('Pedidos Completados', str(estados.get('entregado', 0))),
+    )
+    
+    story.append(_tabla_resumen_pdf(resumen_data))
+    story.append(Spacer(1, 20))
+    
+    # Gráficos del período, renderizados por el servicio de gráficos
+    if fecha_inicio and fecha_fin and MATPLOTLIB_AVAILABLE:
+        story.append(Paragraph("Gráficos del Período", styles['Heading2']))
+        for nombre in graficos.GRAFICOS:
+            png = servicio_graficos.obtener_png(nombre, fecha_inicio, fecha_fin)
+            story.append(Image(io.BytesIO(png), width=6 * inch, height=3 * inch))
+            story.append(Spacer(1, 12))
+    
+    # Pedidos: todo el período o los 10 más recientes
+    if completo:
+        inicio, fin = rango_fechas(fecha_inicio, fecha_fin)
+        total = Pedido.query.filter(Pedido.fecha >= inicio, Pedido.fecha < fin).count()
+        story.append(Paragraph(
+            f"Pedidos del {fecha_inicio.strftime('%d/%m/%Y')} al {fecha_fin.strftime('%d/%m/%Y')} ({total})",
+            styles['Heading2']
+        ))
+    else:
+        total = 0
+        story.append(Paragraph("Últimos 10 Pedidos", styles['Heading2']))
+    
+    filas = _filas_pedidos_reporte(fecha_inicio, fecha_fin, completo, limite=10)
+    
+    def tablas():
+        for numero, tabla in enumerate(_tablas_pedidos_pdf(filas), 1):
+            if progreso and total and numero % 20 == 0:
+                progreso(min(numero * FILAS_POR_TABLA_PDF / total, 1.0))
+            yield tabla
+    
+    # Generar PDF
+    doc = SimpleDocTemplate(destino, pagesize=A4, pageCompression=1)
+    construir_pdf_incremental(doc, story, tablas())
@@ -0,0 +1,85 @@
+# Renderizado de gráficos de reportes a PNG con matplotlib.
+#
+# Este módulo no depende de Flask ni de la base de datos: recibe datos ya
+# agregados y devuelve los bytes de la imagen, para que ServicioGraficos
+# (servicios.py) pueda ejecutarlo en procesos separados. Esos procesos solo
+# importan el paquete app (Flask y las extensiones), no crean la aplicación
+# ni abren conexiones. matplotlib se importa en el primer renderizado, no al
+# importar el módulo.
+
+import io
+
+COLORES = ['#0d6efd', '#ffc107', '#0dcaf0', '#198754', '#dc3545', '#6c757d']
+
+
+def renderizar(nombre, datos, ancho=8, alto=4, dpi=100):
+    """Devolver el PNG del gráfico `nombre` para los datos indicados"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    # Se usa Figure con el canvas Agg directamente (sin pyplot) para no
+    # depender del backend configurado ni compartir estado global
+    figura = Figure(figsize=(ancho, alto), dpi=dpi)
+    FigureCanvasAgg(figura)
+    ejes = figura.add_subplot()
+    GRAFICOS[nombre](ejes, datos)
+    figura.tight_layout()
+
+    salida = io.BytesIO()
+    figura.savefig(salida, format='png')
+    return salida.getvalue()
+
+
+def _ventas_diarias(ejes, datos):
+    """Línea de ventas por día (`labels` dd/mm y `data` en soles)"""
+    etiquetas, valores = datos['labels'], datos['data']
+    if not valores:
+        _sin_datos(ejes)
+        return
+    posiciones = range(len(valores))
+    ejes.plot(posiciones, valores, color=COLORES[0], marker='o' if len(valores) <= 31 else None)
+    ejes.fill_between(posiciones, valores, color=COLORES[0], alpha=0.1)
+    paso = max(1, len(etiquetas) // 15)
+    ejes.set_xticks(list(posiciones)[::paso])
+    ejes.set_xticklabels(etiquetas[::paso], rotation=45, fontsize=8)
+    ejes.set_ylabel('Ventas (S/)')
+    ejes.set_title('Ventas diarias')
+    ejes.grid(alpha=0.3)
+
+
+def _estados(ejes, datos):
+    """Dona con la distribución de pedidos por estado"""
+    pares = [(etiqueta, valor) for etiqueta, valor in zip(datos['labels'], datos['data']) if valor]
+    if not pares:
+        _sin_datos(ejes)
+        return
+    etiquetas, valores = zip(*pares)
+    ejes.pie(valores, labels=etiquetas, colors=COLORES[:len(valores)], autopct='%1.0f%%',
+             wedgeprops={'width': 0.45}, startangle=90)
+    ejes.set_title('Estados de pedidos')
+    ejes.axis('equal')
+
+
+def _top_productos(ejes, datos):
+    """Barras horizontales con la cantidad vendida de los productos más vendidos"""
+    if not datos:
+        _sin_datos(ejes)
+        return
+    nombres = [fila[0] for fila in reversed(datos)]
+    cantidades = [fila[1] for fila in reversed(datos)]
+    ejes.barh(nombres, cantidades, color=COLORES[3])
+    ejes.set_xlabel('Unidades vendidas')
+    ejes.set_title('Productos más vendidos')
+    ejes.grid(axis='x', alpha=0.3)
+
+
+def _sin_datos(ejes):
+    ejes.text(0.5, 0.5, 'Sin datos para el período', ha='center', va='center', fontsize=12, color='#6c757d')
+    ejes.set_axis_off()
+
+
+GRAFICOS = {
+    'ventas_diarias': _ventas_diarias,
+    'estados': _estados,
+    'top_productos': _top_productos,
+}
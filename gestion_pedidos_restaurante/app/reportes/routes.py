@@ -0,0 +1,180 @@
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, send_file, make_response
+from flask_login import login_required
+from datetime import datetime
+import hashlib
+
+from app.models import Pedido
+from app.models.cargas import carga_reporte_pedidos
+from app.permisos import requiere_permiso
+from app.reportes import graficos
+from app.reportes.cache import cache_reportes
+from app.reportes.consultas import periodo_solicitado, rango_fechas, datos_reporte
+from app.reportes.exportacion import (
+    EXCEL_AVAILABLE, PDF_AVAILABLE, MATPLOTLIB_AVAILABLE,
+    exportar_pedidos_plano, generar_reporte_excel, generar_reporte_pdf
+)
+from app.reportes.servicios import cache_graficos, servicio_graficos, cola_reportes
+from app.solo_lectura import solo_lectura
+
+reportes_bp = Blueprint('reportes', __name__)
+
+@reportes_bp.route('/reportes')
+@solo_lectura
+@login_required
+@requiere_permiso('admin')
+def reportes():
+    """Dashboard de reportes con análisis completo"""
+    fecha_inicio, fecha_fin = periodo_solicitado()
+    
+    # Datos agregados del período (cacheados por rango de fechas)
+    datos = datos_reporte(fecha_inicio, fecha_fin)
+    
+    # Pedidos detallados (últimos 20)
+    inicio, fin = rango_fechas(fecha_inicio, fecha_fin)
+    pedidos_detallados = Pedido.query.options(*carga_reporte_pedidos()).filter(
+        Pedido.fecha >= inicio,
+        Pedido.fecha < fin
+    ).order_by(Pedido.fecha.desc()).limit(20).all()
+    
+    # Fechas por defecto para el template
+    fecha_default = {
+        'inicio': fecha_inicio.strftime('%Y-%m-%d'),
+        'fin': fecha_fin.strftime('%Y-%m-%d')
+    }
+    
+    return render_template('reportes/index.html',
+                         pedidos_detallados=pedidos_detallados,
+                         fecha_default=fecha_default,
+                         **datos)
+
+@reportes_bp.route('/reportes/resumen')
+@solo_lectura
+@login_required
+@requiere_permiso('admin')
+def reportes_resumen():
+    """Resumen de reportes con gráficos renderizados en el servidor (sin JavaScript)"""
+    fecha_inicio, fecha_fin = periodo_solicitado()
+    datos = datos_reporte(fecha_inicio, fecha_fin)
+    
+    fecha_default = {
+        'inicio': fecha_inicio.strftime('%Y-%m-%d'),
+        'fin': fecha_fin.strftime('%Y-%m-%d')
+    }
+    
+    return render_template('reportes/resumen.html',
+                         fecha_default=fecha_default,
+                         metricas=datos['metricas'],
+                         top_productos=datos['top_productos'])
+
+@reportes_bp.route('/reportes/graficos/<nombre>.png')
+@solo_lectura
+@login_required
+@requiere_permiso('admin')
+def grafico_reporte(nombre):
+    """Imagen PNG de un gráfico del período solicitado"""
+    if nombre not in graficos.GRAFICOS:
+        return jsonify({'success': False, 'message': 'Gráfico no encontrado'}), 404
+    if not MATPLOTLIB_AVAILABLE:
+        return jsonify({'success': False, 'message': 'Gráficos no disponibles. Instale matplotlib.'}), 503
+    fecha_inicio, fecha_fin = periodo_solicitado()
+    
+    try:
+        png = servicio_graficos.obtener_png(nombre, fecha_inicio, fecha_fin)
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error al generar gráfico: {str(e)}'}), 500
+    
+    response = make_response(png)
+    response.mimetype = 'image/png'
+    response.set_etag(hashlib.md5(png).hexdigest())
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+@reportes_bp.route('/reportes/cache')
+@login_required
+@requiere_permiso('admin')
+def estadisticas_cache_reportes():
+    """Contadores de aciertos y fallos del cache de reportes"""
+    return jsonify({
+        **cache_reportes.estadisticas(),
+        'graficos': cache_graficos.estadisticas()
+    })
+
+@reportes_bp.route('/reportes/exportar/<formato>')
+@solo_lectura
+@login_required
+@requiere_permiso('admin')
+def exportar_reporte(formato):
+    """Exportar reportes en Excel o PDF"""
+    try:
+        if formato.lower() == 'excel':
+            if not EXCEL_AVAILABLE:
+                flash('La funcionalidad de exportación a Excel no está disponible. Instale openpyxl.', 'error')
+                return redirect(url_for('reportes.reportes'))
+            fecha_inicio, fecha_fin = periodo_solicitado()
+            completo = request.args.get('modo') == 'completo'
+            return generar_reporte_excel(fecha_inicio, fecha_fin, completo=completo)
+        elif formato.lower() == 'pdf':
+            if not PDF_AVAILABLE:
+                flash('La funcionalidad de exportación a PDF no está disponible. Instale reportlab.', 'error')
+                return redirect(url_for('reportes.reportes'))
+            fecha_inicio, fecha_fin = periodo_solicitado()
+            completo = request.args.get('modo') == 'completo'
+            return generar_reporte_pdf(fecha_inicio, fecha_fin, completo=completo)
+        elif formato.lower() in ('csv', 'ndjson'):
+            fecha_inicio, fecha_fin = periodo_solicitado()
+            return exportar_pedidos_plano(formato.lower(), fecha_inicio, fecha_fin)
+        else:
+            flash('Formato no válido', 'error')
+            return redirect(url_for('reportes.reportes'))
+    except Exception as e:
+        flash(f'Error al generar reporte: {str(e)}', 'error')
+        return redirect(url_for('reportes.reportes'))
+
+@reportes_bp.route('/reportes/trabajos', methods=['POST'])
+@login_required
+@requiere_permiso('admin')
+def crear_trabajo_reporte():
+    """Encolar la generación de un reporte Excel o PDF"""
+    formato = request.values.get('formato', '').lower()
+    if formato not in ('excel', 'pdf'):
+        return jsonify({'success': False, 'message': 'Formato no válido'}), 400
+    if formato == 'excel' and not EXCEL_AVAILABLE:
+        return jsonify({'success': False, 'message': 'Exportación a Excel no disponible. Instale openpyxl.'}), 400
+    if formato == 'pdf' and not PDF_AVAILABLE:
+        return jsonify({'success': False, 'message': 'Exportación a PDF no disponible. Instale reportlab.'}), 400
+    
+    fecha_inicio, fecha_fin = periodo_solicitado()
+    completo = request.values.get('modo') == 'completo'
+    trabajo = cola_reportes.enviar(formato, fecha_inicio, fecha_fin, completo=completo)
+    return jsonify(trabajo.to_dict()), 202
+
+@reportes_bp.route('/reportes/trabajos/<id>')
+@login_required
+@requiere_permiso('admin')
+def estado_trabajo_reporte(id):
+    """Consultar el avance de un trabajo de reporte"""
+    trabajo = cola_reportes.obtener(id)
+    if trabajo is None:
+        return jsonify({'success': False, 'message': 'Trabajo no encontrado o vencido'}), 404
+    return jsonify(trabajo.to_dict())
+
+@reportes_bp.route('/reportes/trabajos/<id>/descarga')
+@login_required
+@requiere_permiso('admin')
+def descargar_trabajo_reporte(id):
+    """Descargar el archivo generado por un trabajo completado"""
+    trabajo = cola_reportes.obtener(id)
+    if trabajo is None or trabajo.estado != 'completado':
+        flash('El reporte no está disponible. Vuelva a generarlo.', 'error')
+        return redirect(url_for('reportes.reportes'))
+    
+    mimetypes = {
+        'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'pdf': 'application/pdf'
+    }
+    return send_file(
+        trabajo.ruta,
+        as_attachment=True,
+        download_name=f'reporte_restaurante_{datetime.now().strftime("%Y%m%d_%H%M")}.{trabajo.extension}',
+        mimetype=mimetypes[trabajo.formato]
+    )
@@ -0,0 +1,319 @@
+from flask import url_for, current_app
+from sqlalchemy import event, inspect
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+import uuid
+
+from app.extensions import db
+from app.models import Pedido, DetallePedido
+from app.reportes import graficos
+from app.reportes.cache import CacheReportes, cache_reportes
+from app.reportes.consultas import datos_grafico
+from app.solo_lectura import lectura
+
+# ===== GRÁFICOS DEL SERVIDOR =====
+
+class ServicioGraficos:
+    """Renderiza los gráficos PNG en un pool de procesos y los cachea
+    
+    Cada PNG se guarda por (gráfico, rango) junto con la generación del
+    cache vigente al leer los datos: si una escritura invalida esos días
+    mientras se renderiza, la imagen ya desactualizada no se guarda.
+    Con `max_workers=0` se renderiza en el propio hilo, serializado.
+    """
+    
+    def __init__(self, cache, max_workers=2, timeout=30):
+        self.cache = cache
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def obtener_png(self, nombre, fecha_inicio, fecha_fin):
+        if nombre not in graficos.GRAFICOS:
+            raise KeyError(nombre)
+        clave = (nombre, fecha_inicio, fecha_fin)
+        png = self.cache.obtener(clave)
+        if png is None:
+            generacion = self.cache.generacion
+            png = self._renderizar(nombre, datos_grafico(nombre, fecha_inicio, fecha_fin))
+            self.cache.guardar(clave, png, [(fecha_inicio, fecha_fin)], generacion)
+        return png
+    
+    def _renderizar(self, nombre, datos):
+        if self.max_workers <= 0:
+            with self._lock:
+                return graficos.renderizar(nombre, datos)
+        try:
+            return self._pool().submit(graficos.renderizar, nombre, datos).result(self.timeout)
+        except BrokenProcessPool:
+            # Un worker murió: se descarta el pool y se reintenta una vez
+            with self._lock:
+                self._executor = None
+            return self._pool().submit(graficos.renderizar, nombre, datos).result(self.timeout)
+    
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn evita heredar por fork los hilos y conexiones del servidor
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+cache_graficos = CacheReportes(max_entradas=128)
+servicio_graficos = ServicioGraficos(cache_graficos)
+
+# ===== TRABAJOS DE REPORTES EN SEGUNDO PLANO =====
+
+class TrabajoReporte:
+    """Estado de una exportación que se genera fuera del hilo de la petición"""
+    
+    def __init__(self, clave, formato, fecha_inicio, fecha_fin, completo, id=None):
+        self.id = id or uuid.uuid4().hex
+        self.clave = clave
+        self.formato = formato
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        self.completo = completo
+        self.estado = 'pendiente'  # pendiente, procesando, completado, error
+        self.progreso = 0.0
+        self.error = None
+        self.ruta = None
+        self.expira = None  # time.time() en que vence
+    
+    @property
+    def extension(self):
+        return 'xlsx' if self.formato == 'excel' else 'pdf'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'formato': self.formato,
+            'estado': self.estado,
+            'progreso': round(self.progreso * 100),
+            'error': self.error,
+            'url_estado': url_for('reportes.estado_trabajo_reporte', id=self.id),
+            'url_descarga': url_for('reportes.descargar_trabajo_reporte', id=self.id) if self.estado == 'completado' else None
+        }
+
+class ColaReportes:
+    """Cola local de exportaciones ejecutadas en un pool de hilos
+    
+    Peticiones idénticas (mismo formato, período y modo) comparten el
+    trabajo en curso o el archivo ya generado mientras no expire. Los
+    archivos se guardan en disco junto a un JSON con su estado, de modo
+    que cualquier worker puede informar el avance y servir la descarga;
+    se borran al vencer o cuando una escritura de pedidos afecta su período.
+    """
+    
+    def __init__(self):
+        self.directorio = None
+        self.ttl = 600
+        self._executor = None
+        self._trabajos = {}  # id -> TrabajoReporte
+        self._por_clave = {}  # clave -> id
+        self._lock = threading.Lock()
+    
+    def configurar(self, directorio, max_workers=2, ttl=600):
+        """Fijar la carpeta, los hilos y la vigencia de los archivos (desde create_app)"""
+        self.directorio = directorio
+        self.ttl = ttl
+        # Los hilos del pool se crean con el primer trabajo, no aquí: así
+        # los workers que se bifurcan tras precargar la app no los heredan
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='reportes')
+        self._limpiar_directorio()
+    
+    def enviar(self, formato, fecha_inicio, fecha_fin, completo=False):
+        """Encolar una exportación o devolver el trabajo equivalente existente"""
+        # El Excel sin modo completo no depende del período (el PDF sí, por los gráficos)
+        if not completo and formato == 'excel':
+            fecha_inicio = fecha_fin = None
+        clave = (formato, fecha_inicio, fecha_fin, completo)
+        
+        with self._lock:
+            self._purgar()
+            trabajo = self._trabajos.get(self._por_clave.get(clave))
+            if trabajo and trabajo.estado != 'error':
+                return trabajo
+            
+            trabajo = TrabajoReporte(clave, formato, fecha_inicio, fecha_fin, completo)
+            self._trabajos[trabajo.id] = trabajo
+            self._por_clave[clave] = trabajo.id
+        
+        self._guardar_estado(trabajo)
+        self._executor.submit(self._ejecutar, current_app._get_current_object(), trabajo)
+        return trabajo
+    
+    def obtener(self, id):
+        """Buscar un trabajo propio o, si lo creó otro worker, su estado en disco"""
+        with self._lock:
+            trabajo = self._trabajos.get(id)
+        if trabajo is None and re.fullmatch(r'[0-9a-f]{32}', id):
+            trabajo = self._leer_estado(id)
+        if trabajo is None or (trabajo.expira is not None and trabajo.expira < time.time()):
+            return None
+        return trabajo
+    
+    def invalidar_dias(self, dias):
+        """Descartar los archivos generados que incluyen alguno de los días"""
+        if not dias:
+            return
+        with self._lock:
+            for trabajo in list(self._trabajos.values()):
+                if trabajo.estado != 'completado':
+                    continue
+                if not trabajo.completo or any(trabajo.fecha_inicio <= dia <= trabajo.fecha_fin for dia in dias):
+                    self._descartar(trabajo)
+    
+    def _ejecutar(self, app_flask, trabajo):
+        # exportacion importa este módulo (servicio de gráficos), por eso se importa aquí
+        from app.reportes.exportacion import escribir_reporte_excel, escribir_reporte_pdf
+        
+        trabajo.estado = 'procesando'
+        self._guardar_estado(trabajo)
+        ruta = os.path.join(self.directorio, f'{trabajo.id}.{trabajo.extension}')
+        temporal = ruta + '.tmp'
+        
+        def progreso(fraccion):
+            trabajo.progreso = fraccion
+            self._guardar_estado(trabajo)
+        
+        try:
+            with app_flask.app_context(), lectura():
+                with open(temporal, 'wb') as destino:
+                    if trabajo.formato == 'excel':
+                        escribir_reporte_excel(destino, trabajo.fecha_inicio, trabajo.fecha_fin,
+                                               completo=trabajo.completo, progreso=progreso)
+                    else:
+                        escribir_reporte_pdf(destino, trabajo.fecha_inicio, trabajo.fecha_fin,
+                                             completo=trabajo.completo, progreso=progreso)
+            os.replace(temporal, ruta)
+            with self._lock:
+                trabajo.ruta = ruta
+                trabajo.progreso = 1.0
+                trabajo.expira = time.time() + self.ttl
+                trabajo.estado = 'completado'
+        except Exception as e:
+            trabajo.estado = 'error'
+            trabajo.error = str(e)
+            trabajo.expira = time.time() + self.ttl
+            if os.path.exists(temporal):
+                os.remove(temporal)
+        self._guardar_estado(trabajo)
+    
+    def _ruta_estado(self, id):
+        return os.path.join(self.directorio, f'{id}.json')
+    
+    def _guardar_estado(self, trabajo):
+        os.makedirs(self.directorio, exist_ok=True)
+        temporal = self._ruta_estado(trabajo.id) + '.tmp'
+        with open(temporal, 'w') as archivo:
+            json.dump({
+                'formato': trabajo.formato,
+                'estado': trabajo.estado,
+                'progreso': trabajo.progreso,
+                'error': trabajo.error,
+                'ruta': trabajo.ruta,
+                'expira': trabajo.expira
+            }, archivo)
+        os.replace(temporal, self._ruta_estado(trabajo.id))
+    
+    def _leer_estado(self, id):
+        try:
+            with open(self._ruta_estado(id)) as archivo:
+                datos = json.load(archivo)
+        except (OSError, ValueError):
+            return None
+        trabajo = TrabajoReporte(None, datos['formato'], None, None, False, id=id)
+        trabajo.estado = datos['estado']
+        trabajo.progreso = datos['progreso']
+        trabajo.error = datos['error']
+        trabajo.ruta = datos['ruta']
+        trabajo.expira = datos['expira']
+        return trabajo
+    
+    def _purgar(self):
+        """Eliminar trabajos vencidos y sus archivos (con el lock tomado)"""
+        ahora = time.time()
+        for trabajo in list(self._trabajos.values()):
+            if trabajo.expira is not None and trabajo.expira < ahora:
+                self._descartar(trabajo)
+    
+    def _descartar(self, trabajo):
+        self._trabajos.pop(trabajo.id, None)
+        if self._por_clave.get(trabajo.clave) == trabajo.id:
+            del self._por_clave[trabajo.clave]
+        for ruta in (trabajo.ruta, self._ruta_estado(trabajo.id)):
+            if ruta and os.path.exists(ruta):
+                os.remove(ruta)
+    
+    def _limpiar_directorio(self):
+        """Borrar archivos de ejecuciones anteriores que ya vencieron"""
+        if not os.path.isdir(self.directorio):
+            return
+        limite = time.time() - self.ttl
+        for nombre in os.listdir(self.directorio):
+            ruta = os.path.join(self.directorio, nombre)
+            try:
+                if os.path.getmtime(ruta) < limite:
+                    os.remove(ruta)
+            except OSError:
+                pass
+
+cola_reportes = ColaReportes()
+
+def init_app(app):
+    """Aplicar la configuración de la aplicación a los servicios de reportes"""
+    cache_reportes.max_entradas = app.config['REPORTES_CACHE_MAX']
+    cache_reportes.ttl = app.config['REPORTES_CACHE_TTL']
+    cache_graficos.max_entradas = app.config['GRAFICOS_CACHE_MAX']
+    cache_graficos.ttl = app.config['REPORTES_CACHE_TTL']
+    servicio_graficos.max_workers = app.config['GRAFICOS_WORKERS']
+    cola_reportes.configurar(
+        app.config['REPORTES_DIR'],
+        max_workers=app.config['REPORTES_WORKERS'],
+        ttl=app.config['REPORTES_ARCHIVOS_TTL']
+    )
+
+# ===== INVALIDACIÓN POR ESCRITURAS DE PEDIDOS =====
+
+def _fecha_pedido(objeto):
+    """Fechas (día) de pedido afectadas por un Pedido o DetallePedido modificado"""
+    if isinstance(objeto, DetallePedido):
+        pedido = objeto.pedido or db.session.get(Pedido, objeto.pedido_id)
+        return _fecha_pedido(pedido) if pedido else set()
+    fechas = {objeto.fecha or datetime.now(timezone.utc)}
+    fechas.update(f for f in inspect(objeto).attrs.fecha.history.deleted if f)
+    return {f.date() for f in fechas}
+
+def marcar_dias_modificados(session, dias):
+    """Registrar días escritos con UPDATE masivos, que after_flush no ve"""
+    session.info.setdefault('dias_pedidos_modificados', set()).update(dias)
+
+@event.listens_for(db.session, 'after_flush')
+def _registrar_dias_modificados(session, flush_context):
+    """Acumular los días de pedidos escritos en la transacción en curso"""
+    dias = session.info.setdefault('dias_pedidos_modificados', set())
+    for objeto in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(objeto, (Pedido, DetallePedido)):
+            dias.update(_fecha_pedido(objeto))
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidar_cache_reportes(session):
+    dias = session.info.pop('dias_pedidos_modificados', set())
+    cache_reportes.invalidar_dias(dias)
+    cache_graficos.invalidar_dias(dias)
+    cola_reportes.invalidar_dias(dias)
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_dias_modificados(session):
+    session.info.pop('dias_pedidos_modificados', None)
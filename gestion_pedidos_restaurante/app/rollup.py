@@ -0,0 +1,127 @@
+from sqlalchemy import func, extract, delete, insert, select, cast, Integer
+from sqlalchemy.dialects import postgresql, sqlite
+from flask.cli import with_appcontext
+from datetime import datetime, timezone
+import click
+
+from app.extensions import db
+from app.models import Pedido, DetallePedido, VentaRollup
+from app.models.models import CLAVE_VENTA_ROLLUP
+
+COLUMNAS_CLAVE = ('dia', 'hora', 'mesa_id', 'usuario_id', 'estado', 'producto_id')
+COLUMNAS_VALOR = ('pedidos', 'ventas', 'lineas', 'cantidad')
+
+def actualizar_rollup(pedido, detalles, signo=1, estado=None):
+    """Sumar (signo=1) o restar (signo=-1) un pedido en ventas_rollup sin hacer commit"""
+    actualizar_rollup_lote([(pedido, detalles, signo, estado)])
+
+def actualizar_rollup_lote(movimientos):
+    """Aplicar varios (pedido, detalles, signo, estado) a ventas_rollup sin hacer commit
+    
+    `pedido` y los detalles pueden ser objetos del ORM o filas con los mismos
+    atributos. Cada clave se suma en la base de datos con un solo
+    INSERT ... ON CONFLICT DO UPDATE (valor = valor + delta): dos
+    transacciones que tocan la misma fila se esperan en su bloqueo y ninguna
+    pierde el incremento de la otra, y si la fila no existía solo una la
+    inserta. Las filas que quedan sin pedidos se borran después.
+    """
+    # Deltas por (clave, producto); el producto None corresponde al pedido completo
+    deltas = {}
+    for pedido, detalles, signo, estado in movimientos:
+        fecha = pedido.fecha or datetime.now(timezone.utc)
+        clave = (fecha.date(), fecha.hour, pedido.mesa_id, pedido.usuario_id, estado or pedido.estado)
+        
+        por_producto = {None: [1, pedido.total or 0, len(detalles), sum(d.cantidad for d in detalles)]}
+        for detalle in detalles:
+            delta = por_producto.setdefault(detalle.producto_id, [1, 0, 0, 0])
+            delta[1] += detalle.subtotal
+            delta[2] += 1
+            delta[3] += detalle.cantidad
+        
+        for producto_id, valores in por_producto.items():
+            acumulado = deltas.setdefault(clave + (producto_id,), [0, 0, 0, 0])
+            for i, valor in enumerate(valores):
+                acumulado[i] += signo * valor
+    
+    # En el orden de la clave: dos transacciones bloquean las filas comunes
+    # en el mismo orden y no pueden esperarse mutuamente (deadlock)
+    filas = [dict(zip(COLUMNAS_CLAVE, clave), pedidos=pedidos, ventas=ventas, lineas=lineas, cantidad=cantidad)
+             for clave, (pedidos, ventas, lineas, cantidad) in sorted(deltas.items(), key=_orden_clave)
+             if pedidos or ventas or lineas or cantidad]
+    if not filas:
+        return
+    db.session.execute(_sumar_en_rollup(), filas)
+    
+    # Una resta puede dejar filas sin pedidos (o, con el rollup desfasado,
+    # crear una en negativo): se borran, y reconstruir-rollup corrige el resto
+    if any(fila['pedidos'] < 0 for fila in filas):
+        db.session.execute(delete(VentaRollup).where(
+            VentaRollup.dia.in_({fila['dia'] for fila in filas}), VentaRollup.pedidos <= 0))
+
+def _orden_clave(item):
+    """Clave de ordenación de un delta; los None van primero"""
+    return tuple((valor is not None, valor) for valor in item[0])
+
+def _sumar_en_rollup():
+    """INSERT ... ON CONFLICT DO UPDATE que suma los valores a la fila de la misma clave"""
+    insertar = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}[db.engine.dialect.name]
+    tabla = VentaRollup.__table__
+    sentencia = insertar(tabla)
+    return sentencia.on_conflict_do_update(
+        index_elements=CLAVE_VENTA_ROLLUP,
+        set_={columna: tabla.c[columna] + sentencia.excluded[columna] for columna in COLUMNAS_VALOR})
+
+def reconstruir_rollup(conexion=None):
+    """Regenerar ventas_rollup desde pedidos y detalles_pedido sin hacer commit
+    
+    Usa la sesión o, desde una migración, la `conexion` indicada.
+    """
+    ejecutar = (conexion or db.session).execute
+    dia = func.date(Pedido.fecha)
+    hora = cast(extract('hour', Pedido.fecha), Integer)  # numeric en PostgreSQL
+    columnas = ['dia', 'hora', 'mesa_id', 'usuario_id', 'estado']
+    
+    ejecutar(delete(VentaRollup))
+    
+    # Filas por pedido completo
+    lineas = select(
+        DetallePedido.pedido_id,
+        func.count(DetallePedido.id).label('lineas'),
+        func.sum(DetallePedido.cantidad).label('cantidad')
+    ).group_by(DetallePedido.pedido_id).subquery()
+    
+    por_pedido = select(
+        dia, hora, Pedido.mesa_id, Pedido.usuario_id, Pedido.estado,
+        func.count(Pedido.id),
+        func.coalesce(func.sum(Pedido.total), 0),
+        func.coalesce(func.sum(lineas.c.lineas), 0),
+        func.coalesce(func.sum(lineas.c.cantidad), 0)
+    ).outerjoin(lineas, lineas.c.pedido_id == Pedido.id).group_by(
+        dia, hora, Pedido.mesa_id, Pedido.usuario_id, Pedido.estado
+    )
+    ejecutar(insert(VentaRollup).from_select(
+        columnas + ['pedidos', 'ventas', 'lineas', 'cantidad'], por_pedido))
+    
+    # Filas por producto
+    por_producto = select(
+        dia, hora, Pedido.mesa_id, Pedido.usuario_id, Pedido.estado,
+        DetallePedido.producto_id,
+        func.count(func.distinct(Pedido.id)),
+        func.coalesce(func.sum(DetallePedido.subtotal), 0),
+        func.count(DetallePedido.id),
+        func.coalesce(func.sum(DetallePedido.cantidad), 0)
+    ).join(DetallePedido, DetallePedido.pedido_id == Pedido.id).group_by(
+        dia, hora, Pedido.mesa_id, Pedido.usuario_id, Pedido.estado, DetallePedido.producto_id
+    )
+    ejecutar(insert(VentaRollup).from_select(
+        columnas + ['producto_id', 'pedidos', 'ventas', 'lineas', 'cantidad'], por_producto))
+
+@click.command('reconstruir-rollup')
+@with_appcontext
+def reconstruir_rollup_command():
+    """Reconstruir la tabla ventas_rollup desde el historial de pedidos"""
+    db.create_all()
+    reconstruir_rollup()
+    db.session.commit()
+    filas = VentaRollup.query.count()
+    print(f"ventas_rollup reconstruida: {filas} filas")
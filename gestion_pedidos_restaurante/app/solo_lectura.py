@@ -0,0 +1,84 @@
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from contextlib import contextmanager
+from functools import wraps
+import os
+
+from app.config import opciones_motor
+
+# ===== MOTOR DE LECTURA =====
+#
+# Reportes, exportaciones y estadísticas leen mucho y no escriben. Con
+# @solo_lectura (o dentro de `with lectura():`) sus consultas salen por un
+# motor aparte: una réplica (LECTURA_DATABASE_URI) o, con SQLite, el mismo
+# archivo abierto en mode=ro. Así tienen su propio pool y no ocupan las
+# conexiones de la toma de pedidos, y una escritura por error en esas
+# rutas falla en lugar de tomar el bloqueo de escritura. Los flush de la
+# sesión siempre van al motor principal.
+
+def uri_lectura(config, instance_path):
+    """URI del motor de lectura, o None si las lecturas van al motor principal
+
+    Sin LECTURA_DATABASE_URI, una base SQLite en archivo se vuelve a abrir en
+    modo solo lectura; otras bases necesitan la URL de su réplica.
+    """
+    if not config['LECTURA_SEPARADA']:
+        return None
+    if config['LECTURA_DATABASE_URI']:
+        return config['LECTURA_DATABASE_URI']
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:') or url.query.get('uri'):
+        return None
+    # Misma resolución de rutas relativas que Flask-SQLAlchemy
+    ruta = os.path.join(instance_path, url.database)
+    return url.set(database='file:' + ruta, query={'mode': 'ro', 'uri': 'true'}).render_as_string(hide_password=False)
+
+def motor_lectura():
+    """Motor de lectura de la aplicación actual (None si no hay uno aparte)"""
+    return current_app.extensions.get('motor_lectura')
+
+def leyendo():
+    """Si las consultas de la sesión actual van al motor de lectura"""
+    return has_app_context() and g.get('_solo_lectura', False)
+
+class SesionEnrutada(Session):
+    """Sesión de Flask-SQLAlchemy que envía las consultas de solo lectura al motor de lectura"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and leyendo():
+            motor = motor_lectura()
+            if motor is not None:
+                return motor
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@contextmanager
+def lectura():
+    """Enviar al motor de lectura las consultas del bloque (requiere app_context)"""
+    anterior = g.get('_solo_lectura', False)
+    g._solo_lectura = True
+    try:
+        yield
+    finally:
+        g._solo_lectura = anterior
+
+def solo_lectura(f):
+    """Decorador para vistas que solo leen
+
+    Marca la petición completa, también las respuestas en streaming que
+    consultan después de que la vista devuelva.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g._solo_lectura = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+def init_app(app):
+    """Crear el motor de lectura si la configuración lo pide"""
+    uri = uri_lectura(app.config, app.instance_path)
+    if uri is None:
+        return
+    app.extensions['motor_lectura'] = create_engine(
+        uri, **opciones_motor(app.config, uri))
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# Tiempo de arranque en frío y memoria por worker al crear la aplicación, con
+# las librerías de exportación cargadas en el primer uso (como en la
+# aplicación) frente a importarlas todas al arrancar.
+#
+# Cada medición es un intérprete nuevo con `python -X importtime`; se
+# informa la mediana de las repeticiones y los paquetes que más tardan.
+#
+# Uso: python benchmarks/bench_arranque.py [repeticiones]
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPETICIONES = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+CARGAR_APP = '''
+import sys, time
+inicio = time.perf_counter()
+{previo}
+sys.path.insert(0, {basedir!r})
+from app import create_app
+create_app()
+duracion = time.perf_counter() - inicio
+with open('/proc/self/status') as status:
+    rss = next(int(l.split()[1]) for l in status if l.startswith('VmRSS:'))
+print(duracion, rss)
+'''
+
+MODOS = {
+    'perezoso': '',
+    'anticipado': 'import openpyxl, reportlab.platypus, matplotlib.pyplot',
+}
+
+
+def medir(previo, db_path):
+    """Arrancar un intérprete nuevo y devolver (segundos, RSS en MB, importtime por paquete)"""
+    codigo = CARGAR_APP.format(previo=previo, basedir=BASEDIR)
+    entorno = dict(os.environ, DATABASE_URL='sqlite:///' + db_path)
+    resultado = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                               capture_output=True, text=True, env=entorno, check=True)
+    duracion, rss = resultado.stdout.split()[-2:]
+
+    # Tiempo acumulado de cada import de primer nivel, agrupado por paquete raíz
+    paquetes = defaultdict(int)
+    for linea in resultado.stderr.splitlines():
+        coincidencia = re.match(r'import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)', linea)
+        if coincidencia and not coincidencia.group(2):
+            paquetes[coincidencia.group(3).split('.')[0]] += int(coincidencia.group(1))
+    return float(duracion), int(rss) / 1024, paquetes
+
+
+def main():
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+    print(f"{'modo':>12} {'arranque (ms)':>14} {'RSS worker (MB)':>16}   paquetes más lentos (ms)")
+    for modo, previo in MODOS.items():
+        mediciones = [medir(previo, db_path) for _ in range(REPETICIONES)]
+        duracion = statistics.median(m[0] for m in mediciones) * 1000
+        rss = statistics.median(m[1] for m in mediciones)
+        lentos = sorted(mediciones[-1][2].items(), key=lambda p: p[1], reverse=True)[:5]
+        detalle = ', '.join(f'{nombre} {us / 1000:.0f}' for nombre, us in lentos)
+        print(f"{modo:>12} {duracion:>14.0f} {rss:>16.1f}   {detalle}")
+
+
+if __name__ == '__main__':
+    main()
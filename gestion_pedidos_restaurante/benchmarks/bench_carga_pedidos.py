@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# Prueba de carga de la toma de pedidos: clientes concurrentes crean pedidos
+# con POST /api/v1/pedidos contra gunicorn con 1, 2 y 4 workers, sobre
+# SQLite y, si se indica su URL, sobre PostgreSQL. SQLite admite un solo
+# escritor por archivo, así que los pedidos/s no crecen con los workers;
+# con PostgreSQL las transacciones solo se esperan en las filas que
+# comparten (contadores), y los pedidos/s pueden crecer con los núcleos.
+#
+# Los clientes corren en este mismo equipo y compiten con el servidor (y
+# con PostgreSQL) por la CPU: con pocos núcleos el límite lo pone la CPU.
+# ATENCIÓN: la base de PostgreSQL indicada se vacía y se vuelve a poblar.
+#
+# Uso: python benchmarks/bench_carga_pedidos.py [clientes] [segundos] [pedidos] [url_postgresql]
+
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import cargar_app, cliente_autenticado, db, poblar, servidor, Pedido, Producto
+
+CLIENTES = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+DURACION = float(sys.argv[2]) if len(sys.argv) > 2 else 15
+PEDIDOS = int(sys.argv[3]) if len(sys.argv) > 3 else 20000
+URL_POSTGRESQL = sys.argv[4] if len(sys.argv) > 4 else os.environ.get('BENCH_POSTGRESQL_URL')
+
+WORKERS = [1, 2, 4]
+
+
+def preparar(uri):
+    """Base vacía poblada con PEDIDOS pedidos; devuelve los id de productos disponibles"""
+    app = cargar_app(uri)
+    with app.app_context():
+        db.drop_all()
+        poblar(PEDIDOS)
+        productos = [id for id, in db.session.query(Producto.id).filter_by(disponible=True)]
+        db.engine.dispose()
+    return productos
+
+
+def contar_pedidos(uri):
+    app = cargar_app(uri)
+    with app.app_context():
+        total = db.session.query(db.func.count(Pedido.id)).scalar()
+        db.engine.dispose()
+    return total
+
+
+def carga(url, productos):
+    """Crear pedidos desde CLIENTES hilos durante DURACION segundos; devuelve (pedidos/s, latencias, errores)"""
+    openers = [cliente_autenticado(url) for _ in range(CLIENTES)]
+    latencias, errores = [], [0]
+    cerrojo = threading.Lock()
+    fin = time.monotonic() + DURACION
+
+    def trabajar(opener):
+        propias, fallos = [], 0
+        while time.monotonic() < fin:
+            cuerpo = json.dumps({
+                'cliente_nombre': 'Carga',
+                'detalles': [{'producto_id': random.choice(productos), 'cantidad': random.randint(1, 3)}
+                             for _ in range(random.randint(1, 4))]
+            }).encode()
+            peticion = urllib.request.Request(url + '/api/v1/pedidos', data=cuerpo, headers={
+                'Content-Type': 'application/json', 'Idempotency-Key': uuid.uuid4().hex})
+            inicio = time.perf_counter()
+            try:
+                respuesta = opener.open(peticion, timeout=60)
+                respuesta.read()
+                if respuesta.status != 201:
+                    fallos += 1
+                else:
+                    propias.append(time.perf_counter() - inicio)
+            except (urllib.error.HTTPError, OSError):
+                fallos += 1
+        with cerrojo:
+            latencias.extend(propias)
+            errores[0] += fallos
+
+    hilos = [threading.Thread(target=trabajar, args=(opener,)) for opener in openers]
+    inicio = time.monotonic()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return len(latencias) / (time.monotonic() - inicio), latencias, errores[0]
+
+
+def main():
+    if not shutil.which('gunicorn'):
+        print('gunicorn no está instalado')
+        sys.exit(1)
+
+    bases = [('SQLite', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))]
+    if URL_POSTGRESQL:
+        bases.append(('PostgreSQL', URL_POSTGRESQL))
+    else:
+        print('Sin URL de PostgreSQL (argumento o BENCH_POSTGRESQL_URL): solo se mide SQLite')
+
+    print(f"\n{CLIENTES} clientes, {DURACION:.0f} s por configuración, {PEDIDOS} pedidos, {os.cpu_count()} CPU")
+    print(f"{'base':<11} {'workers':>7} {'pedidos/s':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'errores':>8}")
+    perdidos = 0
+    for nombre, uri in bases:
+        productos = preparar(uri)
+        for workers in WORKERS:
+            antes = contar_pedidos(uri)
+            entorno = {'DATABASE_URL': uri, 'GUNICORN_WORKERS': str(workers), 'GUNICORN_THREADS': '4'}
+            with servidor(['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], entorno) as url:
+                por_segundo, latencias, errores = carga(url, productos)
+            # Cada 201 debe corresponder a un pedido guardado
+            perdidos += len(latencias) - (contar_pedidos(uri) - antes)
+            cuantiles = statistics.quantiles(latencias, n=20) if len(latencias) > 1 else [0] * 19
+            print(f"{nombre:<11} {workers:>7} {por_segundo:>10.1f} {cuantiles[9] * 1000:>9.1f} "
+                  f"{cuantiles[18] * 1000:>9.1f} {errores:>8}")
+
+    if perdidos:
+        print(f'\n{perdidos} pedidos respondidos con 201 que no están en la base de datos')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
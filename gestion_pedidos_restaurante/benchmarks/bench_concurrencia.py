@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# Escrituras y lecturas concurrentes sobre SQLite desde varios procesos,
+# como varios workers de gunicorn: escritores que cambian pedidos de estado
+# (cambiar_estados, con rollup, versión de mesas y avisos de cocina) y
+# lectores que listan pedidos y resuelven el pedido actual de las mesas.
+# Se compara el journal por defecto de SQLite (SQLITE_PERFIL=0) con el
+# perfil de app/perfil_sqlite.py, cada uno sobre una base recién poblada.
+# Al terminar cada modo se compara ventas_rollup con su reconstrucción desde
+# los pedidos. Si con el perfil hay errores "database is locked", o si el
+# rollup no coincide en algún modo, termina con código 1.
+#
+# Uso: python benchmarks/bench_concurrencia.py [escritores] [lectores] [segundos] [pedidos]
+
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import cargar_app, db, poblar, Mesa, Pedido, Usuario
+from sqlalchemy import func, update
+from sqlalchemy.exc import OperationalError
+
+from app.models import VentaRollup
+from app.rollup import reconstruir_rollup
+
+ESCRITORES = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+LECTORES = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+DURACION = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+PEDIDOS = int(sys.argv[4]) if len(sys.argv) > 4 else 20000
+ABIERTOS = 200  # pedidos recientes que los escritores cambian de estado
+
+MODOS = [
+    ('journal por defecto', {'SQLITE_PERFIL': False}),
+    ('perfil (WAL)', {'SQLITE_PERFIL': True}),
+]
+
+
+def escritor(db_path, config, fin, resultados):
+    """Cambiar de estado un pedido reciente al azar, uno por transacción, hasta `fin`"""
+    from app.pedidos.servicios import ESTADOS_PEDIDO, cambiar_estados
+    app = cargar_app(db_path, **config)
+    latencias, bloqueos = [], 0
+    with app.app_context():
+        admin = Usuario(id=0, rol='admin')
+        maximo = db.session.query(db.func.max(Pedido.id)).scalar()
+        db.session.remove()
+        while time.time() < fin:
+            inicio = time.perf_counter()
+            try:
+                pedido = random.randint(maximo - ABIERTOS + 1, maximo)
+                cambiar_estados({pedido: random.choice(ESTADOS_PEDIDO)}, admin)
+                db.session.commit()
+                latencias.append((time.perf_counter() - inicio) * 1000)
+            except OperationalError as e:
+                db.session.rollback()
+                if 'locked' not in str(e):
+                    raise
+                bloqueos += 1
+            db.session.remove()
+    resultados.put(('escritura', latencias, bloqueos))
+
+
+def lector(db_path, config, fin, resultados):
+    """Listado de pedidos y pedido actual de las mesas hasta `fin`"""
+    from app.mesas.servicios import pedidos_actuales
+    app = cargar_app(db_path, **config)
+    latencias, bloqueos = [], 0
+    with app.app_context():
+        mesas = [id for id, in db.session.query(Mesa.id)]
+        db.session.remove()
+        while time.time() < fin:
+            inicio = time.perf_counter()
+            try:
+                Pedido.query.order_by(Pedido.fecha.desc(), Pedido.id.desc()).limit(20).all()
+                pedidos_actuales(mesas)
+                latencias.append((time.perf_counter() - inicio) * 1000)
+            except OperationalError as e:
+                if 'locked' not in str(e):
+                    raise
+                bloqueos += 1
+            db.session.remove()
+    resultados.put(('lectura', latencias, bloqueos))
+
+
+def filas_rollup():
+    """{clave: (pedidos, ventas, lineas, cantidad)} de ventas_rollup (requiere app_context)"""
+    return {tuple(fila[:6]): (fila[6], round(fila[7], 2), fila[8], fila[9]) for fila in db.session.query(
+        VentaRollup.dia, VentaRollup.hora, VentaRollup.mesa_id, VentaRollup.usuario_id, VentaRollup.estado,
+        VentaRollup.producto_id, VentaRollup.pedidos, VentaRollup.ventas, VentaRollup.lineas, VentaRollup.cantidad)}
+
+
+def claves_desfasadas(db_path, config):
+    """Claves de ventas_rollup que no coinciden con su reconstrucción desde los pedidos"""
+    app = cargar_app(db_path, **config)
+    with app.app_context():
+        duplicadas = db.session.query(func.count()).select_from(VentaRollup).group_by(
+            VentaRollup.dia, VentaRollup.hora, VentaRollup.mesa_id, VentaRollup.usuario_id,
+            VentaRollup.estado, VentaRollup.producto_id).having(func.count() > 1).count()
+        actuales = filas_rollup()
+        reconstruir_rollup()
+        esperadas = filas_rollup()
+        db.session.rollback()
+        db.engine.dispose()
+    return duplicadas + sum(actuales.get(clave) != valores for clave, valores in esperadas.items()) \
+        + len(set(actuales) - set(esperadas))
+
+
+def medir(plantilla, config):
+    """({tipo: (operaciones/s, p95 en ms, bloqueos)}, claves desfasadas del rollup) con los procesos en paralelo"""
+    directorio = tempfile.mkdtemp()
+    db_path = os.path.join(directorio, 'bench.db')
+    shutil.copy(plantilla, db_path)
+
+    contexto = multiprocessing.get_context('spawn')
+    resultados = contexto.Queue()
+    fin = time.time() + 2 + DURACION  # margen para que todos arranquen
+    procesos = [contexto.Process(target=escritor, args=(db_path, config, fin, resultados))
+                for _ in range(ESCRITORES)]
+    procesos += [contexto.Process(target=lector, args=(db_path, config, fin, resultados))
+                 for _ in range(LECTORES)]
+    for proceso in procesos:
+        proceso.start()
+    por_tipo = {}
+    for _ in procesos:
+        tipo, latencias, bloqueos = resultados.get()
+        total = por_tipo.setdefault(tipo, [[], 0])
+        total[0] += latencias
+        total[1] += bloqueos
+    for proceso in procesos:
+        proceso.join()
+    desfasadas = claves_desfasadas(db_path, config)
+    shutil.rmtree(directorio)
+
+    resumen = {}
+    for tipo, (latencias, bloqueos) in por_tipo.items():
+        p95 = statistics.quantiles(latencias, n=20)[-1] if len(latencias) > 1 else 0
+        resumen[tipo] = (len(latencias) / DURACION, p95, bloqueos)
+    return resumen, desfasadas
+
+
+def main():
+    # Base poblada una vez, en modo rollback journal, y copiada para cada modo
+    plantilla = os.path.join(tempfile.mkdtemp(), 'plantilla.db')
+    app = cargar_app(plantilla, SQLITE_PERFIL=False)
+    with app.app_context():
+        poblar(PEDIDOS)
+        # Historial cerrado salvo los pedidos más recientes, que son los que cambian
+        db.session.execute(update(Pedido).where(Pedido.id <= PEDIDOS - ABIERTOS).values(estado='entregado'))
+        reconstruir_rollup()
+        db.session.commit()
+        db.engine.dispose()
+
+    print(f'{ESCRITORES} escritores y {LECTORES} lectores, {DURACION:.0f} s, {PEDIDOS} pedidos\n')
+    print(f"{'modo':<22} {'escrituras/s':>13} {'p95 (ms)':>9} {'lecturas/s':>11} {'p95 (ms)':>9} "
+          f"{'bloqueos':>9} {'rollup':>7}")
+    bloqueos_perfil, desfases = 0, 0
+    for nombre, config in MODOS:
+        resumen, desfasadas = medir(plantilla, config)
+        desfases += desfasadas
+        escrituras, lecturas = resumen.get('escritura', (0, 0, 0)), resumen.get('lectura', (0, 0, 0))
+        bloqueos = escrituras[2] + lecturas[2]
+        print(f'{nombre:<22} {escrituras[0]:>13.1f} {escrituras[1]:>9.1f} '
+              f'{lecturas[0]:>11.1f} {lecturas[1]:>9.1f} {bloqueos:>9} {desfasadas or "ok":>7}')
+        if config['SQLITE_PERFIL']:
+            bloqueos_perfil = bloqueos
+
+    if bloqueos_perfil:
+        print('\nHubo errores "database is locked" con el perfil SQLite')
+    if desfases:
+        print(f'\n{desfases} claves de ventas_rollup no coinciden con los pedidos')
+    if bloqueos_perfil or desfases:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# Consultas SQL por ruta, con CARGA_ESTRICTA activo: cada vista debe
+# cargar sus relaciones con las opciones de app/models/cargas.py. Si una
+# plantilla toca una relación no declarada (la petición falla) o una ruta
+# supera su presupuesto de consultas, el script termina con código 1.
+#
+# Uso: python benchmarks/bench_consultas_rutas.py [pedidos]
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import cargar_app, db, poblar, Pedido, Usuario
+from sqlalchemy import event, update
+
+from app.solo_lectura import motor_lectura
+
+PEDIDOS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+# (usuario, contraseña, ruta, consultas máximas). El presupuesto incluye
+# la carga del usuario de la sesión y no depende del número de filas.
+RUTAS = [
+    ('admin', 'admin123', '/', 3),
+    ('admin', 'admin123', '/pedidos/', 3),
+    ('admin', 'admin123', '/pedidos/?estado=pendiente', 3),
+    ('admin', 'admin123', '/pedidos/{pedido}', 3),
+    ('admin', 'admin123', '/reportes?fecha_inicio=2025-01-01&fecha_fin=2025-12-31', 10),
+    ('mesero1', 'mesero123', '/', 3),
+    ('mesero1', 'mesero123', '/pedidos/', 3),
+    ('cocinero1', 'cocinero123', '/dashboard/cocinero', 7),
+    ('cocinero1', 'cocinero123', '/pedidos/', 3),
+]
+
+
+def main():
+    app = cargar_app(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    app.config.update(TESTING=True, CARGA_ESTRICTA=True)
+    with app.app_context():
+        poblar(PEDIDOS)
+        # Pedidos en preparación del cocinero para llenar "Mis Pedidos"
+        cocinero = Usuario.query.filter_by(username='cocinero1').one()
+        preparando = [id for id, in db.session.query(Pedido.id).filter_by(estado='preparando').limit(10)]
+        db.session.execute(update(Pedido).where(Pedido.id.in_(preparando)).values(cocinero_id=cocinero.id))
+        db.session.commit()
+        pedido = db.session.query(Pedido.id).order_by(Pedido.id.desc()).limit(1).scalar()
+        # Los reportes consultan por el motor de lectura: se cuentan los dos
+        motores = [motor for motor in (db.engine, motor_lectura()) if motor is not None]
+
+    # Las peticiones se hacen fuera del app_context de la carga para que
+    # cada una tenga su propia sesión, sin objetos ya cargados
+    consultas = []
+    for motor in motores:
+        event.listen(motor, 'before_cursor_execute', lambda *args: consultas.append(args[2]))
+
+    clientes, fallos = {}, []
+    print(f"{'usuario':<10} {'ruta':<60} {'consultas':>9} {'máximo':>7}")
+    for usuario, clave, ruta, maximo in RUTAS:
+        if usuario not in clientes:
+            clientes[usuario] = app.test_client()
+            clientes[usuario].post('/login', data={'username': usuario, 'password': clave})
+        ruta = ruta.format(pedido=pedido)
+        consultas.clear()
+        try:
+            estado = clientes[usuario].get(ruta).status_code
+        except Exception as e:
+            # Con TESTING las excepciones de la vista llegan hasta aquí
+            fallos.append(f'{usuario} {ruta}: {type(e).__name__}: {e}')
+            print(f"{usuario:<10} {ruta:<60} {'error':>9} {maximo:>7}")
+            continue
+        print(f"{usuario:<10} {ruta:<60} {len(consultas):>9} {maximo:>7}")
+        if estado != 200:
+            fallos.append(f'{usuario} {ruta}: respuesta {estado}')
+        elif len(consultas) > maximo:
+            fallos.append(f'{usuario} {ruta}: {len(consultas)} consultas (máximo {maximo})\n  '
+                          + '\n  '.join(consultas))
+
+    if fallos:
+        print('\n' + '\n'.join(fallos))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# Consultas de las tarjetas de resumen (COUNT) en las páginas de entrada,
+# con el cache de estadísticas vacío y ya cargado, y tras confirmar un
+# cambio de estado de un pedido. Si alguna página hace más de una consulta
+# de contadores con el cache vacío, alguna con el cache cargado, o muestra
+# contadores viejos después del cambio, el script termina con código 1.
+#
+# Uso: python benchmarks/bench_estadisticas.py [pedidos]
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import cargar_app, db, poblar, Pedido
+from sqlalchemy import event
+
+from app.estadisticas import cache_estadisticas, resumen_general
+
+PEDIDOS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+# (usuario, contraseña, ruta)
+PAGINAS = [
+    ('admin', 'admin123', '/'),
+    ('admin', 'admin123', '/mesas'),
+    ('admin', 'admin123', '/empleados'),
+    ('cocinero1', 'cocinero123', '/dashboard/cocinero'),
+]
+
+
+def pedir(cliente, contadores, ruta):
+    """(ms, consultas de contadores) de GET `ruta`"""
+    contadores.clear()
+    inicio = time.perf_counter()
+    respuesta = cliente.get(ruta)
+    tiempo = (time.perf_counter() - inicio) * 1000
+    if respuesta.status_code != 200:
+        print(f'GET {ruta}: {respuesta.status_code}')
+        sys.exit(1)
+    return tiempo, len(contadores)
+
+
+def main():
+    app = cargar_app(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    with app.app_context():
+        poblar(PEDIDOS)
+        motor = db.engine
+
+    contadores = []
+    event.listen(motor, 'before_cursor_execute',
+                 lambda *args: contadores.append(args[2]) if 'count(' in args[2].lower() else None)
+
+    clientes = {}
+    for usuario, clave, _ in PAGINAS:
+        if usuario not in clientes:
+            clientes[usuario] = app.test_client()
+            clientes[usuario].post('/login', data={'username': usuario, 'password': clave})
+
+    fallos = []
+    print(f"{'ruta':<22} {'vacío (ms)':>11} {'COUNT':>6} {'cargado (ms)':>13} {'COUNT':>6}")
+    for usuario, _, ruta in PAGINAS:
+        # Una petición previa compila las plantillas, que no se cuentan
+        pedir(clientes[usuario], contadores, ruta)
+        cache_estadisticas.limpiar()
+        t_frio, n_frio = pedir(clientes[usuario], contadores, ruta)
+        t_cargado, n_cargado = pedir(clientes[usuario], contadores, ruta)
+        print(f'{ruta:<22} {t_frio:>11.2f} {n_frio:>6} {t_cargado:>13.2f} {n_cargado:>6}')
+        if n_frio > 1 or n_cargado > 0:
+            fallos.append(ruta)
+
+    # Un cambio confirmado invalida los contadores del propio proceso
+    with app.app_context():
+        antes = resumen_general()['pedidos_por_estado']
+        pedido = Pedido.query.filter_by(estado='pendiente').first()
+        pedido.estado = 'preparando'
+        db.session.commit()
+        despues = resumen_general()['pedidos_por_estado']
+    if despues.get('pendiente', 0) != antes.get('pendiente', 0) - 1:
+        fallos.append('contadores sin invalidar tras un cambio de estado')
+
+    if fallos:
+        print('\nFallos: ' + ', '.join(fallos))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# Pantallas de cocina conectadas al flujo de eventos (/dashboard/cocinero/eventos):
+# latencia desde que un mesero envía un pedido hasta que llega a cada
+# pantalla, y consultas a la base de datos con las pantallas abiertas,
+# frente a la recarga completa cada 30 s que hacía antes el dashboard.
+# Además crea pedidos desde otro proceso (como otro worker de gunicorn),
+# que llegan con la siguiente vuelta del vigilante de cocina. Si alguna
+# pantalla no recibe un pedido, tarda más de un segundo en recibir uno del
+# mismo proceso o más de INTERVALO + 1 s en recibir uno de otro proceso,
+# el script termina con código 1.
+#
+# Uso: python benchmarks/bench_eventos_cocina.py [1 10 50]
+
+import http.cookiejar
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import cargar_app, db, poblar, puerto_libre, Producto
+from sqlalchemy import event
+from werkzeug.serving import make_server
+
+PANTALLAS = [int(n) for n in sys.argv[1:]] or [1, 10, 50]
+PEDIDOS = 20
+REPOSO = 5  # segundos sin actividad en los que se cuentan consultas
+RECARGA = 30  # intervalo de la recarga completa que sustituye el flujo
+INTERVALO = 1  # COCINA_INTERVALO: vueltas del vigilante de cocina
+
+# Crea pedidos en la misma base desde otro proceso: argumentos ruta, producto, cantidad y prefijo
+OTRO_PROCESO = '''
+import json, sys, time
+from comun import cargar_app, db, Pedido
+from app.pedidos.servicios import cache_precios, construir_detalles, guardar_pedido
+app = cargar_app(sys.argv[1])
+enviados = {}
+with app.app_context():
+    precios = {id: precio for id, (precio, disponible) in cache_precios.obtener().items()}
+    for n in range(int(sys.argv[3])):
+        nombre = f'{sys.argv[4]} {n}'
+        detalles, total = construir_detalles([(int(sys.argv[2]), 1, None)], precios)
+        enviados[nombre] = time.time()
+        guardar_pedido(Pedido(cliente_nombre=nombre, total=total, estado='pendiente'), detalles)
+        db.session.commit()
+        time.sleep(0.05)
+print(json.dumps(enviados))
+'''
+
+
+def sesion(url, usuario, clave):
+    """Cookies de una sesión iniciada (se comparten entre pantallas)"""
+    cookies = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookies))
+    datos = urllib.parse.urlencode({'username': usuario, 'password': clave}).encode()
+    opener.open(url + '/login', datos, timeout=30).read()
+    return cookies
+
+
+def pantalla(url, cookies, recibidos, conectada):
+    """Leer el flujo de eventos y anotar la hora de llegada de cada pedido"""
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookies))
+    flujo = opener.open(url + '/dashboard/cocinero/eventos', timeout=60)
+    conectada.set()
+    tipo = None
+    for linea in flujo:
+        linea = linea.decode().rstrip('\n')
+        if linea.startswith('event: '):
+            tipo = linea[7:]
+        elif linea.startswith('data: ') and tipo == 'pedido':
+            recibidos.setdefault(json.loads(linea[6:])['cliente_nombre'], time.time())
+
+
+def latencias(recibidos, enviados):
+    """Latencias en ms de los pedidos recibidos por cada pantalla y cuántos no llegaron"""
+    medidas = [(vistos[nombre] - inicio) * 1000
+               for vistos in recibidos for nombre, inicio in enviados.items() if nombre in vistos]
+    return medidas, len(recibidos) * len(enviados) - len(medidas)
+
+
+def main():
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = cargar_app(db_path, COCINA_HEARTBEAT=1, COCINA_INTERVALO=INTERVALO, COCINA_MAX_FLUJOS=1000)
+    with app.app_context():
+        poblar(20000)
+        producto = Producto.query.first().id
+        motor = db.engine
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    servidor = make_server('127.0.0.1', puerto_libre(), app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{servidor.server_port}'
+    cocina = sesion(url, 'cocinero1', 'cocinero123')
+    mesero = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(sesion(url, 'mesero1', 'mesero123')))
+
+    consultas = [0]
+    event.listen(motor, 'before_cursor_execute', lambda *args: consultas.__setitem__(0, consultas[0] + 1))
+
+    # Consultas de una carga completa del dashboard, lo que costaba cada recarga
+    consultas[0] = 0
+    urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cocina)).open(
+        url + '/dashboard/cocinero').read()
+    por_recarga = consultas[0]
+
+    print(f"{'pantallas':>9} {'mediana (ms)':>13} {'máxima (ms)':>12} {'otro proceso (ms)':>18} "
+          f"{'consultas/pedido':>17} {f'consultas en {REPOSO}s':>16} {'con recarga':>12}")
+    fallos = []
+    for total in PANTALLAS:
+        recibidos = [{} for _ in range(total)]
+        for i in range(total):
+            conectada = threading.Event()
+            threading.Thread(target=pantalla, args=(url, cocina, recibidos[i], conectada), daemon=True).start()
+            conectada.wait(10)
+
+        consultas[0] = 0
+        time.sleep(REPOSO)
+        en_reposo = consultas[0]
+
+        enviados, consultas[0] = {}, 0
+        for n in range(PEDIDOS):
+            nombre = f'Pantallas {total} pedido {n}'
+            datos = urllib.parse.urlencode({'cliente_nombre': nombre, 'mesa': '', 'producto_id': producto,
+                                            'cantidad': 1, 'observaciones_detalle': ''}).encode()
+            enviados[nombre] = time.time()
+            mesero.open(url + '/pedidos/nuevo', datos, timeout=30).read()
+        por_pedido = consultas[0] / PEDIDOS  # incluye la redirección a la página del pedido
+        time.sleep(1)
+        propias, perdidos = latencias(recibidos, enviados)
+
+        # Pedidos confirmados por otro proceso: no despiertan al vigilante de este
+        salida = subprocess.run([sys.executable, '-c', OTRO_PROCESO, db_path, str(producto), str(PEDIDOS),
+                                 f'Otro proceso {total}'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout
+        time.sleep(INTERVALO + 1)
+        ajenas, perdidos_ajenos = latencias(recibidos, json.loads(salida))
+
+        print(f"{total:>9} {statistics.median(propias):>13.1f} {max(propias):>12.1f} {max(ajenas):>18.1f} "
+              f"{por_pedido:>17.1f} {en_reposo:>16} {total * por_recarga * REPOSO / RECARGA:>12.0f}")
+        if perdidos or perdidos_ajenos or max(propias) > 1000 or max(ajenas) > (INTERVALO + 1) * 1000:
+            fallos.append(f'{total} pantallas: {perdidos + perdidos_ajenos} pedidos sin recibir, latencia máxima '
+                          f'{max(propias):.0f} ms en el proceso y {max(ajenas):.0f} ms desde otro proceso')
+
+    servidor.shutdown()
+    if fallos:
+        print('\n' + '\n'.join(fallos))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# Memoria pico y tiempo de la exportación Excel completa (modo write-only)
+# frente al número de pedidos exportados.
+#
+# Uso: python benchmarks/bench_exportar_excel.py [10000 100000 500000]
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import cargar_app, db, poblar
+from app.reportes.exportacion import escribir_reporte_excel
+
+TAMANOS = [int(n) for n in sys.argv[1:]] or [10000, 100000]
+
+
+def main():
+    directorio = tempfile.mkdtemp()
+    app = cargar_app(os.path.join(directorio, 'bench.db'))
+    
+    print(f"{'pedidos':>10} {'tiempo (s)':>11} {'pico Python (MB)':>17} {'archivo (MB)':>13}")
+    with app.app_context():
+        cargados = 0
+        for tamano in TAMANOS:
+            poblar(tamano - cargados, semilla=tamano)
+            cargados = tamano
+            db.session.expunge_all()
+            
+            periodo = (date(2025, 1, 1), date(2025, 12, 31))
+            
+            # Tiempo sin instrumentar; la memoria se mide aparte porque
+            # tracemalloc multiplica el tiempo de ejecución
+            with tempfile.TemporaryFile() as destino:
+                inicio = time.perf_counter()
+                escribir_reporte_excel(destino, *periodo, completo=True)
+                duracion = time.perf_counter() - inicio
+                tamano_archivo = destino.tell()
+            
+            with tempfile.TemporaryFile() as destino:
+                tracemalloc.start()
+                escribir_reporte_excel(destino, *periodo, completo=True)
+                _, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            
+            print(f"{tamano:>10} {duracion:>11.1f} {pico / 2**20:>17.1f} {tamano_archivo / 2**20:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# Páginas por segundo y RSS pico del PDF completo (tablas por página
+# generadas durante la maquetación) frente a construir toda la historia
+# en memoria antes de llamar a build().
+#
+# Uso: python benchmarks/bench_exportar_pdf.py [10000 50000 100000]
+
+import multiprocessing
+import os
+import re
+import resource
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import cargar_app, db, poblar
+from app.reportes import exportacion
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate
+
+TAMANOS = [int(n) for n in sys.argv[1:]] or [10000, 50000]
+PERIODO = (date(2025, 1, 1), date(2025, 12, 31))
+
+# Aplicación de Flask; los procesos hijos la heredan por fork
+app = None
+
+
+def exportar(incremental):
+    """Ejecutar una exportación y devolver (segundos, páginas, RSS inicial y pico en MB)"""
+    with open('/proc/self/statm') as statm:
+        inicial = int(statm.read().split()[1]) * resource.getpagesize() / 2**20
+    # Solo se mide la tabla de pedidos; los gráficos se omiten en ambos modos
+    exportacion.MATPLOTLIB_AVAILABLE = False
+    with app.app_context(), tempfile.TemporaryFile() as destino:
+        db.engine.dispose(close=False)
+        inicio = time.perf_counter()
+        if incremental:
+            exportacion.escribir_reporte_pdf(destino, *PERIODO, completo=True)
+        else:
+            # Referencia: todas las tablas creadas antes de maquetar
+            filas = exportacion._filas_pedidos_reporte(*PERIODO, completo=True)
+            historia = list(exportacion._tablas_pedidos_pdf(filas))
+            SimpleDocTemplate(destino, pagesize=A4, pageCompression=1).build(historia)
+        duracion = time.perf_counter() - inicio
+        destino.seek(0)
+        paginas = len(re.findall(rb'/Type /Page\b', destino.read()))
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return duracion, paginas, inicial, pico
+
+
+def main():
+    global app
+    directorio = tempfile.mkdtemp()
+    app = cargar_app(os.path.join(directorio, 'bench.db'))
+    contexto = multiprocessing.get_context('fork')
+
+    print(f"{'pedidos':>10} {'modo':>12} {'páginas':>8} {'pág/s':>8} {'RSS inicial (MB)':>17} {'RSS pico (MB)':>14}")
+    cargados = 0
+    for tamano in TAMANOS:
+        with app.app_context():
+            poblar(tamano - cargados, semilla=tamano)
+            db.session.remove()
+        cargados = tamano
+
+        # Cada medición en un proceso nuevo para que el RSS pico no se acumule
+        for incremental, modo in ((True, 'incremental'), (False, 'en memoria')):
+            with contexto.Pool(1) as pool:
+                duracion, paginas, inicial, pico = pool.apply(exportar, (incremental,))
+            print(f"{tamano:>10} {modo:>12} {paginas:>8} {paginas / duracion:>8.1f} {inicial:>17.1f} {pico:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
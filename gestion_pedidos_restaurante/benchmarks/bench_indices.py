@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# Índices de las consultas frecuentes y migración de una base existente.
+# Parte de una base con el esquema anterior a la migración 4 (sin los
+# índices de listados) y el historial cerrado salvo los últimos pedidos,
+# mide las consultas, aplica las migraciones
+# pendientes y vuelve a medir. Cada consulta se ejecuta con el código de la
+# aplicación y su plan se comprueba con EXPLAIN QUERY PLAN. Si la migración
+# no deja el esquema en la última versión con todos los índices declarados,
+# o alguna consulta no usa el índice esperado, termina con código 1.
+#
+# Uso: python benchmarks/bench_indices.py [pedidos]
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import cargar_app, cronometrar, db, poblar, DetallePedido, Mesa, Pedido, Producto, Usuario
+from sqlalchemy import event, func, text, update
+
+from app.estadisticas import _consultar_resumen_general
+from app.mesas.servicios import pedidos_actuales
+from app.migraciones import MIGRACIONES, aplicar_migraciones, version_esquema
+from app.models import Contador
+from app.pedidos.servicios import pedidos_visibles, tickets_cocina
+
+PEDIDOS = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+# Índices que añade la migración 4; se quitan para simular una base anterior
+INDICES_NUEVOS = ['ix_pedidos_estado_fecha', 'ix_pedidos_usuario_fecha', 'ix_pedidos_cocinero_estado_fecha',
+                  'ix_detalles_pedido_pedido', 'ix_detalles_pedido_producto',
+                  'ix_productos_disponible_categoria', 'ix_productos_categoria_nombre']
+
+
+def consultas(mesero_id, cocinero_id, pedido_ids, mesa_ids, producto_id):
+    """(nombre, función que ejecuta la consulta de la aplicación, índice que debe usar)"""
+    orden = (Pedido.fecha.desc(), Pedido.id.desc())
+    # Usuarios sin sesión: la medición vacía la sesión entre consultas
+    mesero, admin = Usuario(id=mesero_id, rol='mesero'), Usuario(rol='admin')
+    return [
+        ('listado de un mesero', lambda: pedidos_visibles(mesero).order_by(*orden).limit(20).all(),
+         'ix_pedidos_usuario_fecha'),
+        ('listado por estado', lambda: pedidos_visibles(admin, 'pendiente')
+         .order_by(*orden).limit(20).all(), 'ix_pedidos_estado_fecha'),
+        ('pendientes de cocina', lambda: Pedido.query.filter_by(estado='pendiente')
+         .order_by(Pedido.fecha.asc()).limit(10).all(), 'ix_pedidos_estado_fecha'),
+        ('en preparación del cocinero', lambda: Pedido.query.filter_by(estado='preparando', cocinero_id=cocinero_id)
+         .order_by(Pedido.fecha.asc()).all(), 'ix_pedidos_cocinero_estado_fecha'),
+        ('contadores por estado', lambda: _consultar_resumen_general(date.today()), 'ix_pedidos_estado_fecha'),
+        ('tickets de cocina (líneas)', lambda: tickets_cocina(pedido_ids), 'ix_detalles_pedido_pedido'),
+        ('producto con pedidos', lambda: db.session.query(
+            DetallePedido.query.filter_by(producto_id=producto_id).exists()).scalar(),
+         'ix_detalles_pedido_producto'),
+        ('pedido actual por mesa', lambda: pedidos_actuales(mesa_ids), 'ix_pedidos_activos_mesa'),
+        ('carta disponible', lambda: Producto.query.filter_by(disponible=True)
+         .order_by(Producto.categoria, Producto.nombre).all(), 'ix_productos_disponible_categoria'),
+    ]
+
+
+def planes(funcion, capturadas):
+    """Planes (EXPLAIN QUERY PLAN) de las sentencias que ejecuta `funcion`"""
+    capturadas.clear()
+    funcion()
+    sentencias = list(capturadas)
+    capturadas.clear()
+    conexion = db.session.connection()
+    return [' / '.join(fila[3] for fila in conexion.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, parametros))
+            for sql, parametros in sentencias]
+
+
+def medir(lista, capturadas):
+    """{nombre: (ms, planes)} de cada consulta, con un estado limpio de la sesión"""
+    resultados = {}
+    for nombre, funcion, _ in lista:
+        db.session.expunge_all()
+        resultados[nombre] = (cronometrar(funcion), planes(funcion, capturadas))
+    return resultados
+
+
+def main():
+    app = cargar_app(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    capturadas = []
+    with app.app_context():
+        poblar(PEDIDOS)
+        # Historial cerrado salvo los 200 pedidos más recientes, como tras meses de servicio
+        ultimo = db.session.query(func.max(Pedido.id)).scalar()
+        db.session.execute(update(Pedido).where(Pedido.id <= ultimo - 200).values(estado='entregado'))
+        cocinero_id = db.session.query(Usuario.id).filter_by(rol='cocinero').limit(1).scalar()
+        mesero_id = db.session.query(Usuario.id).filter_by(rol='mesero').limit(1).scalar()
+        preparando = [id for id, in db.session.query(Pedido.id).filter_by(estado='preparando').limit(20)]
+        db.session.execute(update(Pedido).where(Pedido.id.in_(preparando)).values(cocinero_id=cocinero_id))
+        pedido_ids = [id for id, in db.session.query(Pedido.id).filter_by(estado='pendiente').limit(10)]
+        mesa_ids = [id for id, in db.session.query(Mesa.id)]
+        producto_id = db.session.query(Producto.id).limit(1).scalar()
+
+        # Base "anterior": sin los índices nuevos y con el esquema en la versión 3
+        for nombre in INDICES_NUEVOS:
+            db.session.execute(text(f'DROP INDEX {nombre}'))
+        db.session.merge(Contador(nombre='esquema', valor=3))
+        db.session.commit()
+
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, sql, parametros, *args: capturadas.append((sql, parametros)))
+        lista = consultas(mesero_id, cocinero_id, pedido_ids, mesa_ids, producto_id)
+        antes = medir(lista, capturadas)
+
+        aplicadas = aplicar_migraciones()
+        db.session.remove()
+        despues = medir(lista, capturadas)
+
+        fallos = []
+        with db.engine.connect() as conexion:
+            version = version_esquema(conexion)
+            existentes = {nombre for nombre, in conexion.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        declarados = {indice.name for tabla in db.metadata.sorted_tables for indice in tabla.indexes}
+        print(f"Migraciones aplicadas: {[v for v, _ in aplicadas]}; esquema en la versión {version}")
+        if version != len(MIGRACIONES) or declarados - existentes:
+            fallos.append(f'esquema incompleto tras migrar: {sorted(declarados - existentes)}')
+
+        print(f"\n{'consulta':<30} {'antes (ms)':>11} {'después (ms)':>13}  índice esperado")
+        for nombre, _, indice in lista:
+            usa_indice = any(indice in plan for plan in despues[nombre][1])
+            print(f"{nombre:<30} {antes[nombre][0]:>11.2f} {despues[nombre][0]:>13.2f}  "
+                  f"{indice}{'' if usa_indice else '  <- NO SE USA'}")
+            if not usa_indice:
+                fallos.append(f'{nombre}: ' + ' | '.join(despues[nombre][1]))
+
+    if fallos:
+        print('\nFallos:\n  ' + '\n  '.join(fallos))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
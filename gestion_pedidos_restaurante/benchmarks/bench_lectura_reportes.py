@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# Latencia de la toma de pedidos mientras se generan reportes, con las
+# lecturas de los reportes en el motor principal (LECTURA_SEPARADA=0) o en
+# el motor de lectura (app/solo_lectura.py). Primero comprueba en el mismo
+# proceso que las rutas de reportes consultan por el motor de lectura y que
+# crear un pedido no lo usa; si no es así, termina con código 1. Después
+# lanza gunicorn con clientes que crean pedidos por la API y clientes que
+# piden /reportes (sin cache) y la exportación CSV del año.
+#
+# Sin réplica (DATABASE_REPLICA_URL) el motor de lectura es el mismo archivo
+# SQLite en mode=ro, que solo se usa pidiéndolo con LECTURA_SEPARADA=1: los
+# reportes usan su propio pool y no pueden escribir, pero comparten CPU y
+# disco con los pedidos.
+#
+# Uso: python benchmarks/bench_lectura_reportes.py [clientes_pedidos] [clientes_reportes] [segundos] [pedidos]
+
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import cargar_app, cliente_autenticado, db, poblar, servidor, Producto
+from sqlalchemy import event
+
+from app.solo_lectura import motor_lectura
+
+CLIENTES_PEDIDOS = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+CLIENTES_REPORTES = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+DURACION = float(sys.argv[3]) if len(sys.argv) > 3 else 15
+PEDIDOS = int(sys.argv[4]) if len(sys.argv) > 4 else 20000
+
+PERIODO = 'fecha_inicio=2025-01-01&fecha_fin=2025-12-31'
+REPORTES = ['/reportes?' + PERIODO, '/reportes/exportar/csv?' + PERIODO]
+
+# (nombre, clientes de reportes, variables de entorno)
+ESCENARIOS = [
+    ('sin reportes', 0, {}),
+    ('reportes en el principal', CLIENTES_REPORTES, {'LECTURA_SEPARADA': '0'}),
+    ('reportes en lectura', CLIENTES_REPORTES, {'LECTURA_SEPARADA': '1'}),
+]
+
+
+def comprobar_enrutamiento(app, productos):
+    """Rutas mal enrutadas: los reportes deben consultar por el motor de lectura y crear un pedido no"""
+    cuentas = {'principal': 0, 'lectura': 0}
+    with app.app_context():
+        lectura = motor_lectura()
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: cuentas.update(principal=cuentas['principal'] + 1))
+        event.listen(lectura, 'before_cursor_execute', lambda *args: cuentas.update(lectura=cuentas['lectura'] + 1))
+
+    cliente = app.test_client()
+    cliente.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    fallos = []
+    peticiones = [(ruta, True, lambda ruta=ruta: cliente.get(ruta)) for ruta in REPORTES + ['/api/estados']]
+    peticiones.append(('POST /api/v1/pedidos', False, lambda: cliente.post(
+        '/api/v1/pedidos', headers={'Idempotency-Key': uuid.uuid4().hex},
+        json={'cliente_nombre': 'Ruta', 'detalles': [{'producto_id': productos[0], 'cantidad': 1}]})))
+    for ruta, de_lectura, peticion in peticiones:
+        cuentas.update(principal=0, lectura=0)
+        respuesta = peticion()
+        respuesta.get_data()  # las exportaciones consultan mientras se envían
+        print(f"{ruta.split('?')[0]:<28} {respuesta.status_code:>4} {cuentas['principal']:>10} {cuentas['lectura']:>8}")
+        if respuesta.status_code >= 400 or (cuentas['lectura'] == 0) == de_lectura:
+            fallos.append(ruta)
+    return fallos
+
+
+def carga(url, productos, clientes_reportes):
+    """Latencias de los pedidos creados y cantidad de reportes servidos durante DURACION segundos"""
+    pedidos = [cliente_autenticado(url) for _ in range(CLIENTES_PEDIDOS)]
+    reportes = [cliente_autenticado(url) for _ in range(clientes_reportes)]
+    latencias, servidos, errores = [], [0], [0]
+    cerrojo = threading.Lock()
+    fin = time.monotonic() + DURACION
+
+    def crear_pedidos(opener):
+        propias, fallos = [], 0
+        while time.monotonic() < fin:
+            cuerpo = json.dumps({'cliente_nombre': 'Carga', 'detalles': [
+                {'producto_id': random.choice(productos), 'cantidad': random.randint(1, 3)}]}).encode()
+            peticion = urllib.request.Request(url + '/api/v1/pedidos', data=cuerpo, headers={
+                'Content-Type': 'application/json', 'Idempotency-Key': uuid.uuid4().hex})
+            inicio = time.perf_counter()
+            try:
+                opener.open(peticion, timeout=60).read()
+                propias.append(time.perf_counter() - inicio)
+            except (urllib.error.HTTPError, OSError):
+                fallos += 1
+        with cerrojo:
+            latencias.extend(propias)
+            errores[0] += fallos
+
+    def pedir_reportes(indice, opener):
+        cantidad, fallos = 0, 0
+        while time.monotonic() < fin:
+            try:
+                opener.open(url + REPORTES[(indice + cantidad) % len(REPORTES)], timeout=120).read()
+                cantidad += 1
+            except (urllib.error.HTTPError, OSError):
+                fallos += 1
+        with cerrojo:
+            servidos[0] += cantidad
+            errores[0] += fallos
+
+    hilos = [threading.Thread(target=crear_pedidos, args=(opener,)) for opener in pedidos]
+    hilos += [threading.Thread(target=pedir_reportes, args=(i, opener)) for i, opener in enumerate(reportes)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return latencias, servidos[0], errores[0]
+
+
+def main():
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = cargar_app(db_path, LECTURA_SEPARADA=True)
+    with app.app_context():
+        poblar(PEDIDOS)
+        productos = [id for id, in db.session.query(Producto.id).filter_by(disponible=True)]
+
+    print(f"{'ruta':<28} {'HTTP':>4} {'principal':>10} {'lectura':>8}")
+    fallos = comprobar_enrutamiento(app, productos)
+    with app.app_context():
+        db.engine.dispose()
+        motor_lectura().dispose()
+    if fallos:
+        print('\nRutas mal enrutadas: ' + ', '.join(fallos))
+        sys.exit(1)
+
+    if not shutil.which('gunicorn'):
+        print('\ngunicorn no está instalado: no se mide la latencia')
+        return
+
+    print(f"\n{CLIENTES_PEDIDOS} clientes de pedidos, {DURACION:.0f} s por escenario, {PEDIDOS} pedidos, "
+          f"{os.cpu_count()} CPU")
+    print(f"{'escenario':<26} {'pedidos/s':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'reportes':>9} {'errores':>8}")
+    for nombre, clientes_reportes, extra in ESCENARIOS:
+        entorno = dict(extra, DATABASE_URL='sqlite:///' + db_path, REPORTES_CACHE_TTL='0')
+        with servidor(['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], entorno) as url:
+            latencias, servidos, errores = carga(url, productos, clientes_reportes)
+        cuantiles = statistics.quantiles(latencias, n=20)
+        print(f"{nombre:<26} {len(latencias) / DURACION:>10.1f} {cuantiles[9] * 1000:>9.1f} "
+              f"{cuantiles[18] * 1000:>9.1f} {servidos:>9} {errores:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# Coste de mantener al día la vista de mesas: recarga completa de /mesas
+# (lo que hacía la página cada 30 s) frente a /api/mesas/cambios sin
+# cambios y tras cambiar una mesa. Con todas las mesas ocupadas.
+# Si la consulta sin cambios devuelve alguna mesa, o la de después de un
+# cambio no devuelve exactamente la mesa cambiada, termina con código 1.
+#
+# Uso: python benchmarks/bench_mesas_cambios.py [pedidos]
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import cargar_app, db, poblar, Mesa
+from sqlalchemy import event, update
+
+PEDIDOS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+REPETICIONES = 20
+
+
+def medir(cliente, consultas, ruta):
+    """(mediana en ms, consultas, respuesta) de GET `ruta`"""
+    tiempos = []
+    for _ in range(REPETICIONES):
+        consultas.clear()
+        inicio = time.perf_counter()
+        respuesta = cliente.get(ruta)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2], len(consultas), respuesta
+
+
+def main():
+    app = cargar_app(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    with app.app_context():
+        poblar(PEDIDOS)
+        db.session.execute(update(Mesa).values(estado='ocupada'))
+        db.session.commit()
+        mesa = Mesa.query.first().id
+        motor = db.engine
+
+    consultas = []
+    event.listen(motor, 'before_cursor_execute', lambda *args: consultas.append(args[2]))
+    cliente = app.test_client()
+    cliente.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    version = cliente.get('/api/mesas/cambios').get_json()['version']
+
+    print(f"{'petición':<32} {'tiempo (ms)':>12} {'consultas':>10} {'mesas':>6}")
+    t, n, _ = medir(cliente, consultas, '/mesas')
+    print(f"{'GET /mesas (recarga completa)':<32} {t:>12.2f} {n:>10} {'todas':>6}")
+    t, n, sin_cambios = medir(cliente, consultas, f'/api/mesas/cambios?since={version}&vista=grid')
+    print(f"{'cambios, sin cambios':<32} {t:>12.2f} {n:>10} {len(sin_cambios.get_json()['mesas']):>6}")
+
+    cliente.post(f'/mesas/{mesa}/estado', json={'estado': 'reservada'})
+    t, n, con_cambio = medir(cliente, consultas, f'/api/mesas/cambios?since={version}&vista=grid')
+    cambiadas = [m['id'] for m in con_cambio.get_json()['mesas']]
+    print(f"{'cambios, una mesa cambiada':<32} {t:>12.2f} {n:>10} {len(cambiadas):>6}")
+
+    if sin_cambios.get_json()['mesas'] or cambiadas != [mesa]:
+        print('\nLa respuesta de /api/mesas/cambios no coincide con los cambios hechos')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
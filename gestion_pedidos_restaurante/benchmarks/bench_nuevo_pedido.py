@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# Consultas SQL y tiempo de POST /pedidos/nuevo frente al número de líneas
+# del pedido. El número de consultas debe ser el mismo para cualquier
+# cantidad de líneas; si no lo es, el script termina con código 1.
+#
+# Uso: python benchmarks/bench_nuevo_pedido.py [1 10 50 200]
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import cargar_app, db, poblar, Producto
+from sqlalchemy import event
+
+LINEAS = [int(n) for n in sys.argv[1:]] or [1, 10, 50, 200]
+REPETICIONES = 5
+
+
+def formulario(productos, lineas):
+    """Datos del formulario de un pedido sin mesa con `lineas` productos"""
+    return {
+        'cliente_nombre': 'Grupo',
+        'mesa': '',
+        'producto_id': [str(productos[i % len(productos)]) for i in range(lineas)],
+        'cantidad': ['2'] * lineas,
+        'observaciones_detalle': [''] * lineas,
+    }
+
+
+def main():
+    directorio = tempfile.mkdtemp()
+    app = cargar_app(os.path.join(directorio, 'bench.db'))
+    app.config['TESTING'] = True
+    with app.app_context():
+        poblar(1000)
+        productos = [p.id for p in Producto.query.all()]
+        motor = db.engine
+
+    consultas = []
+    event.listen(motor, 'before_cursor_execute', lambda *args: consultas.append(args[2]))
+
+    cliente = app.test_client()
+    cliente.post('/login', data={'username': 'admin', 'password': 'admin123'})
+
+    print(f"{'líneas':>7} {'consultas':>10} {'tiempo (ms)':>12}")
+    conteos = set()
+    for lineas in LINEAS:
+        datos = formulario(productos, lineas)
+        tiempos = []
+        for _ in range(REPETICIONES):
+            consultas.clear()
+            inicio = time.perf_counter()
+            respuesta = cliente.post('/pedidos/nuevo', data=datos)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            if respuesta.status_code != 302:
+                sys.exit(f'POST /pedidos/nuevo devolvió {respuesta.status_code}')
+        tiempos.sort()
+        conteos.add(len(consultas))
+        print(f"{lineas:>7} {len(consultas):>10} {tiempos[len(tiempos) // 2]:>12.1f}")
+
+    if len(conteos) > 1:
+        print('\nEl número de consultas depende de las líneas del pedido:')
+        print('\n'.join(consultas))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# Tiempo por página de la lista de pedidos: paginate() (COUNT + OFFSET)
+# frente a la paginación por cursor (fecha, id), a distintas profundidades.
+# También recorre todas las páginas por cursor, hacia delante y hacia
+# atrás, y comprueba que no se repite ni se salta ningún pedido.
+#
+# Uso: python benchmarks/bench_paginacion.py [pedidos]
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import cargar_app, cronometrar, poblar, Pedido
+from app.paginacion import paginar_por_fecha
+
+PEDIDOS = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+POR_PAGINA = 10
+PAGINAS = [1, 10, 100, 1000, PEDIDOS // POR_PAGINA]
+
+
+def recorrer(query, por_pagina):
+    """ids de todas las páginas hacia delante y luego de vuelta hacia atrás"""
+    adelante, pagina = [], paginar_por_fecha(query, Pedido, por_pagina=por_pagina)
+    paginas = [pagina]
+    while True:
+        adelante.extend(p.id for p in pagina.items)
+        if not pagina.has_next:
+            break
+        pagina = paginar_por_fecha(query, Pedido, despues=pagina.siguiente, por_pagina=por_pagina)
+        paginas.append(pagina)
+
+    atras = list(reversed([p.id for p in pagina.items]))
+    while pagina.has_prev:
+        pagina = paginar_por_fecha(query, Pedido, antes=pagina.anterior, por_pagina=por_pagina)
+        atras.extend(reversed([p.id for p in pagina.items]))
+    return adelante, list(reversed(atras))
+
+
+def main():
+    app = cargar_app(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    with app.app_context():
+        poblar(PEDIDOS)
+        query = Pedido.query
+
+        # Cursor de cada profundidad, obtenido avanzando página a página
+        cursores, pagina = {1: None}, paginar_por_fecha(query, Pedido, por_pagina=POR_PAGINA)
+        for numero in range(2, max(PAGINAS) + 1):
+            if not pagina.has_next:
+                break
+            if numero in PAGINAS:
+                cursores[numero] = pagina.siguiente
+            pagina = paginar_por_fecha(query, Pedido, despues=pagina.siguiente, por_pagina=POR_PAGINA)
+
+        print(f"{'página':>8} {'paginate (ms)':>14} {'cursor (ms)':>12}")
+        for numero, cursor in cursores.items():
+            t_offset = cronometrar(lambda: query.order_by(Pedido.fecha.desc()).paginate(
+                page=numero, per_page=POR_PAGINA, error_out=False).items)
+            t_cursor = cronometrar(lambda: paginar_por_fecha(query, Pedido, despues=cursor,
+                                                             por_pagina=POR_PAGINA).items)
+            print(f"{numero:>8} {t_offset:>14.2f} {t_cursor:>12.2f}")
+
+        # Recorrido completo con una página grande para que sea rápido
+        esperado = [p.id for p in query.order_by(Pedido.fecha.desc(), Pedido.id.desc())]
+        adelante, atras = recorrer(query, 1000)
+        correcto = adelante == esperado and atras == esperado
+        print(f"\nRecorrido por cursor ({len(esperado)} pedidos): {'correcto' if correcto else 'INCORRECTO'}")
+        if not correcto:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
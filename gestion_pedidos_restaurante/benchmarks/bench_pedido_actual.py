@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# Pedido actual de cada mesa frente al tamaño del historial: recorrer
+# mesa.pedidos (lo que hacía /mesas) frente a pedidos_actuales(), una
+# consulta con ventana sobre el índice parcial de pedidos abiertos.
+# El historial está cerrado (entregado) salvo un pedido abierto por mesa,
+# como en un restaurante tras meses de servicio. Si pedidos_actuales() no
+# devuelve el pedido abierto más reciente de cada mesa, termina con código 1.
+#
+# Uso: python benchmarks/bench_pedido_actual.py [1000 10000 100000]
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import cargar_app, cronometrar, db, poblar, Mesa, Pedido
+from sqlalchemy import func, update
+from app.mesas.servicios import pedidos_actuales
+
+HISTORIALES = [int(n) for n in sys.argv[1:]] or [1000, 10000, 100000]
+
+
+def recorriendo_historial(mesas):
+    """Versión anterior: cargar todos los pedidos de cada mesa y buscar el abierto"""
+    actuales = {}
+    for mesa in mesas:
+        for pedido in reversed(mesa.pedidos):
+            if pedido.estado not in ['entregado', 'cancelado']:
+                actuales[mesa.id] = pedido
+                break
+    return actuales
+
+
+def main():
+    print(f"{'historial':>10} {'mesa.pedidos (ms)':>18} {'ventana (ms)':>13}")
+    for total in HISTORIALES:
+        app = cargar_app(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+        with app.app_context():
+            poblar(total)
+            db.session.execute(update(Pedido).values(estado='entregado'))
+            # El pedido más reciente de cada mesa sigue abierto
+            ultimos = db.session.query(func.max(Pedido.id)).group_by(Pedido.mesa_id)
+            db.session.execute(update(Pedido).where(Pedido.id.in_(ultimos)).values(estado='pendiente'))
+            db.session.commit()
+            ids = [mesa.id for mesa in Mesa.query.all()]
+
+            def antes():
+                db.session.expire_all()
+                return recorriendo_historial(Mesa.query.all())
+
+            def despues():
+                db.session.expire_all()
+                return pedidos_actuales(ids)
+
+            esperado = {mesa_id: id for mesa_id, id in db.session.query(Pedido.mesa_id, Pedido.id).filter(
+                Pedido.estado == 'pendiente')}
+            obtenido = {mesa_id: pedido.id for mesa_id, pedido in despues().items()}
+            print(f"{total:>10} {cronometrar(antes):>18.2f} {cronometrar(despues):>13.2f}")
+            if obtenido != esperado:
+                print(f'\npedidos_actuales() devolvió {obtenido}, se esperaba {esperado}')
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
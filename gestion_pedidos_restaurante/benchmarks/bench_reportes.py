@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# Latencia de los gráficos de ventas por hora y uso de mesas frente al
+# número de pedidos, usando el índice cubriente ix_pedidos_fecha_mesa_total.
+#
+# Uso: python benchmarks/bench_reportes.py [1000 10000 100000]
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import cargar_app, db, func, Pedido, poblar, cronometrar
+from app.reportes.consultas import rango_fechas, uso_mesas_periodo, ventas_por_hora_periodo
+from sqlalchemy import extract
+
+TAMANOS = [int(n) for n in sys.argv[1:]] or [1000, 10000, 100000]
+
+
+def plan_consulta(consulta):
+    """Detalle de EXPLAIN QUERY PLAN para una consulta ORM"""
+    sql = consulta.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    filas = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}')).all()
+    return '; '.join(fila[-1] for fila in filas)
+
+
+def main():
+    directorio = tempfile.mkdtemp()
+    app = cargar_app(os.path.join(directorio, 'bench.db'))
+    fecha_inicio, fecha_fin = date(2025, 1, 1), date(2025, 12, 31)
+    
+    with app.app_context():
+        cargados = 0
+        resultados = []
+        for tamano in TAMANOS:
+            poblar(tamano - cargados, semilla=tamano)
+            cargados = tamano
+            t_horas = cronometrar(lambda: ventas_por_hora_periodo(fecha_inicio, fecha_fin))
+            t_mesas = cronometrar(lambda: uso_mesas_periodo(fecha_inicio, fecha_fin))
+            resultados.append((tamano, t_horas, t_mesas))
+        
+        inicio, fin = rango_fechas(fecha_inicio, fecha_fin)
+        hora = extract('hour', Pedido.fecha)
+        consulta = db.session.query(hora, func.sum(Pedido.total)).filter(
+            Pedido.fecha >= inicio, Pedido.fecha < fin).group_by(hora)
+        plan = plan_consulta(consulta)
+    
+    print(f"\n{'pedidos/año':>12} {'por hora (ms)':>14} {'por mesa (ms)':>14} {'us/pedido':>10}")
+    for tamano, t_horas, t_mesas in resultados:
+        print(f"{tamano:>12} {t_horas:>14.1f} {t_mesas:>14.1f} {(t_horas + t_mesas) * 1000 / tamano:>10.2f}")
+    print(f"\nPlan (ventas por hora): {plan}")
+
+
+if __name__ == '__main__':
+    main()
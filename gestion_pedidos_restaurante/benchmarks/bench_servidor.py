@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# Peticiones por segundo y latencia del servidor de desarrollo (un proceso)
+# frente a gunicorn con distintas combinaciones de workers e hilos, sobre
+# la misma base de datos poblada y con clientes autenticados concurrentes.
+#
+# Los clientes corren en este mismo equipo: con pocos núcleos compiten con
+# el servidor por la CPU, así que las cifras sirven para comparar
+# configuraciones entre sí, no como capacidad absoluta.
+#
+# Uso: python benchmarks/bench_servidor.py [clientes] [segundos] [pedidos]
+
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import cargar_app, cliente_autenticado, poblar, servidor
+
+CLIENTES = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+DURACION = float(sys.argv[2]) if len(sys.argv) > 2 else 15
+PEDIDOS = int(sys.argv[3]) if len(sys.argv) > 3 else 20000
+
+RUTAS = ['/', '/pedidos/', '/mesas', '/menu', '/dashboard/cocinero', '/reportes']
+
+# (nombre, comando, variables de entorno adicionales)
+SERVIDORES = [
+    ('desarrollo', [sys.executable, 'app.py'], {}),
+    ('gunicorn 1x4', ['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+     {'GUNICORN_WORKERS': '1', 'GUNICORN_THREADS': '4'}),
+    ('gunicorn 2x4', ['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+     {'GUNICORN_WORKERS': '2', 'GUNICORN_THREADS': '4'}),
+    ('gunicorn 4x1', ['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+     {'GUNICORN_WORKERS': '4', 'GUNICORN_THREADS': '1'}),
+    ('gunicorn 4x4', ['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+     {'GUNICORN_WORKERS': '4', 'GUNICORN_THREADS': '4'}),
+]
+
+
+def carga(url):
+    """Lanzar CLIENTES hilos durante DURACION segundos y devolver (peticiones/s, latencias, errores)"""
+    # El login (hash de la contraseña) queda fuera de la medición
+    openers = [cliente_autenticado(url) for _ in range(CLIENTES)]
+    latencias, errores = [], [0]
+    cerrojo = threading.Lock()
+    fin = time.monotonic() + DURACION
+
+    def trabajar(indice, opener):
+        propias, fallos = [], 0
+        i = indice
+        while time.monotonic() < fin:
+            ruta = RUTAS[i % len(RUTAS)]
+            i += 1
+            inicio = time.perf_counter()
+            try:
+                respuesta = opener.open(url + ruta, timeout=60)
+                respuesta.read()
+                if respuesta.status != 200:
+                    fallos += 1
+            except OSError:
+                fallos += 1
+            propias.append(time.perf_counter() - inicio)
+        with cerrojo:
+            latencias.extend(propias)
+            errores[0] += fallos
+
+    hilos = [threading.Thread(target=trabajar, args=(i, o)) for i, o in enumerate(openers)]
+    inicio = time.monotonic()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return len(latencias) / (time.monotonic() - inicio), latencias, errores[0]
+
+
+def main():
+    if not shutil.which('gunicorn'):
+        print('gunicorn no está instalado: solo se mide el servidor de desarrollo')
+
+    directorio = tempfile.mkdtemp()
+    db_path = os.path.join(directorio, 'bench.db')
+    app = cargar_app(db_path)
+    with app.app_context():
+        poblar(PEDIDOS)
+
+    print(f"\n{CLIENTES} clientes, {DURACION:.0f} s por servidor, {PEDIDOS} pedidos, {os.cpu_count()} CPU")
+    print(f"{'servidor':>14} {'pet/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'errores':>8}")
+    for nombre, comando, extra in SERVIDORES:
+        if comando[0] == 'gunicorn' and not shutil.which('gunicorn'):
+            continue
+        with servidor(comando, dict(extra, DATABASE_URL='sqlite:///' + db_path)) as url:
+            por_segundo, latencias, errores = carga(url)
+        cuantiles = statistics.quantiles(latencias, n=20)
+        print(f"{nombre:>14} {por_segundo:>8.1f} {cuantiles[9] * 1000:>9.1f} {cuantiles[18] * 1000:>9.1f} {errores:>8}")
+
+
+if __name__ == '__main__':
+    main()
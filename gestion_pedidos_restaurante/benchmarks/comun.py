@@ -0,0 +1,127 @@
+# Utilidades compartidas por los benchmarks: crear la aplicación contra una
+# base de datos temporal y poblarla con pedidos sintéticos.
+
+import http.cookiejar
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASEDIR)
+
+from app import create_app
+from app.config import uri_base_de_datos
+from app.datos_iniciales import crear_datos_iniciales
+from app.extensions import db
+from app.models import DetallePedido, Mesa, Pedido, Producto, Usuario
+from app.rollup import reconstruir_rollup
+from sqlalchemy import func, text
+
+
+def cargar_app(db_path, **config):
+    """Crear la aplicación apuntando a la base de datos indicada
+
+    `db_path` es la ruta de un archivo SQLite o una URL (p. ej. de
+    PostgreSQL). El mantenimiento periódico de SQLite queda desactivado
+    salvo que se pida: sus consultas en segundo plano se sumarían a las medidas.
+    """
+    uri = uri_base_de_datos(db_path) if '://' in db_path else 'sqlite:///' + db_path
+    return create_app({'SQLALCHEMY_DATABASE_URI': uri, 'SQLITE_MANTENIMIENTO_INTERVALO': 0, **config})
+
+
+def poblar(total_pedidos, dias=365, semilla=1):
+    """Insertar pedidos y detalles sintéticos repartidos en `dias` días (requiere app_context)"""
+    random.seed(semilla)
+    db.create_all()
+    crear_datos_iniciales()
+    mesas = [mesa.id for mesa in Mesa.query.all()]
+    usuarios = [usuario.id for usuario in Usuario.query.all()]
+    productos = [(p.id, p.precio) for p in Producto.query.all()]
+    estados = ['pendiente', 'preparando', 'listo', 'entregado', 'cancelado']
+    inicio = datetime(2025, 1, 1)
+    
+    siguiente_id = (db.session.query(func.max(Pedido.id)).scalar() or 0) + 1
+    lote = 10000
+    for desde in range(0, total_pedidos, lote):
+        pedidos, detalles = [], []
+        for pedido_id in range(siguiente_id + desde, siguiente_id + min(desde + lote, total_pedidos)):
+            total = 0
+            for _ in range(random.randint(1, 4)):
+                producto_id, precio = random.choice(productos)
+                cantidad = random.randint(1, 3)
+                detalles.append({'pedido_id': pedido_id, 'producto_id': producto_id, 'cantidad': cantidad,
+                                 'precio_unitario': precio, 'subtotal': cantidad * precio})
+                total += cantidad * precio
+            pedidos.append({'id': pedido_id, 'cliente_nombre': f'Cliente {pedido_id}',
+                            'mesa_id': random.choice(mesas), 'usuario_id': random.choice(usuarios),
+                            'estado': random.choice(estados), 'total': total,
+                            'fecha': inicio + timedelta(minutes=random.randint(0, dias * 24 * 60 - 1))})
+        db.session.execute(Pedido.__table__.insert(), pedidos)
+        db.session.execute(DetallePedido.__table__.insert(), detalles)
+    if db.engine.dialect.name == 'postgresql':
+        # Los id explícitos no avanzan la secuencia: el siguiente pedido chocaría
+        db.session.execute(text("SELECT setval(pg_get_serial_sequence('pedidos', 'id'), "
+                                "(SELECT max(id) FROM pedidos))"))
+    reconstruir_rollup()
+    db.session.commit()
+
+
+def cronometrar(funcion, repeticiones=5):
+    """Mediana en milisegundos de varias ejecuciones de `funcion`"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2]
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def esperar_servidor(url, limite=60):
+    """Esperar a que el servidor responda en /login"""
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        try:
+            urllib.request.urlopen(url + '/login', timeout=2).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'El servidor no respondió en {url}')
+
+
+@contextmanager
+def servidor(comando, entorno):
+    """Lanzar `comando` desde el proyecto en un puerto libre y devolver su URL al estar listo"""
+    puerto = puerto_libre()
+    entorno = dict(os.environ, PORT=str(puerto), GUNICORN_BIND=f'127.0.0.1:{puerto}',
+                   FLASK_ENV='production', **entorno)
+    proceso = subprocess.Popen(comando, cwd=BASEDIR, env=entorno,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{puerto}'
+    try:
+        esperar_servidor(url)
+        yield url
+    finally:
+        proceso.terminate()
+        proceso.wait(timeout=30)
+
+
+def cliente_autenticado(url):
+    """Opener con cookies y sesión iniciada como administrador"""
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    datos = urllib.parse.urlencode({'username': 'admin', 'password': 'admin123'}).encode()
+    opener.open(url + '/login', datos, timeout=30).read()
+    return opener
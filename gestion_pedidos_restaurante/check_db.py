@@ -7,8 +7,10 @@ import os
 # Agregar el directorio actual al path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Importar desde app.py directamente
-exec(open('app.py').read())
+from app import create_app
+from app.models import Pedido, Producto
+
+app = create_app()
 
 # Verificar pedidos
 with app.app_context():
@@ -28,4 +30,4 @@ with app.app_context():
     if productos:
         print("Algunos productos:")
         for prod in productos[:3]:
-            print(f"- {prod.nombre}: ${prod.precio}")
\ No newline at end of file
+            print(f"- {prod.nombre}: ${prod.precio}")
@@ -0,0 +1,51 @@
+# Configuración de gunicorn para producción: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Dimensionamiento (ver benchmarks/bench_servidor.py y DOCUMENTACION_TECNICA.txt):
+# las peticiones pasan la mayor parte del tiempo en SQLite y en plantillas
+# Jinja, que sostienen el GIL, así que el paralelismo real lo dan los
+# procesos. Los hilos solo cubren la espera de E/S (disco, red lenta).
+#   workers = núcleos, threads = 4
+# Con 1 CPU, 1x4 rinde igual que el servidor de desarrollo y 2x4 o 4x1
+# rinden menos: más procesos que núcleos solo añaden cambios de contexto y
+# contención sobre SQLite, que admite un solo escritor a la vez.
+# Cada pantalla de cocina conectada a /dashboard/cocinero/eventos ocupa un
+# hilo: COCINA_MAX_FLUJOS (2 por defecto) debe dejar hilos libres para las
+# demás peticiones. Las pantallas reciben los cambios de todos los workers
+# (el vigilante de cocina de cada proceso lee los pedidos abiertos).
+
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:' + os.environ.get('PORT', '5000'))
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+timeout = 120  # Las exportaciones pesadas van a la cola de reportes, pero el PDF directo puede tardar
+keepalive = 5
+
+# Reciclar workers cada cierto número de peticiones acota el crecimiento de memoria
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+
+# Cargar la aplicación una vez en el maestro y bifurcar: los workers
+# comparten por copy-on-write el código y los módulos ya importados
+preload_app = True
+
+
+def when_ready(server):
+    # Congelar los objetos creados durante la precarga: el recolector de
+    # basura deja de recorrerlos y no ensucia las páginas compartidas
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # El maestro no conserva conexiones (wsgi.py hace dispose), pero por si
+    # alguna se abrió tras la precarga, el worker no reutiliza las heredadas
+    from app.extensions import db
+    from app.solo_lectura import motor_lectura
+    from wsgi import app
+    with app.app_context():
+        db.engine.dispose(close=False)
+        if motor_lectura() is not None:
+            motor_lectura().dispose(close=False)
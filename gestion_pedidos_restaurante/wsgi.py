@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+# Punto de entrada WSGI para producción.
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app        (Linux)
+#   waitress-serve --threads=8 wsgi:app          (Windows o sin fork)
+
+from app import create_app
+from app.datos_iniciales import preparar_base_de_datos
+from app.extensions import db
+
+app = create_app()
+
+# La base de datos se prepara una sola vez al cargar la aplicación (en el
+# proceso maestro si gunicorn precarga la app). Luego se descartan las
+# conexiones abiertas para que ningún worker herede un socket o archivo
+# compartido: cada proceso abre las suyas en la primera petición.
+with app.app_context():
+    preparar_base_de_datos()
+    db.session.remove()
+    db.engine.dispose()